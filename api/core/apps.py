@@ -4,3 +4,11 @@ from django.apps import AppConfig
 class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'api.core'
+
+    def ready(self):
+        from django.conf import settings
+        from django.db.backends.signals import connection_created
+
+        from api.core.metrics import install_query_recorder
+        if settings.METRICS['ENABLED']:
+            connection_created.connect(install_query_recorder, dispatch_uid='request-metrics')
@@ -0,0 +1,11 @@
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+
+# Backends whose entries never leave the current process
+PROCESS_LOCAL_BACKENDS = (LocMemCache, DummyCache)
+
+
+def is_shared_cache(alias='default'):
+    """Whether every process reads and writes the same entries in cache ``alias``"""
+    return not isinstance(caches[alias], PROCESS_LOCAL_BACKENDS)
@@ -48,4 +48,8 @@ def custom_exception_handler(exc, context):
     if settings.DEBUG:
         payload["trace"] = traceback.format_exc()
 
-    return Response(payload, status=response.status_code if response else 500)
+    if response is None:
+        return Response(payload, status=500)
+    # Keeps the headers DRF set (Retry-After, WWW-Authenticate)
+    response.data = payload
+    return response
@@ -25,3 +25,13 @@ class ConflictException(APIException):
     status_code = status.HTTP_409_CONFLICT
     default_detail = "Conflict."
     default_code = "conflict"
+
+class ServiceUnavailableException(APIException):
+    """Temporarily overloaded; ``wait`` seconds go out as ``Retry-After``"""
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = "Service temporarily unavailable, try again later."
+    default_code = "service_unavailable"
+
+    def __init__(self, detail=None, code=None, wait=None):
+        super().__init__(detail, code)
+        self.wait = wait
@@ -0,0 +1,31 @@
+def parse_fieldset(spec):
+    """Turn ``"id,title,questions.id"`` into ``{'id': {}, 'title': {}, 'questions': {'id': {}}}``.
+
+    An empty subtree keeps the whole value; naming both ``questions`` and ``questions.id``
+    keeps the whole of ``questions``.
+    """
+    tree = {}
+    for path in spec.split(','):
+        names = [name.strip() for name in path.split('.')]
+        if not all(names):
+            continue
+        node = tree
+        for position, name in enumerate(names):
+            if name in node and not node[name]:
+                break  # already selected in full
+            if position == len(names) - 1:
+                node[name] = {}
+            else:
+                node = node.setdefault(name, {})
+    return tree
+
+
+def select_fields(data, tree):
+    """Copy of ``data`` keeping only the fields in ``tree``; lists are filtered item by item"""
+    if not tree:
+        return data
+    if isinstance(data, dict):
+        return {name: select_fields(data[name], subtree) for name, subtree in tree.items() if name in data}
+    if isinstance(data, list):
+        return [select_fields(item, tree) for item in data]
+    return data
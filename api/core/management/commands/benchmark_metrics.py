@@ -0,0 +1,59 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.conf import settings
+from django.db import connection
+from django.http import HttpResponse
+from django.test.client import RequestFactory
+from django.urls import resolve
+from rest_framework import serializers
+
+from api.core.metrics import TimedSerializerMixin, metrics
+from api.core.middleware import MetricsMiddleware
+
+
+class SampleSerializer(TimedSerializerMixin, serializers.Serializer):
+    id = serializers.IntegerField()
+    name = serializers.CharField()
+
+
+class Command(BaseCommand):
+    help = ("Time a minimal view that runs a few queries and serializes an object, with and "
+            "without MetricsMiddleware, and report the overhead the middleware adds per request.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=5000)
+        parser.add_argument('--queries', type=int, default=5)
+        parser.add_argument('--rounds', type=int, default=5)
+
+    def handle(self, *args, **options):
+        if not settings.METRICS['ENABLED']:
+            raise CommandError("METRICS['ENABLED'] is off")
+        count, query_count = options['requests'], options['queries']
+        request = RequestFactory().get('/api/exam/')
+        request.resolver_match = resolve('/api/exam/')
+
+        def view(request):
+            with connection.cursor() as cursor:
+                for _ in range(query_count):
+                    cursor.execute("SELECT 1")
+            return HttpResponse(SampleSerializer({'id': 1, 'name': 'sample'}).data['name'])
+
+        # Alternate the two and keep each one's best round, so load on the machine cancels out
+        middleware = MetricsMiddleware(view)
+        bare, instrumented = float('inf'), float('inf')
+        for _ in range(options['rounds']):
+            bare = min(bare, self.measure(view, request, count))
+            instrumented = min(instrumented, self.measure(middleware, request, count))
+        metrics.clear()
+        self.stdout.write(f"bare          {bare * 1e6:8.1f} us/request")
+        self.stdout.write(f"instrumented  {instrumented * 1e6:8.1f} us/request")
+        self.stdout.write(f"overhead      {(instrumented - bare) * 1e6:8.1f} us/request ({query_count} queries)")
+
+    @staticmethod
+    def measure(handler, request, count):
+        handler(request)
+        started = time.perf_counter()
+        for _ in range(count):
+            handler(request)
+        return (time.perf_counter() - started) / count
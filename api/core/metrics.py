@@ -0,0 +1,198 @@
+import threading
+from bisect import bisect_left
+from contextvars import ContextVar
+from time import perf_counter
+
+from rest_framework.fields import empty
+
+# Sample of the request being handled in this context; None outside requests. Context
+# variables follow the request into sync_to_async threads, so queries run there are counted too.
+current_sample = ContextVar('request_metrics_sample', default=None)
+
+
+class RequestSample:
+    """What one request spent on the database and in serializers"""
+    __slots__ = ('queries', 'db_seconds', 'serializer_seconds', 'serializing')
+
+    def __init__(self):
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.serializer_seconds = 0.0
+        self.serializing = False
+
+
+def record_query(execute, sql, params, many, context):
+    """``execute_wrapper`` counting and timing queries into the current request's sample"""
+    sample = current_sample.get()
+    if sample is None:
+        return execute(sql, params, many, context)
+    started = perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        sample.queries += 1
+        sample.db_seconds += perf_counter() - started
+
+
+def install_query_recorder(sender, connection, **kwargs):
+    """``connection_created`` receiver: every connection gets the wrapper once, whichever thread
+    opens it"""
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+def timed_serializer_call(method, *args):
+    """Call ``method`` and add its time to the current sample, unless a serializer is already
+    being timed: nested serializers are part of their caller's time"""
+    sample = current_sample.get()
+    if sample is None or sample.serializing:
+        return method(*args)
+    sample.serializing = True
+    started = perf_counter()
+    try:
+        return method(*args)
+    finally:
+        sample.serializer_seconds += perf_counter() - started
+        sample.serializing = False
+
+
+class TimedSerializerMixin:
+    """Records serializer time (validation and representation) in the request's sample.
+
+    Hooks ``to_representation`` and ``run_validation``, which both ``data``/``is_valid`` and a
+    ``ListSerializer`` (``many=True``) go through, once per item for lists.
+    """
+
+    def to_representation(self, instance):
+        return timed_serializer_call(super().to_representation, instance)
+
+    def run_validation(self, data=empty):
+        return timed_serializer_call(super().run_validation, data)
+
+
+def escape_label(value):
+    return str(value).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n')
+
+
+def format_labels(names, values, extra=''):
+    pairs = [f'{name}="{escape_label(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+class Histogram:
+    """Prometheus histogram. Not locked: ``MetricsRegistry`` holds its lock while observing."""
+
+    def __init__(self, name, help, labels, buckets):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.buckets = tuple(buckets)
+        # label values -> per-bucket (non-cumulative) counts, the +Inf bucket last, then the sum
+        self.series = {}
+
+    def observe(self, label_values, value):
+        series = self.series.get(label_values)
+        if series is None:
+            series = self.series[label_values] = [0] * (len(self.buckets) + 2)
+        series[bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def render(self):
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} histogram"
+        bounds = [repr(float(bound)) for bound in self.buckets] + ['+Inf']
+        for label_values, series in sorted(self.series.items()):
+            count = 0
+            for bound, bucket_count in zip(bounds, series):
+                count += bucket_count
+                le = f'le="{bound}"'
+                yield f"{self.name}_bucket{format_labels(self.labels, label_values, le)} {count}"
+            labels = format_labels(self.labels, label_values)
+            yield f"{self.name}_sum{labels} {series[-1]}"
+            yield f"{self.name}_count{labels} {count}"
+
+
+class Counter:
+    def __init__(self, name, help, labels):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.series = {}
+
+    def inc(self, label_values, amount=1):
+        self.series[label_values] = self.series.get(label_values, 0) + amount
+
+    def render(self):
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} counter"
+        for label_values, value in sorted(self.series.items()):
+            yield f"{self.name}{format_labels(self.labels, label_values)} {value}"
+
+
+class MetricsRegistry:
+    """Process-local request metrics, rendered in the Prometheus text format.
+
+    Each request is recorded under one lock acquisition: a handful of dict lookups and
+    bisects, a few microseconds. Series are labelled by URL route (``api/exam/<uuid:id>/``),
+    not path, so their number stays bounded. Every process exposes its own numbers; the
+    scraper sums them across processes.
+    """
+    ENDPOINT_LABELS = ('method', 'endpoint')
+    LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+    QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+    SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = Counter('http_requests_total', "Requests handled, by response status",
+                                ('method', 'endpoint', 'status'))
+        self.latency = Histogram('http_request_duration_seconds', "Time to produce the response",
+                                 self.ENDPOINT_LABELS, self.LATENCY_BUCKETS)
+        self.queries = Histogram('http_request_db_queries', "Database queries per request",
+                                 self.ENDPOINT_LABELS, self.QUERY_BUCKETS)
+        self.db_time = Histogram('http_request_db_duration_seconds', "Time spent in database queries",
+                                 self.ENDPOINT_LABELS, self.LATENCY_BUCKETS)
+        self.serializer_time = Histogram('http_request_serializer_duration_seconds',
+                                         "Time spent in serializers (validation and representation)",
+                                         self.ENDPOINT_LABELS, self.LATENCY_BUCKETS)
+        self.response_size = Histogram('http_response_size_bytes', "Size of non-streaming response bodies",
+                                       self.ENDPOINT_LABELS, self.SIZE_BUCKETS)
+        self.collectors = []
+
+    def add_collector(self, collect):
+        """Register a callable that returns extra counters at scrape time, as
+        ``(name, help, [(labels dict, value), ...])`` tuples"""
+        self.collectors.append(collect)
+
+    def observe(self, method, endpoint, status, seconds, sample, size=None):
+        labels = (method, endpoint)
+        with self._lock:
+            self.requests.inc((method, endpoint, str(status)))
+            self.latency.observe(labels, seconds)
+            self.queries.observe(labels, sample.queries)
+            self.db_time.observe(labels, sample.db_seconds)
+            self.serializer_time.observe(labels, sample.serializer_seconds)
+            if size is not None:
+                self.response_size.observe(labels, size)
+
+    def render(self):
+        with self._lock:
+            lines = [line for metric in (self.requests, self.latency, self.queries, self.db_time,
+                                         self.serializer_time, self.response_size)
+                     for line in metric.render()]
+        for collect in self.collectors:
+            for name, help, samples in collect():
+                lines += [f"# HELP {name} {help}", f"# TYPE {name} counter"]
+                lines += [f"{name}{format_labels(labels, labels.values())} {value}" for labels, value in samples]
+        return '\n'.join(lines) + '\n'
+
+    def clear(self):
+        with self._lock:
+            for metric in (self.requests, self.latency, self.queries, self.db_time, self.serializer_time,
+                           self.response_size):
+                metric.series.clear()
+
+
+metrics = MetricsRegistry()
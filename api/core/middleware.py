@@ -0,0 +1,166 @@
+import json
+import logging
+import secrets
+from time import perf_counter
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.middleware.gzip import GZipMiddleware
+from django.utils.cache import patch_vary_headers
+from django.utils.regex_helper import _lazy_re_compile
+
+try:
+    import brotli
+except ImportError:  # optional: without it responses are only gzipped
+    brotli = None
+
+from api.core.metrics import RequestSample, current_sample, metrics
+
+re_accepts_brotli = _lazy_re_compile(r"\bbr\b")
+
+logger = logging.getLogger('api.requests')
+
+
+class CompressionMiddleware(GZipMiddleware):
+    """``GZipMiddleware`` that prefers brotli when the client accepts ``br`` and the optional
+    ``brotli`` package is installed.
+
+    Streaming responses are compressed chunk by chunk as they are produced, so a streamed
+    list is never held in memory, compressed or not. Brotli bodies get random-length padding
+    like gzip ones (see ``brotli_padding``) as a BREACH mitigation.
+    """
+    # Brotli 4-6 compresses better than gzip at a similar speed; higher levels are for static assets
+    brotli_quality = 5
+
+    def brotli_padding(self):
+        """A metadata meta-block (RFC 7932, section 9.2) of 1 to ``max_random_bytes`` bytes.
+
+        Decoders skip it; like the random file name ``GZipMiddleware`` writes into the gzip
+        header it makes the body length vary from one response to the next. It has to start on
+        a byte boundary, which is where a compressor stands after ``flush()``.
+        """
+        if not self.max_random_bytes:
+            return b''
+        # One length byte: at most 256 bytes of padding
+        length = secrets.randbelow(min(self.max_random_bytes, 256)) + 1
+        # ISLAST=0, MNIBBLES=0 (metadata), reserved bit, MSKIPBYTES=1, MSKIPLEN-1, then alignment
+        header = 0b110 | 1 << 4 | (length - 1) << 6
+        return header.to_bytes(2, 'little') + bytes(length)
+
+    def brotli_compressor(self):
+        """A compressor and the stream start: its header and the padding"""
+        compressor = brotli.Compressor(quality=self.brotli_quality)
+        return compressor, compressor.flush() + self.brotli_padding()
+
+    def process_response(self, request, response):
+        if brotli is None or not re_accepts_brotli.search(request.META.get("HTTP_ACCEPT_ENCODING", "")):
+            return super().process_response(request, response)
+
+        if not response.streaming and len(response.content) < 200:
+            return response
+        if response.has_header("Content-Encoding"):
+            return response
+
+        patch_vary_headers(response, ("Accept-Encoding",))
+
+        if response.streaming:
+            if response.is_async:
+                original_iterator = response.streaming_content
+
+                async def brotli_wrapper():
+                    compressor, start = self.brotli_compressor()
+                    yield start
+                    async for chunk in original_iterator:
+                        if data := compressor.process(chunk) + compressor.flush():
+                            yield data
+                    yield compressor.finish()
+
+                response.streaming_content = brotli_wrapper()
+            else:
+                response.streaming_content = self.compress_sequence(response.streaming_content)
+            del response.headers["Content-Length"]
+        else:
+            compressor, start = self.brotli_compressor()
+            compressed_content = start + compressor.process(response.content) + compressor.finish()
+            if len(compressed_content) >= len(response.content):
+                return response
+            response.content = compressed_content
+            response.headers["Content-Length"] = str(len(response.content))
+
+        etag = response.get("ETag")
+        if etag and etag.startswith('"'):
+            response.headers["ETag"] = "W/" + etag
+        response.headers["Content-Encoding"] = "br"
+        return response
+
+    def compress_sequence(self, sequence):
+        compressor, start = self.brotli_compressor()
+        yield start
+        for chunk in sequence:
+            # Flush per chunk so every chunk the view yields reaches the client right away
+            if data := compressor.process(chunk) + compressor.flush():
+                yield data
+        yield compressor.finish()
+
+
+class MetricsMiddleware:
+    """Record latency, database and serializer time and response size of every request.
+
+    Goes first in ``MIDDLEWARE`` so it times the whole stack and sees the body size as sent
+    (compressed). Queries and serializers add to the request's ``RequestSample`` through a
+    context variable (see ``api.core.metrics``), which also works for async views. With
+    ``METRICS['ENABLED']`` off, Django drops the middleware. For streaming responses the
+    latency is the time to the first byte and no size is recorded.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.METRICS['ENABLED']:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.log_requests = settings.METRICS['LOG_REQUESTS']
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        sample = RequestSample()
+        token = current_sample.set(sample)
+        started = perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            current_sample.reset(token)
+        self.record(request, response, perf_counter() - started, sample)
+        return response
+
+    async def __acall__(self, request):
+        sample = RequestSample()
+        token = current_sample.set(sample)
+        started = perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_sample.reset(token)
+        self.record(request, response, perf_counter() - started, sample)
+        return response
+
+    def record(self, request, response, seconds, sample):
+        match = request.resolver_match
+        endpoint = match.route if match is not None else 'unmatched'
+        size = None
+        if not response.streaming:
+            size = int(response.headers.get('Content-Length') or len(response.content))
+        metrics.observe(request.method, endpoint, response.status_code, seconds, sample, size)
+
+        if self.log_requests:
+            logger.info(json.dumps({
+                'method': request.method, 'path': request.path, 'endpoint': endpoint,
+                'status': response.status_code, 'duration_ms': round(seconds * 1000, 3),
+                'db_queries': sample.queries, 'db_ms': round(sample.db_seconds * 1000, 3),
+                'serializer_ms': round(sample.serializer_seconds * 1000, 3), 'bytes': size,
+            }))
@@ -0,0 +1,116 @@
+from calendar import timegm
+
+from django.utils.cache import get_conditional_response, patch_vary_headers, quote_etag
+from django.utils.http import http_date
+
+from api.core.fieldsets import parse_fieldset, select_fields
+from api.core.responses import success_stream
+from api.core.routers import read_from_replica
+
+
+class ReplicaReadMixin:
+    """Serve safe requests of a read-only view from the read replica.
+
+    Replication lag means a client may briefly not see its own write, so only use this on
+    views where that is acceptable.
+    """
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.method in ('GET', 'HEAD', 'OPTIONS'):
+            with read_from_replica():
+                return super().dispatch(request, *args, **kwargs)
+        return super().dispatch(request, *args, **kwargs)
+
+
+class SparseFieldsetMixin:
+    """Let clients trim a successful ``success()`` payload with ``?fields=id,title,questions.id``.
+
+    Fields are picked from the serialized data rather than in the serializer, so it also works
+    for payloads served from the paper caches. Paginated payloads are filtered per result, and
+    unknown field names are ignored.
+    """
+    fields_param = 'fields'
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        spec = request.query_params.get(self.fields_param) if hasattr(request, 'query_params') else None
+        payload = getattr(response, 'data', None)
+        if not spec or response.status_code >= 300 or not isinstance(payload, dict) or 'data' not in payload:
+            return response
+
+        tree = parse_fieldset(spec)
+        data = payload['data']
+        if isinstance(data, dict) and isinstance(data.get('results'), list):
+            data = {**data, 'results': select_fields(data['results'], tree)}
+        else:
+            data = select_fields(data, tree)
+        response.data = {**payload, 'data': data}
+        return response
+
+
+class ConditionalGetMixin:
+    """``ETag``/``Last-Modified`` headers and ``304 Not Modified`` for read views.
+
+    Views override ``get_validators()`` to return ``(etag, last_modified)`` from something
+    much cheaper than building the body (the default ``None`` skips the check), and start
+    ``get`` with ``not_modified()`` so the check runs after authentication and permissions.
+    ETags are weak: they stand for the data, which may be rendered in any negotiated format.
+    Read the validators and the body from the same database, so not with ``ReplicaReadMixin``:
+    a lagging replica's body would go out under the primary's newer ETag.
+    """
+    validators = None
+
+    def get_validators(self):
+        return None
+
+    def not_modified(self, request):
+        """The 304 response to return when the client's copy is current, else ``None``"""
+        self.validators = self.get_validators()
+        if self.validators is None:
+            return None
+        etag, last_modified = self.validators
+        return get_conditional_response(request, etag=self.format_etag(etag),
+                                        last_modified=timegm(last_modified.utctimetuple()))
+
+    @staticmethod
+    def format_etag(etag):
+        return f"W/{quote_etag(etag)}"
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        if self.validators is not None and response.status_code in (200, 304):
+            etag, last_modified = self.validators
+            response['ETag'] = self.format_etag(etag)
+            response['Last-Modified'] = http_date(timegm(last_modified.utctimetuple()))
+            patch_vary_headers(response, ['Accept'])
+        return response
+
+
+class StreamingListMixin:
+    """Opt-in ``?stream=true`` for list views: every matching item in one streamed response
+    instead of a page.
+
+    Items are read with ``queryset.iterator()`` and serialized one at a time inside the usual
+    ``success()`` envelope, so memory stays flat however long the list is. ``?fields=`` applies
+    per item. Views call ``stream_response()`` at the top of ``get``; streamed output is always JSON.
+    """
+    stream_param = 'stream'
+    stream_chunk_size = 1000
+
+    def stream_response(self, request, message):
+        """The streamed response when the client asked for one, else ``None``"""
+        if request.query_params.get(self.stream_param) not in ('true', '1'):
+            return None
+        queryset = self.filter_queryset(self.get_queryset())
+        ordering = getattr(self.paginator, 'ordering', None)
+        if ordering:
+            queryset = queryset.order_by(*ordering)
+        # Pin the database now: the body is produced after dispatch (and any replica block) returns
+        queryset = queryset.using(queryset.db)
+
+        serializer_class = self.get_serializer_class()
+        context = self.get_serializer_context()
+        tree = parse_fieldset(request.query_params.get('fields', ''))
+        items = (select_fields(serializer_class(item, context=context).data, tree)
+                 for item in queryset.iterator(chunk_size=self.stream_chunk_size))
+        return success_stream(items, message)
@@ -0,0 +1,18 @@
+from rest_framework.pagination import CursorPagination
+
+
+class KeysetPagination(CursorPagination):
+    """Cursor pagination on a unique, indexed ordering so page N costs the same as page 1"""
+    ordering = ('-created_at', 'id')
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+
+
+class ExamProctorKeysetPagination(KeysetPagination):
+    ordering = ('-assigned_at', 'id')
+
+
+class ProctorKeysetPagination(KeysetPagination):
+    # The cursor holds the first field only: a name there would page through ties by offset
+    ordering = ('id',)
@@ -1,5 +1,12 @@
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import JsonResponse, StreamingHttpResponse
 from rest_framework.response import Response
 
+from api.core.renderers import ORJSONRenderer
+
+# Bytes of rendered items gathered before a streamed response yields a chunk
+STREAM_CHUNK_BYTES = 64 * 1024
+
 def success(data=None, message="Your request was processed successfully", status=200):
     return Response({
         "status": "success",
@@ -13,3 +20,46 @@ def error(message="An error occurred while processing request", status=400, erro
         "message": message,
         "errors": errors or []
     }, status=status)
+
+
+def success_json(data=None, message="Your request was processed successfully", status=200,
+                 encoder=DjangoJSONEncoder):
+    """``success()`` for plain Django (e.g. async) views that bypass DRF's renderers"""
+    return JsonResponse({
+        "status": "success",
+        "message": message,
+        "data": data
+    }, status=status, encoder=encoder)
+
+def error_json(message="An error occurred while processing request", status=400, errors=None,
+               encoder=DjangoJSONEncoder):
+    """``error()`` for plain Django (e.g. async) views that bypass DRF's renderers"""
+    return JsonResponse({
+        "status": "error",
+        "message": message,
+        "errors": errors or []
+    }, status=status, encoder=encoder)
+
+
+def success_stream(items, message="Your request was processed successfully", status=200):
+    """``success()`` with ``data`` streamed as a JSON array, rendering ``items`` one at a time.
+
+    Only the current chunk is held in memory, and the first bytes go out before the last item
+    is read, so pass a lazy iterable such as ``queryset.iterator()``.
+    """
+    renderer = ORJSONRenderer()
+
+    def chunks():
+        buffer = bytearray(b'{"status":"success","message":')
+        buffer += renderer.render(message) + b',"data":['
+        for index, item in enumerate(items):
+            if index:
+                buffer += b','
+            buffer += renderer.render(item)
+            if len(buffer) >= STREAM_CHUNK_BYTES:
+                yield bytes(buffer)
+                buffer.clear()
+        buffer += b']}'
+        yield bytes(buffer)
+
+    return StreamingHttpResponse(chunks(), status=status, content_type=renderer.media_type)
@@ -1,3 +1,176 @@
-from django.test import TestCase
+import json
+from decimal import Decimal
+from unittest import mock
+from uuid import uuid4
 
-# Create your tests here.
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.db.utils import ConnectionHandler
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+from rest_framework.test import APIClient, APIRequestFactory
+from rest_framework.views import APIView
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from api.core.fieldsets import parse_fieldset, select_fields
+from api.core.metrics import metrics
+from api.core.mixins import ConditionalGetMixin
+from api.core.middleware import MetricsMiddleware
+from api.core.renderers import ORJSONRenderer
+from api.core.routers import PrimaryReplicaRouter, REPLICA_ALIAS, read_from_primary, read_from_replica
+from api.exams.models import Exam
+from api.users.models import User
+
+
+class PrimaryReplicaRouterTests(SimpleTestCase):
+    def setUp(self):
+        self.router = PrimaryReplicaRouter()
+        self.databases = {
+            'default': {**connections.settings['default'], 'NAME': 'primary.sqlite3'},
+            REPLICA_ALIAS: {**connections.settings['default'], 'NAME': 'replica.sqlite3'},
+        }
+        patcher = mock.patch('api.core.routers.connections', ConnectionHandler(self.databases))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_reads_use_primary_outside_replica_block(self):
+        self.assertIsNone(self.router.db_for_read(Exam))
+
+    def test_reads_use_replica_inside_replica_block(self):
+        with read_from_replica():
+            self.assertEqual(self.router.db_for_read(Exam), REPLICA_ALIAS)
+            self.assertEqual(self.router.db_for_write(Exam), 'default')
+        self.assertIsNone(self.router.db_for_read(Exam))
+
+    def test_primary_block_overrides_replica_block(self):
+        with read_from_replica():
+            with read_from_primary():
+                self.assertIsNone(self.router.db_for_read(Exam))
+            self.assertEqual(self.router.db_for_read(Exam), REPLICA_ALIAS)
+
+    def test_replica_block_is_a_no_op_without_replica(self):
+        del self.databases[REPLICA_ALIAS]
+        with read_from_replica():
+            self.assertIsNone(self.router.db_for_read(Exam))
+
+    def test_mirrored_replica_reads_through_primary(self):
+        self.databases[REPLICA_ALIAS]['NAME'] = self.databases['default']['NAME']
+        with read_from_replica():
+            self.assertIsNone(self.router.db_for_read(Exam))
+
+    def test_replica_on_another_host_with_the_same_name(self):
+        self.databases['default'].update(NAME='sd_mvp', HOST='primary.internal')
+        self.databases[REPLICA_ALIAS].update(NAME='sd_mvp', HOST='replica.internal')
+        with read_from_replica():
+            self.assertEqual(self.router.db_for_read(Exam), REPLICA_ALIAS)
+
+    def test_replica_is_never_migrated(self):
+        self.assertFalse(self.router.allow_migrate(REPLICA_ALIAS, 'exams'))
+        self.assertTrue(self.router.allow_migrate('default', 'exams'))
+
+
+class SparseFieldsetTests(SimpleTestCase):
+    def test_parse_fieldset(self):
+        self.assertEqual(parse_fieldset('id, title,questions.id,questions.options.id,,questions.'),
+                         {'id': {}, 'title': {}, 'questions': {'id': {}, 'options': {'id': {}}}})
+        self.assertEqual(parse_fieldset('questions.id,questions'), {'questions': {}})
+        self.assertEqual(parse_fieldset('questions,questions.id'), {'questions': {}})
+
+    def test_select_fields_walks_nested_lists(self):
+        data = {'id': 1, 'title': 'T', 'status': 'draft',
+                'questions': [{'id': 2, 'text': 'Q', 'options': [{'id': 3, 'text': 'O'}]}]}
+        self.assertEqual(select_fields(data, parse_fieldset('id,questions.options.id,missing')),
+                         {'id': 1, 'questions': [{'options': [{'id': 3}]}]})
+        self.assertIs(select_fields(data, {}), data)
+
+
+class ConditionalGetTests(SimpleTestCase):
+    def test_views_without_validators_answer_normally(self):
+        class PlainView(ConditionalGetMixin, APIView):
+            authentication_classes = []
+            permission_classes = []
+
+            def get(self, request):
+                return self.not_modified(request) or Response({'ok': True})
+
+        response = PlainView.as_view()(APIRequestFactory().get('/', HTTP_IF_NONE_MATCH='*'))
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('ETag', response)
+
+
+class ORJSONRendererTests(SimpleTestCase):
+    def test_matches_the_stock_json_renderer(self):
+        data = {'id': uuid4(), 'score': Decimal('12.50'), 'at': timezone.now(), 'items': [1, None, 'x'], 2: True}
+        self.assertEqual(json.loads(ORJSONRenderer().render(data)), json.loads(JSONRenderer().render(data)))
+        self.assertEqual(ORJSONRenderer().render(None), b'')
+
+
+@override_settings(METRICS={'ENABLED': True, 'LOG_REQUESTS': False, 'TOKEN': 'scrape-me'})
+class RequestMetricsTests(TestCase):
+    def setUp(self):
+        metrics.clear()
+        self.admin = User.objects.create(
+            username='admin', email='admin@example.com', first_name='Ada', last_name='Admin', role='admin'
+        )
+        self.exam = Exam.objects.create(title='Exam', created_by=self.admin, duration_minutes=60, passing_score=50)
+        self.token = str(RefreshToken.for_user(self.admin).access_token)
+        self.client = APIClient()
+
+    def scrape(self):
+        response = self.client.get(reverse('metrics'), headers={'Authorization': 'Bearer scrape-me'})
+        self.assertEqual(response.status_code, 200)
+        return response.content.decode().splitlines()
+
+    def value(self, lines, prefix):
+        return float(next(line for line in lines if line.startswith(prefix + ' ')).rsplit(' ', 1)[1])
+
+    def test_records_endpoints_by_route(self):
+        self.client.force_authenticate(self.admin)
+        for _ in range(2):
+            self.assertEqual(self.client.get(reverse('exam-list')).status_code, 200)
+        self.client.get('/no/such/path/')
+
+        lines = self.scrape()
+        labels = '{method="GET",endpoint="api/exam/"}'
+        self.assertEqual(self.value(lines, 'http_requests_total{method="GET",endpoint="api/exam/",status="200"}'), 2)
+        self.assertEqual(self.value(lines, 'http_requests_total{method="GET",endpoint="unmatched",status="404"}'), 1)
+        self.assertEqual(self.value(lines, f'http_request_duration_seconds_count{labels}'), 2)
+        self.assertEqual(self.value(lines, 'http_request_duration_seconds_bucket{method="GET",endpoint="api/exam/",le="+Inf"}'), 2)
+        self.assertGreater(self.value(lines, f'http_request_db_queries_sum{labels}'), 0)
+        self.assertGreater(self.value(lines, f'http_request_db_duration_seconds_sum{labels}'), 0)
+        self.assertGreater(self.value(lines, f'http_request_serializer_duration_seconds_sum{labels}'), 0)
+        self.assertGreater(self.value(lines, f'http_response_size_bytes_sum{labels}'), 0)
+        self.assertIn('# TYPE paper_cache_hits_total counter', lines)
+
+    async def test_counts_queries_of_async_views(self):
+        response = await self.async_client.get(reverse('exam-detail-async', kwargs={'id': self.exam.id}),
+                                               headers={'Authorization': f"Bearer {self.token}"})
+        self.assertEqual(response.status_code, 200)
+        lines = metrics.render().splitlines()
+        self.assertGreater(self.value(lines, 'http_request_db_queries_sum{method="GET",endpoint="api/exam/async/<uuid:id>/"}'), 0)
+
+    def test_structured_log_line(self):
+        with override_settings(METRICS={'ENABLED': True, 'LOG_REQUESTS': True, 'TOKEN': ''}), \
+                self.assertLogs('api.requests') as logs:
+            APIClient().get('/no/such/path/')
+        line = json.loads(logs.records[0].getMessage())
+        self.assertEqual((line['endpoint'], line['status'], line['db_queries']), ('unmatched', 404, 0))
+
+    def test_token(self):
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 401)
+        self.scrape()
+
+    def test_no_token_only_in_debug(self):
+        with override_settings(METRICS={'ENABLED': True, 'LOG_REQUESTS': False, 'TOKEN': ''}):
+            self.assertEqual(self.client.get(reverse('metrics')).status_code, 404)
+            with override_settings(DEBUG=True):
+                self.assertEqual(self.client.get(reverse('metrics')).status_code, 200)
+
+    @override_settings(METRICS={'ENABLED': False, 'LOG_REQUESTS': False, 'TOKEN': ''})
+    def test_disabled(self):
+        with self.assertRaises(MiddlewareNotUsed):
+            MetricsMiddleware(lambda request: None)
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 404)
@@ -1,3 +1,22 @@
-from django.shortcuts import render
+from django.conf import settings
+from django.http import Http404, HttpResponse
+from django.utils.crypto import constant_time_compare
+from django.views import View
 
-# Create your views here.
+from api.core.metrics import metrics
+
+
+class MetricsView(View):
+    """Request metrics of this process in the Prometheus text format, for scrapers.
+
+    Outside DRF, so scrapers need no JWT: they send ``METRICS['TOKEN']`` as a bearer token
+    instead. Without a token the endpoint is only served with ``DEBUG`` on.
+    """
+
+    def get(self, request):
+        token = settings.METRICS['TOKEN']
+        if not settings.METRICS['ENABLED'] or not (token or settings.DEBUG):
+            raise Http404
+        if token and not constant_time_compare(request.headers.get('Authorization', ''), f"Bearer {token}"):
+            return HttpResponse("Invalid metrics token", status=401, content_type='text/plain')
+        return HttpResponse(metrics.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
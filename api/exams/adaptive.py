@@ -0,0 +1,105 @@
+import numpy as np
+from django.conf import settings
+
+from api.exams.models import Exam, Question, QuestionOption
+from api.results.grading import AnswerKey
+
+
+class ItemIndex:
+    """In-memory item bank of an adaptive exam, with item statistics precomputed on a theta grid.
+
+    Item parameters come from ``Question.metadata['irt']`` as the 3PL ``a`` (discrimination),
+    ``b`` (difficulty) and ``c`` (guessing). Response probabilities and Fisher information are
+    tabulated per item over ``GRID`` once, so choosing the next item is a column lookup plus a
+    masked argmax and updating an ability estimate only sums precomputed rows. Ability is the
+    EAP estimate under a standard normal prior. Methods work on a batch of candidates at once.
+    """
+    GRID = np.linspace(-4, 4, 81)
+    LOG_PRIOR = -GRID ** 2 / 2
+    DEFAULT_PARAMETERS = {'a': 1.0, 'b': 0.0, 'c': 0.0}
+
+    def __init__(self, question_ids, a, b, c, correct_options, max_items, min_standard_error):
+        self.question_ids = [str(question_id) for question_id in question_ids]
+        self.positions = {question_id: position for position, question_id in enumerate(self.question_ids)}
+        self.correct_options = [frozenset(map(str, options)) for options in correct_options]
+        self.a, self.b, self.c = (np.asarray(values, dtype=np.float64) for values in (a, b, c))
+        self.max_items = min(max_items, len(self.question_ids))
+        self.min_standard_error = min_standard_error
+
+        items = np.arange(len(self.question_ids))[:, None]
+        p = np.clip(self.probability(self.GRID[None, :], items), 1e-9, 1 - 1e-9)
+        self.log_p = np.log(p)
+        self.log_q = np.log1p(-p)
+        c = self.c[:, None]
+        self.information = self.a[:, None] ** 2 * ((p - c) / (1 - c)) ** 2 * ((1 - p) / p)
+
+    def __len__(self):
+        return len(self.question_ids)
+
+    @classmethod
+    def for_exam(cls, exam_id):
+        """Build the index from the exam's objective questions; ``None`` if the exam doesn't exist"""
+        exam = Exam.objects.filter(id=exam_id).values('settings').first()
+        if exam is None:
+            return None
+        config = settings.ADAPTIVE_TESTING
+        overrides = (exam['settings'] or {}).get('adaptive', {})
+
+        correct = {}
+        for question_id, option_id in (QuestionOption.objects.filter(question__exam_id=exam_id, is_correct=True)
+                                       .values_list('question_id', 'id')):
+            correct.setdefault(question_id, []).append(option_id)
+
+        question_ids, parameters, correct_options = [], {'a': [], 'b': [], 'c': []}, []
+        questions = (Question.objects.filter(exam_id=exam_id, question_type__in=AnswerKey.GRADABLE_TYPES)
+                     .order_by('order_index').values_list('id', 'metadata'))
+        for question_id, metadata in questions:
+            if question_id not in correct:
+                continue
+            irt = {**cls.DEFAULT_PARAMETERS, **((metadata or {}).get('irt') or {})}
+            question_ids.append(question_id)
+            correct_options.append(correct[question_id])
+            for name in parameters:
+                parameters[name].append(float(irt[name]))
+
+        return cls(question_ids, parameters['a'], parameters['b'], parameters['c'], correct_options,
+                   max_items=overrides.get('max_items', config['MAX_ITEMS']),
+                   min_standard_error=overrides.get('min_standard_error', config['MIN_STANDARD_ERROR']))
+
+    def probability(self, thetas, items):
+        """3PL probability that candidates at ``thetas`` answer ``items`` correctly (broadcast element-wise)"""
+        a, b, c = self.a[items], self.b[items], self.c[items]
+        return c + (1 - c) / (1 + np.exp(-a * (thetas - b)))
+
+    def grid_positions(self, thetas):
+        step = self.GRID[1] - self.GRID[0]
+        return np.clip(np.rint((np.asarray(thetas) - self.GRID[0]) / step), 0, len(self.GRID) - 1).astype(np.intp)
+
+    def select(self, thetas, administered):
+        """Most informative item not yet administered, per candidate (-1 once the bank is exhausted).
+
+        ``thetas`` has shape ``(N,)`` and ``administered`` is an ``(N, items)`` boolean mask.
+        """
+        information = np.where(administered, -np.inf, self.information[:, self.grid_positions(thetas)].T)
+        items = information.argmax(axis=1)
+        items[administered.all(axis=1)] = -1
+        return items
+
+    def log_posterior(self, items, responses):
+        """One candidate's ``(1, grid)`` log posterior from the items they answered and whether
+        each answer was correct"""
+        items = np.asarray(items, dtype=np.intp)
+        responses = np.asarray(responses, dtype=bool)
+        return (self.LOG_PRIOR + self.log_p[items[responses]].sum(axis=0)
+                + self.log_q[items[~responses]].sum(axis=0))[None, :]
+
+    def estimate(self, log_posterior):
+        """EAP abilities and their standard errors for ``(N, grid)`` log posteriors"""
+        weights = np.exp(log_posterior - log_posterior.max(axis=1, keepdims=True))
+        weights /= weights.sum(axis=1, keepdims=True)
+        thetas = weights @ self.GRID
+        variances = np.maximum(weights @ self.GRID ** 2 - thetas ** 2, 0)
+        return thetas, np.sqrt(variances)
+
+    def is_correct(self, position, option_ids):
+        return frozenset(map(str, option_ids)) == self.correct_options[position]
@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class ExamsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'api.exams'
+
+    def ready(self):
+        from api.exams import checks, signals  # noqa: F401
+        from api.core.metrics import metrics
+        from api.exams.cache import cache_counters
+        metrics.add_collector(cache_counters)
@@ -0,0 +1,93 @@
+from asgiref.sync import sync_to_async
+from django.views import View
+from rest_framework.exceptions import APIException, NotAuthenticated
+from rest_framework.request import Request
+
+from api.core.pagination import KeysetPagination
+from api.core.responses import success_json, error_json
+from api.core.routers import read_from_replica
+from api.exams.cache import exam_paper_cache
+from api.exams.models import Exam, Question
+from api.exams.serializers import ExamSerializer, ExamSummarySerializer, QuestionSerializer
+from api.exams.services import ProctorAssignmentService
+from api.users.authentication.jwt import CachedJWTAuthentication
+
+
+class AsyncJWTAPIView(View):
+    """Async counterpart of the DRF read views for the hottest paths.
+
+    DRF views are sync, so under an ASGI server every request is handed to a worker thread.
+    These views authenticate the bearer token and query through Django's async ORM inside
+    the event loop, read from the replica like ``ReplicaReadMixin`` and answer with the same
+    ``{"status", "message", "data"}`` envelope.
+    """
+    http_method_names = ['get']
+    allowed_roles = None
+    authenticator = CachedJWTAuthentication()
+
+    async def authenticate(self, request):
+        header = self.authenticator.get_header(request)
+        raw_token = self.authenticator.get_raw_token(header) if header else None
+        if raw_token is None:
+            raise NotAuthenticated()
+        return await self.authenticator.aget_user(self.authenticator.get_validated_token(raw_token))
+
+    async def dispatch(self, request, *args, **kwargs):
+        try:
+            with read_from_replica():
+                request.user = await self.authenticate(request)
+                if self.allowed_roles and request.user.role not in self.allowed_roles:
+                    return error_json("You don't have permission to perform this action", 403)
+                return await super().dispatch(request, *args, **kwargs)
+        except APIException as exc:
+            detail = exc.detail.get('detail', exc.detail) if isinstance(exc.detail, dict) else exc.detail
+            return error_json(str(detail), exc.status_code)
+
+
+class AsyncExamDetailView(AsyncJWTAPIView):
+    """Async version of ``ExamDetailAPIView``, served from the exam paper cache"""
+    # The paper includes the answer key
+    allowed_roles = ['admin']
+
+    async def get(self, request, id):
+        async def build():
+            exam = await Exam.objects.with_paper().with_question_count().filter(id=id).afirst()
+            # Everything the serializer touches is prefetched, so this runs without queries
+            return ExamSerializer(exam).data if exam else None
+
+        data = await exam_paper_cache.aget_or_build(
+            id, build, cacheable=lambda data: data is not None and data['status'] == 'published',
+        )
+        if data is None:
+            return error_json("Exam not found", 404)
+        return success_json(data, "Exam details retrieved successfully")
+
+
+class AsyncQuestionListView(AsyncJWTAPIView):
+    """Async version of ``QuestionListAPIView``"""
+
+    async def get(self, request, exam_id):
+        if not await Exam.objects.filter(id=exam_id).aexists():
+            return error_json("Exam not found", 404)
+
+        allowed = request.user.role == 'admin' or (
+            request.user.role == 'proctor' and await ProctorAssignmentService.ais_assigned(request, exam_id)
+        )
+        questions = [q async for q in Question.objects.filter(exam_id=exam_id).with_options()] if allowed else []
+        return success_json(QuestionSerializer(questions, many=True).data, "Questions retrieved successfully")
+
+
+class AsyncProctorExamListView(AsyncJWTAPIView):
+    """Async version of ``ProctorExamListAPIView``, paginated by the same ``KeysetPagination``.
+
+    DRF's paginator evaluates the page itself, so that one query runs in a worker thread.
+    """
+    allowed_roles = ['proctor']
+
+    async def get(self, request):
+        exam_ids = await ProctorAssignmentService.aexam_ids(request, statuses=['assigned', 'active'])
+        exams = Exam.objects.filter(id__in=exam_ids).select_related('created_by').with_question_count()
+        paginator = KeysetPagination()
+        page = await sync_to_async(paginator.paginate_queryset)(exams, Request(request), view=self)
+        data = paginator.get_paginated_response(ExamSummarySerializer(page, many=True).data).data
+        return success_json(data, "Assigned exams retrieved successfully")
@@ -0,0 +1,198 @@
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+
+from api.core.routers import read_from_primary
+
+
+class CacheStats:
+    """Process-local hit/miss counters"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def hit(self):
+        with self._lock:
+            self.hits += 1
+
+    def miss(self):
+        with self._lock:
+            self.misses += 1
+
+    def as_dict(self):
+        return {'hits': self.hits, 'misses': self.misses}
+
+
+class ExamPaperCache:
+    """Read-through cache for serialized exam papers.
+
+    Entries are keyed by exam id plus a content version. Invalidating an exam swaps its
+    version for a fresh token, so stale papers are never read again and simply age out;
+    a lost version key has the same effect. Entries are built from the primary database: the
+    version is bumped once an edit commits there, and a replica may not have it yet.
+    """
+
+    def __init__(self, alias=None):
+        self.alias = alias
+        self.stats = CacheStats()
+
+    @property
+    def cache(self):
+        return caches[self.alias or settings.EXAM_PAPER_CACHE]
+
+    @staticmethod
+    def version_key(exam_id):
+        return f"version:{exam_id}"
+
+    @staticmethod
+    def paper_key(exam_id, version, kind='paper'):
+        return f"{kind}:{exam_id}:{version}"
+
+    def version(self, exam_id):
+        key = self.version_key(exam_id)
+        version = self.cache.get(key)
+        if version is None:
+            self.cache.add(key, uuid.uuid4().hex, timeout=None)
+            version = self.cache.get(key)
+        return version
+
+    async def aversion(self, exam_id):
+        key = self.version_key(exam_id)
+        version = await self.cache.aget(key)
+        if version is None:
+            await self.cache.aadd(key, uuid.uuid4().hex, timeout=None)
+            version = await self.cache.aget(key)
+        return version
+
+    def invalidate(self, exam_id):
+        self.cache.set(self.version_key(exam_id), uuid.uuid4().hex, timeout=None)
+
+    def get_or_build(self, exam_id, build, cacheable=lambda data: True, kind='paper'):
+        """Return the cached paper for ``exam_id`` or call ``build()`` and store its result
+        when ``cacheable(data)`` allows it.
+
+        ``kind`` keeps other per-exam data derived from the paper under the same version.
+        """
+        key = self.paper_key(exam_id, self.version(exam_id), kind)
+        data = self.cache.get(key)
+        if data is not None:
+            self.stats.hit()
+            return data
+
+        self.stats.miss()
+        with read_from_primary():
+            data = build()
+        if cacheable(data):
+            self.cache.set(key, data)
+        return data
+
+    async def aget_or_build(self, exam_id, build, cacheable=lambda data: True, kind='paper'):
+        """Async ``get_or_build()``; ``build`` is a coroutine function"""
+        key = self.paper_key(exam_id, await self.aversion(exam_id), kind)
+        data = await self.cache.aget(key)
+        if data is not None:
+            self.stats.hit()
+            return data
+
+        self.stats.miss()
+        with read_from_primary():
+            data = await build()
+        if cacheable(data):
+            await self.cache.aset(key, data)
+        return data
+
+
+class PaperSnapshotCache(ExamPaperCache):
+    """Immutable paper snapshots, memoized in process memory in front of the shared cache.
+
+    Snapshots share the version keys of ``ExamPaperCache``, and the version is part of every
+    snapshot key, so a memoized snapshot never goes stale: any edit bumps the version and the
+    next request builds a new one. Concurrent misses are coalesced (single-flight): one thread
+    per process gets to build, and across processes a short-lived lock key in the shared cache
+    lets one builder through while the others wait for its result. Callers must not mutate
+    the returned data.
+    """
+    LOCK_TIMEOUT = 10
+    LOCK_POLL_INTERVAL = 0.05
+    MEMORY_SIZE = 64
+
+    def __init__(self, kind, alias=None):
+        super().__init__(alias)
+        self.kind = kind
+        self._memory = OrderedDict()
+        self._memory_lock = threading.Lock()
+        self._build_locks = [threading.Lock() for _ in range(32)]
+
+    def _remember(self, key, data):
+        with self._memory_lock:
+            self._memory[key] = data
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.MEMORY_SIZE:
+                self._memory.popitem(last=False)
+
+    def _lookup(self, key):
+        with self._memory_lock:
+            data = self._memory.get(key)
+            if data is not None:
+                self._memory.move_to_end(key)
+                return data
+        data = self.cache.get(key)
+        if data is not None:
+            self._remember(key, data)
+        return data
+
+    def get_or_build(self, exam_id, build, cacheable=lambda data: True, version=None):
+        """``ExamPaperCache.get_or_build()``; pass ``version`` to read snapshots of several kinds
+        that match each other"""
+        key = self.paper_key(exam_id, version or self.version(exam_id), self.kind)
+        data = self._lookup(key)
+        if data is None:
+            with self._build_locks[hash(key) % len(self._build_locks)]:
+                # Threads that queued behind the builder find its result here
+                data = self._lookup(key)
+                if data is None:
+                    self.stats.miss()
+                    return self._build_single_flight(key, build, cacheable)
+        self.stats.hit()
+        return data
+
+    def _build_single_flight(self, key, build, cacheable):
+        lock_key = f"lock:{key}"
+        give_up_at = time.monotonic() + self.LOCK_TIMEOUT
+        while not self.cache.add(lock_key, 1, timeout=self.LOCK_TIMEOUT):
+            # Another process is building this snapshot
+            time.sleep(self.LOCK_POLL_INTERVAL)
+            data = self._lookup(key)
+            if data is not None:
+                return data
+            if time.monotonic() >= give_up_at:
+                break
+        try:
+            with read_from_primary():
+                data = build()
+            if cacheable(data):
+                self.cache.set(key, data)
+                self._remember(key, data)
+        finally:
+            self.cache.delete(lock_key)
+        return data
+
+
+exam_paper_cache = ExamPaperCache()
+candidate_paper_cache = PaperSnapshotCache('candidate-paper')
+adaptive_item_cache = PaperSnapshotCache('adaptive-items')
+
+
+def cache_counters():
+    """Hit/miss counters of the paper caches, for ``metrics.add_collector``"""
+    paper_caches = {'exam-paper': exam_paper_cache, candidate_paper_cache.kind: candidate_paper_cache,
+                    adaptive_item_cache.kind: adaptive_item_cache}
+    for outcome in ('hits', 'misses'):
+        yield (f"paper_cache_{outcome}_total", f"Paper cache {outcome} in this process",
+               [({'cache': name}, getattr(paper_cache.stats, outcome)) for name, paper_cache in paper_caches.items()])
@@ -0,0 +1,21 @@
+from django.conf import settings
+from django.core.checks import Tags, Warning, register
+
+from api.core.cache import is_shared_cache
+
+
+@register(Tags.caches, deploy=True)
+def check_caches_are_shared(app_configs, **kwargs):
+    """Paper, attempt state and proctor assignment invalidations only reach processes that share the cache"""
+    uses = {
+        settings.EXAM_PAPER_CACHE: "edits only invalidate the paper cached by the process that made them; "
+                                   "the others serve the old paper until it expires",
+        'default': "the other processes keep a submitted or expired attempt in progress, and a proctor's "
+                   "old exam assignments, until their cached copy expires",
+    }
+    return [Warning(
+        f"The '{alias}' cache is local to each process.",
+        hint=f"With more than one worker process, {consequence}. Set CACHE_BACKEND to a shared cache "
+             f"such as django.core.cache.backends.redis.RedisCache.",
+        id='exams.W001',
+    ) for alias, consequence in uses.items() if not is_shared_cache(alias)]
@@ -0,0 +1,62 @@
+from channels.db import database_sync_to_async
+from channels.generic.websocket import AsyncJsonWebsocketConsumer
+from django.utils import timezone
+
+from api.core.exceptions.exceptions import NotFoundException
+from api.exams.services import AttemptService
+
+
+def attempt_group(attempt_id):
+    return f"attempt.{attempt_id}"
+
+
+class AttemptTimerConsumer(AsyncJsonWebsocketConsumer):
+    """Pushes the time left on a candidate's attempt and tells them when it has expired.
+
+    Clients don't poll: the expiry scheduler sends ``attempt.time``, ``attempt.question_expired``
+    (a time-limited question ran out) and ``attempt.expired`` to the attempt's group.
+    """
+
+    async def connect(self):
+        user = self.scope.get('user')
+        if not user or not user.is_authenticated or user.role != 'candidate':
+            await self.close(code=4403)
+            return
+
+        attempt_id = self.scope['url_route']['kwargs']['attempt_id']
+        state = await self.load_state(attempt_id)
+        if state is None or state['candidate_id'] != user.pk:
+            await self.close(code=4404)
+            return
+
+        self.group = attempt_group(attempt_id)
+        await self.channel_layer.group_add(self.group, self.channel_name)
+        await self.accept()
+        if state['status'] != 'in_progress':
+            await self.attempt_expired({})
+            return
+        remaining = max(0, int((state['deadline'] - timezone.now()).total_seconds()))
+        await self.send_json({'type': 'time', 'time_remaining_seconds': remaining,
+                              'deadline': state['deadline'].isoformat()})
+
+    @database_sync_to_async
+    def load_state(self, attempt_id):
+        try:
+            return AttemptService.state(attempt_id)
+        except NotFoundException:
+            return None
+
+    async def disconnect(self, code):
+        if hasattr(self, 'group'):
+            await self.channel_layer.group_discard(self.group, self.channel_name)
+
+    async def attempt_time(self, message):
+        await self.send_json({'type': 'time', 'time_remaining_seconds': message['time_remaining_seconds'],
+                              'deadline': message['deadline']})
+
+    async def attempt_question_expired(self, message):
+        await self.send_json({'type': 'question_expired', 'question': message['question']})
+
+    async def attempt_expired(self, message):
+        await self.send_json({'type': 'expired'})
+        await self.close()
@@ -0,0 +1,86 @@
+import time
+
+import numpy as np
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from api.exams.adaptive import ItemIndex
+
+
+class Command(BaseCommand):
+    help = ("Simulate adaptive exams on a synthetic item bank: time a single selection step as served "
+            "per request, then run a cohort of simulated candidates in vectorized batches and report "
+            "test length and accuracy of the ability estimates.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--candidates', type=int, default=100000)
+        parser.add_argument('--items', type=int, default=500)
+        parser.add_argument('--max-items', type=int, default=settings.ADAPTIVE_TESTING['MAX_ITEMS'])
+        parser.add_argument('--min-standard-error', type=float,
+                            default=settings.ADAPTIVE_TESTING['MIN_STANDARD_ERROR'])
+        parser.add_argument('--batch-size', type=int, default=10000)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        rng = np.random.default_rng(options['seed'])
+        count = options['items']
+        index = ItemIndex(
+            question_ids=range(count),
+            a=rng.lognormal(0, 0.3, count), b=rng.normal(0, 1, count), c=rng.uniform(0, 0.25, count),
+            correct_options=[[]] * count,
+            max_items=options['max_items'], min_standard_error=options['min_standard_error'],
+        )
+
+        self.stdout.write(f"single step (estimate + select)  {self.time_single_step(index, rng) * 1e6:8.1f} us")
+
+        started = time.perf_counter()
+        lengths, errors = [], []
+        for offset in range(0, options['candidates'], options['batch_size']):
+            size = min(options['batch_size'], options['candidates'] - offset)
+            batch_lengths, batch_errors = self.simulate(index, rng.normal(0, 1, size), rng)
+            lengths.append(batch_lengths)
+            errors.append(batch_errors)
+        elapsed = time.perf_counter() - started
+        lengths, errors = np.concatenate(lengths), np.concatenate(errors)
+
+        self.stdout.write(f"simulated {len(lengths)} candidates in {elapsed:.2f} s "
+                          f"({len(lengths) / elapsed:,.0f} candidates/s)")
+        self.stdout.write(f"items per candidate  mean {lengths.mean():.1f}  max {lengths.max()}")
+        self.stdout.write(f"ability RMSE {np.sqrt((errors ** 2).mean()):.3f}  bias {errors.mean():+.3f}")
+
+    @staticmethod
+    def time_single_step(index, rng, steps=2000):
+        """Average time of what one request does: estimate from ~15 responses, then select"""
+        items = rng.choice(len(index), size=15, replace=False)
+        responses = rng.random(15) < 0.5
+        administered = np.zeros((1, len(index)), dtype=bool)
+        administered[0, items] = True
+        started = time.perf_counter()
+        for _ in range(steps):
+            thetas, _ = index.estimate(index.log_posterior(items, responses))
+            index.select(thetas, administered)
+        return (time.perf_counter() - started) / steps
+
+    @staticmethod
+    def simulate(index, true_thetas, rng):
+        """Run a batch of candidates to completion; returns their test lengths and estimation errors"""
+        size = len(true_thetas)
+        log_posterior = np.tile(index.LOG_PRIOR, (size, 1))
+        administered = np.zeros((size, len(index)), dtype=bool)
+        lengths = np.zeros(size, dtype=np.intp)
+        active = np.ones(size, dtype=bool)
+
+        for _ in range(index.max_items):
+            thetas, standard_errors = index.estimate(log_posterior)
+            active &= standard_errors > index.min_standard_error
+            rows = np.flatnonzero(active)
+            if not len(rows):
+                break
+            items = index.select(thetas[rows], administered[rows])
+            correct = rng.random(len(rows)) < index.probability(true_thetas[rows], items)
+            log_posterior[rows] += np.where(correct[:, None], index.log_p[items], index.log_q[items])
+            administered[rows, items] = True
+            lengths[rows] += 1
+
+        thetas, _ = index.estimate(log_posterior)
+        return lengths, thetas - true_thetas
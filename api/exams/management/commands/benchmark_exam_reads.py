@@ -0,0 +1,85 @@
+import asyncio
+import statistics
+import time
+import uuid
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test import AsyncClient
+from django.urls import reverse
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from api.exams.models import Exam, Question, QuestionOption
+from api.users.models import User
+
+
+class Command(BaseCommand):
+    help = ("Compare throughput of the sync (DRF) and async exam read endpoints through the ASGI handler. "
+            "Creates a throwaway admin and exam and deletes them afterwards.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=2000)
+        parser.add_argument('--concurrency', type=int, default=200)
+        parser.add_argument('--questions', type=int, default=50)
+        parser.add_argument('--status', default='published', choices=['draft', 'published'],
+                            help="Published papers are served from the paper cache, drafts are rebuilt")
+
+    def handle(self, *args, **options):
+        admin, exam = self.create_fixture(options['questions'], options['status'])
+        try:
+            token = str(RefreshToken.for_user(admin).access_token)
+            endpoints = [
+                ('sync exam detail', reverse('exam-detail', kwargs={'id': exam.id})),
+                ('async exam detail', reverse('exam-detail-async', kwargs={'id': exam.id})),
+                ('sync question list', reverse('question-list', kwargs={'exam_id': exam.id})),
+                ('async question list', reverse('question-list-async', kwargs={'exam_id': exam.id})),
+            ]
+            for label, url in endpoints:
+                latencies, elapsed = asyncio.run(
+                    self.run(url, token, options['requests'], options['concurrency'])
+                )
+                latencies.sort()
+                self.stdout.write(
+                    f"{label:<22} {len(latencies) / elapsed:8.0f} req/s  "
+                    f"p50 {statistics.median(latencies) * 1000:7.2f} ms  "
+                    f"p99 {latencies[int(len(latencies) * 0.99) - 1] * 1000:7.2f} ms"
+                )
+        finally:
+            admin.delete()
+
+    @transaction.atomic
+    def create_fixture(self, questions, exam_status):
+        suffix = uuid.uuid4().hex[:8]
+        admin = User.objects.create(username=f"bench-{suffix}", email=f"bench-{suffix}@example.com",
+                                    first_name='Bench', last_name='Admin', role='admin')
+        exam = Exam.objects.create(title='Benchmark exam', created_by=admin, duration_minutes=60,
+                                   passing_score=50, status=exam_status)
+        question_rows = [Question(exam=exam, question_text=f"Question {i}", question_type='multiple_choice',
+                                  order_index=i) for i in range(questions)]
+        Question.objects.bulk_create(question_rows)
+        QuestionOption.objects.bulk_create([
+            QuestionOption(question=question, option_text=f"Option {o}", is_correct=o == 0, order_index=o)
+            for question in question_rows for o in range(4)
+        ])
+        return admin, exam
+
+    async def run(self, url, token, total, concurrency):
+        client = AsyncClient()
+        headers = {'Authorization': f"Bearer {token}"}
+        semaphore = asyncio.Semaphore(concurrency)
+        latencies = []
+
+        async def one():
+            async with semaphore:
+                started = time.perf_counter()
+                response = await client.get(url, headers=headers)
+                latencies.append(time.perf_counter() - started)
+                if response.status_code != 200:
+                    raise RuntimeError(f"{url} answered {response.status_code}")
+
+        # Warm up caches and connections outside the measurement
+        await one()
+        latencies.clear()
+        started = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(total)))
+        return latencies, time.perf_counter() - started
@@ -0,0 +1,27 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.exams.models import Exam
+from api.exams.services import ExamTransferService
+
+
+class Command(BaseCommand):
+    help = "Stream an exam with its questions and options as NDJSON"
+
+    def add_arguments(self, parser):
+        parser.add_argument('exam_id')
+        parser.add_argument('--output', '-o', help="File to write to (defaults to stdout)")
+        parser.add_argument('--chunk-size', type=int, default=ExamTransferService.CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        try:
+            lines = ExamTransferService.export_lines(options['exam_id'], chunk_size=options['chunk_size'])
+        except Exam.DoesNotExist:
+            raise CommandError(f"Exam {options['exam_id']} does not exist")
+
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as out:
+                out.writelines(lines)
+        else:
+            sys.stdout.writelines(lines)
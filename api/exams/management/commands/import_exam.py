@@ -0,0 +1,33 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.core.exceptions.exceptions import BadRequestException
+from api.exams.services import ExamTransferService
+from api.users.models import User
+
+
+class Command(BaseCommand):
+    help = "Create an exam from an NDJSON export"
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="Export file, or - for stdin")
+        parser.add_argument('--created-by', required=True, help="Username recorded as the exam author")
+        parser.add_argument('--chunk-size', type=int, default=ExamTransferService.CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        try:
+            author = User.objects.get(username=options['created_by'])
+        except User.DoesNotExist:
+            raise CommandError(f"User {options['created_by']} does not exist")
+
+        source = sys.stdin if options['path'] == '-' else open(options['path'], encoding='utf-8')
+        try:
+            exam = ExamTransferService.import_lines(source, created_by=author, chunk_size=options['chunk_size'])
+        except BadRequestException as e:
+            raise CommandError(str(e.detail))
+        finally:
+            if source is not sys.stdin:
+                source.close()
+
+        self.stdout.write(self.style.SUCCESS(f"Imported exam {exam.id} ({exam.question_set.count()} questions)"))
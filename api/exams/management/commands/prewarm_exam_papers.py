@@ -0,0 +1,22 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from api.core.cache import is_shared_cache
+from api.exams.services import CandidatePaperService
+
+
+class Command(BaseCommand):
+    help = ("Build the candidate paper snapshots of published exams about to open, so the first wave "
+            "of candidates is served from the cache. Run it every minute or so, e.g. from cron.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--minutes', type=int, default=settings.PAPER_PREWARM_MINUTES,
+                            help="Warm exams whose start_time is at most this many minutes away")
+
+    def handle(self, *args, **options):
+        # Snapshots built in a cache local to this process would be gone when it exits
+        if not is_shared_cache(settings.EXAM_PAPER_CACHE):
+            raise CommandError(f"The '{settings.EXAM_PAPER_CACHE}' cache is local to each process, so the "
+                               "web workers would not see the warmed papers. Set CACHE_BACKEND to a shared cache.")
+        exam_ids = CandidatePaperService.prewarm(options['minutes'])
+        self.stdout.write(f"Warmed {len(exam_ids)} exam paper(s)")
@@ -0,0 +1,26 @@
+import asyncio
+
+from django.core.management.base import BaseCommand
+
+from api.exams.scheduler import AttemptExpiryScheduler
+
+
+class Command(BaseCommand):
+    help = "Auto-submit attempts as their deadlines pass and push the time remaining to candidates"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int)
+        parser.add_argument('--refresh-interval', type=float, help="Seconds between picking up new attempts (0: on every wake-up)")
+        parser.add_argument('--push-interval', type=float, help="Seconds between time-remaining pushes (0: none)")
+
+    def handle(self, *args, **options):
+        scheduler = AttemptExpiryScheduler(
+            batch_size=options['batch_size'],
+            refresh_interval=options['refresh_interval'],
+            push_interval=options['push_interval'],
+        )
+        self.stdout.write("Attempt expiry scheduler running, press Ctrl+C to stop")
+        try:
+            asyncio.run(scheduler.run())
+        except KeyboardInterrupt:
+            scheduler.stop()
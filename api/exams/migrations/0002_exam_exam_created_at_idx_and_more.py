@@ -0,0 +1,55 @@
+# Generated by Django 5.2.4 on 2026-10-18 10:39
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def renumber_duplicate_questions(apps, schema_editor):
+    """Give questions sharing an order_index within an exam distinct ones before the unique
+    constraint is added. Questions keep their order (by order_index, then creation); a
+    duplicate moves to the next free slot, pushing later questions down if needed."""
+    Question = apps.get_model('exams', 'Question')
+    duplicates = (Question.objects.values('exam_id', 'order_index').annotate(count=Count('id'))
+                  .filter(count__gt=1))
+    for exam_id in {row['exam_id'] for row in duplicates}:
+        changed = []
+        next_index = 0
+        for question in Question.objects.filter(exam_id=exam_id).order_by('order_index', 'created_at', 'id'):
+            if question.order_index < next_index:
+                question.order_index = next_index
+                changed.append(question)
+            next_index = question.order_index + 1
+        Question.objects.bulk_update(changed, ['order_index'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exams', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='exam',
+            index=models.Index(fields=['-created_at', 'id'], name='exam_created_at_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='examproctor',
+            index=models.Index(fields=['proctor', 'status'], name='examproctor_proctor_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='examproctor',
+            index=models.Index(fields=['-assigned_at', 'id'], name='examproctor_assigned_at_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='questionoption',
+            index=models.Index(fields=['question', 'order_index'], name='option_question_order_idx'),
+        ),
+        migrations.RunPython(renumber_duplicate_questions, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='question',
+            constraint=models.UniqueConstraint(fields=('exam', 'order_index'), name='unique_question_order_per_exam'),
+        ),
+    ]
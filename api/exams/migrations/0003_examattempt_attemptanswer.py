@@ -0,0 +1,50 @@
+# Generated by Django 5.2.4 on 2026-10-18 10:53
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exams', '0002_exam_exam_created_at_idx_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExamAttempt',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('attempt_number', models.PositiveIntegerField()),
+                ('status', models.CharField(choices=[('in_progress', 'In Progress'), ('submitted', 'Submitted'), ('expired', 'Expired')], default='in_progress', max_length=50)),
+                ('started_at', models.DateTimeField()),
+                ('deadline', models.DateTimeField()),
+                ('submitted_at', models.DateTimeField(blank=True, null=True)),
+                ('candidate', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='exam_attempts', to=settings.AUTH_USER_MODEL)),
+                ('exam', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='exams.exam')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='AttemptAnswer',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('selected_options', models.JSONField(default=list)),
+                ('answer_text', models.TextField(blank=True)),
+                ('first_saved_at', models.DateTimeField()),
+                ('saved_at', models.DateTimeField()),
+                ('question', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='exams.question')),
+                ('attempt', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='exams.examattempt')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='examattempt',
+            constraint=models.UniqueConstraint(fields=('exam', 'candidate', 'attempt_number'), name='unique_attempt_number'),
+        ),
+        migrations.AddConstraint(
+            model_name='attemptanswer',
+            constraint=models.UniqueConstraint(fields=('attempt', 'question'), name='unique_answer_per_question'),
+        ),
+    ]
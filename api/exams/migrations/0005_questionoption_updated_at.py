@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-18 11:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exams', '0004_examattempt_status_started_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='questionoption',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
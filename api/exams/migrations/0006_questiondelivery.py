@@ -0,0 +1,27 @@
+# Generated by Django 5.2.4 on 2026-10-18 11:45
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exams', '0005_questionoption_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QuestionDelivery',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('delivered_at', models.DateTimeField()),
+                ('attempt', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='exams.examattempt')),
+                ('question', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='exams.question')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('attempt', 'question'), name='unique_delivery_per_question')],
+            },
+        ),
+    ]
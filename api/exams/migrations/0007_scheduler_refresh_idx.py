@@ -0,0 +1,23 @@
+# Generated by Django 5.2.4 on 2026-10-18 11:59
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exams', '0006_questiondelivery'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='examattempt',
+            index=models.Index(fields=['submitted_at'], name='attempt_submitted_at_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='questiondelivery',
+            index=models.Index(fields=['delivered_at'], name='delivery_delivered_at_idx'),
+        ),
+    ]
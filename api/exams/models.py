@@ -3,8 +3,61 @@ from django.db import models
 # Create your models here.
 import uuid
 from django.db import models
+from django.db.models import Count, F, Func, OuterRef, Prefetch, Subquery
+from django.db.models.functions import Coalesce
 from django.conf import settings
 
+
+class ExamQuerySet(models.QuerySet):
+    def with_question_count(self):
+        """Annotate ``question_count`` so serializers don't issue a COUNT per exam.
+
+        A correlated subquery over the (exam, order_index) index rather than JOIN + GROUP BY,
+        so listings can still walk the created_at index without sorting.
+        """
+        counts = (Question.objects.filter(exam=OuterRef('pk')).order_by()
+                  .values('exam').annotate(count=Count('*')).values('count'))
+        return self.annotate(question_count=Coalesce(Subquery(counts), 0))
+
+    def with_paper(self):
+        """Load the author, ordered questions and ordered options in a fixed number of queries"""
+        return self.select_related('created_by').prefetch_related(
+            # Ordering by exam first lets the prefetch read the (exam, order_index) index in order
+            Prefetch('question_set', queryset=Question.objects.with_options().order_by('exam_id', 'order_index')),
+        )
+
+
+    def with_paper_changes(self):
+        """Annotate when the paper last changed, for conditional reads.
+
+        The question and option counts are included because deletions leave no timestamp behind.
+        Each value is an ungrouped aggregate subquery, so it reads the exam's rows through the
+        question and option indexes without JOIN + GROUP BY.
+        """
+        questions = Question.objects.filter(exam=OuterRef('pk')).order_by()
+        options = QuestionOption.objects.filter(question__exam=OuterRef('pk')).order_by()
+
+        def aggregate(queryset, function, field, output_field=None):
+            # Func rather than Max/Count: an aggregate would add a GROUP BY to the subquery
+            return Subquery(queryset.annotate(
+                value=Func(F(field), function=function, output_field=output_field)).values('value'))
+
+        return self.annotate(
+            questions_updated_at=aggregate(questions, 'MAX', 'updated_at'),
+            options_updated_at=aggregate(options, 'MAX', 'updated_at'),
+            paper_question_count=aggregate(questions, 'COUNT', 'pk', models.IntegerField()),
+            paper_option_count=aggregate(options, 'COUNT', 'pk', models.IntegerField()),
+        )
+
+
+class QuestionQuerySet(models.QuerySet):
+    def with_options(self):
+        return self.order_by('order_index').prefetch_related(
+            Prefetch('questionoption_set',
+                     queryset=QuestionOption.objects.order_by('question_id', 'order_index')),
+        )
+
+
 class Exam(models.Model):
     EXAM_TYPE_CHOICES = [
         ('standard', 'Standard'),
@@ -42,6 +95,13 @@ class Exam(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = ExamQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-created_at', 'id'], name='exam_created_at_idx'),
+        ]
+
     def __str__(self):
         return f"Exam - {self.title}"
 
@@ -70,6 +130,14 @@ class Question(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = QuestionQuerySet.as_manager()
+
+    class Meta:
+        constraints = [
+            # Also the index behind filter(exam_id=...).order_by('order_index')
+            models.UniqueConstraint(fields=['exam', 'order_index'], name='unique_question_order_per_exam'),
+        ]
+
     def __str__(self):
         return f"Question - {self.question_text}"
 
@@ -83,6 +151,12 @@ class QuestionOption(models.Model):
     explanation = models.TextField(blank=True)
     media_url = models.URLField(max_length=500, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['question', 'order_index'], name='option_question_order_idx'),
+        ]
 
     def __str__(self):
         return f"Question Option - {self.option_text}"
@@ -103,7 +177,81 @@ class ExamProctor(models.Model):
 
     class Meta:
         unique_together = ('exam', 'proctor')
+        indexes = [
+            models.Index(fields=['proctor', 'status'], name='examproctor_proctor_status_idx'),
+            models.Index(fields=['-assigned_at', 'id'], name='examproctor_assigned_at_idx'),
+        ]
 
     def __str__(self):
         return f"Exam Proctor - {self.exam.title} - {self.proctor.username}"
 
+
+
+class ExamAttempt(models.Model):
+    STATUS_CHOICES = [('in_progress', 'In Progress'), ('submitted', 'Submitted'), ('expired', 'Expired')]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    exam = models.ForeignKey(Exam, on_delete=models.CASCADE)
+    candidate = models.ForeignKey(settings.AUTH_USER_MODEL, related_name='exam_attempts', on_delete=models.CASCADE)
+    attempt_number = models.PositiveIntegerField()
+    status = models.CharField(max_length=50, choices=STATUS_CHOICES, default='in_progress')
+    started_at = models.DateTimeField()
+    # started_at + duration_minutes, capped by the exam's end_time
+    deadline = models.DateTimeField()
+    submitted_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            # Two concurrent starts can't both claim the same attempt slot
+            models.UniqueConstraint(fields=['exam', 'candidate', 'attempt_number'], name='unique_attempt_number'),
+        ]
+        indexes = [
+            # The expiry scheduler's startup load and its incremental "started since" refreshes
+            models.Index(fields=['status', 'started_at'], name='attempt_status_started_idx'),
+            # The expiry scheduler's "submitted since" refreshes
+            models.Index(fields=['submitted_at'], name='attempt_submitted_at_idx'),
+        ]
+
+    def __str__(self):
+        return f"Exam Attempt - {self.exam_id} - {self.candidate_id} - {self.attempt_number}"
+
+
+class AttemptAnswer(models.Model):
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    attempt = models.ForeignKey(ExamAttempt, on_delete=models.CASCADE)
+    question = models.ForeignKey(Question, on_delete=models.CASCADE)
+    selected_options = models.JSONField(default=list)
+    answer_text = models.TextField(blank=True)
+    # Set on the first save only
+    first_saved_at = models.DateTimeField()
+    saved_at = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            # Also the conflict target of the autosave upsert
+            models.UniqueConstraint(fields=['attempt', 'question'], name='unique_answer_per_question'),
+        ]
+
+    def __str__(self):
+        return f"Attempt Answer - {self.attempt_id} - {self.question_id}"
+
+
+class QuestionDelivery(models.Model):
+    """When a question with a time limit was first delivered to an attempt; the limit runs from here"""
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    attempt = models.ForeignKey(ExamAttempt, on_delete=models.CASCADE)
+    question = models.ForeignKey(Question, on_delete=models.CASCADE)
+    delivered_at = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            # Later deliveries of the same question leave the first one in place
+            models.UniqueConstraint(fields=['attempt', 'question'], name='unique_delivery_per_question'),
+        ]
+        indexes = [
+            # The expiry scheduler's "delivered since" refreshes
+            models.Index(fields=['delivered_at'], name='delivery_delivered_at_idx'),
+        ]
+
+    def __str__(self):
+        return f"Question Delivery - {self.attempt_id} - {self.question_id}"
@@ -0,0 +1,7 @@
+from django.urls import path
+
+from api.exams.consumers import AttemptTimerConsumer
+
+websocket_urlpatterns = [
+    path('ws/exams/attempts/<uuid:attempt_id>/timer/', AttemptTimerConsumer.as_asgi()),
+]
@@ -0,0 +1,199 @@
+import asyncio
+import heapq
+import logging
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from channels.layers import get_channel_layer
+from django.conf import settings
+from django.utils import timezone
+
+from api.exams.consumers import attempt_group
+from api.exams.models import ExamAttempt, QuestionDelivery
+from api.exams.services import AttemptService
+
+logger = logging.getLogger(__name__)
+
+
+class SystemClock:
+    def now(self):
+        return timezone.now()
+
+    async def sleep(self, seconds):
+        await asyncio.sleep(seconds)
+
+
+class AttemptExpiryScheduler:
+    """Auto-submits attempts when their deadline passes and pushes the time left to clients.
+
+    Open attempts sit in a min-heap keyed by deadline, so each step only touches the attempts
+    that are due and then sleeps until the next deadline, refresh or push. Time-limited questions
+    sit in a second heap keyed by ``QuestionDelivery.delivered_at`` plus the limit; when one runs
+    out the attempt's clients are told. Each refresh is incremental rather than a scan: it picks
+    up attempts started by other processes, attempts of exams edited since (their deadline may
+    have moved with the exam's end time), new deliveries, and drops attempts that were submitted.
+    All time comes from ``clock`` (``now()`` and ``async sleep()``), so tests can drive it with
+    a fake one. Run it with ``manage.py run_attempt_scheduler``. A step that fails is logged
+    and retried after ``RETRY_DELAY``; attempts whose expiry failed stay scheduled.
+    """
+    # Re-read a little before the last refresh so rows committed late aren't missed
+    REFRESH_OVERLAP = timedelta(seconds=30)
+    # Wait after a failed step (e.g. the database is down) before trying again
+    RETRY_DELAY = timedelta(seconds=5)
+    # Sleep when nothing is scheduled and neither refreshes nor pushes are periodic
+    IDLE_DELAY = timedelta(seconds=1)
+
+    def __init__(self, clock=None, batch_size=None, refresh_interval=None, push_interval=None,
+                 channel_layer=None):
+        config = settings.ATTEMPT_SCHEDULER
+        if batch_size is None:
+            batch_size = config['BATCH_SIZE']
+        if refresh_interval is None:
+            refresh_interval = config['REFRESH_INTERVAL_SECONDS']
+        if push_interval is None:
+            push_interval = config['PUSH_INTERVAL_SECONDS']
+        self.clock = clock or SystemClock()
+        self.batch_size = batch_size
+        # 0 refreshes on every wake-up, 0 pushes none
+        self.refresh_interval = timedelta(seconds=refresh_interval)
+        self.push_interval = timedelta(seconds=push_interval)
+        self.channel_layer = channel_layer or get_channel_layer()
+        self.heap = []
+        # Current deadline of every scheduled attempt; heap entries that disagree are stale
+        self.deadlines = {}
+        # Same for time-limited questions, keyed by (attempt id, question id)
+        self.question_heap = []
+        self.question_deadlines = {}
+        self.watermark = None
+        self.next_refresh = None
+        self.next_push = None
+        # Set after an expiry batch failed: no expiries are attempted before then
+        self.retry_at = None
+        self.running = False
+
+    def schedule(self, attempt_id, deadline):
+        if self.deadlines.get(attempt_id) == deadline:
+            return
+        self.deadlines[attempt_id] = deadline
+        heapq.heappush(self.heap, (deadline, attempt_id))
+
+    def schedule_question(self, attempt_id, question_id, deadline):
+        key = (attempt_id, question_id)
+        if self.question_deadlines.get(key) == deadline:
+            return
+        self.question_deadlines[key] = deadline
+        heapq.heappush(self.question_heap, (deadline, attempt_id, question_id))
+
+    def unschedule(self, attempt_id):
+        """Stop tracking an attempt; its heap entries, and those of its questions, become stale"""
+        self.deadlines.pop(attempt_id, None)
+
+    def refresh(self, now):
+        """Bring the schedule up to date with what changed since the last refresh; the first call
+        loads every open attempt and delivered time-limited question"""
+        open_attempts = ExamAttempt.objects.filter(status='in_progress')
+        deliveries = QuestionDelivery.objects.filter(attempt__status='in_progress',
+                                                     question__time_limit_seconds__isnull=False)
+        if self.watermark is None:
+            changed = [open_attempts]
+        else:
+            since = self.watermark - self.REFRESH_OVERLAP
+            closed = (ExamAttempt.objects.filter(submitted_at__gte=since).exclude(status='in_progress')
+                      .values_list('id', flat=True))
+            for attempt_id in closed:
+                self.unschedule(attempt_id)
+            # Editing an exam reschedules its open attempts (AttemptService.reschedule)
+            changed = [open_attempts.filter(started_at__gte=since), open_attempts.filter(exam__updated_at__gte=since)]
+            deliveries = deliveries.filter(delivered_at__gte=since)
+        for attempts in changed:
+            for attempt_id, deadline in attempts.values_list('id', 'deadline'):
+                self.schedule(attempt_id, deadline)
+        for attempt_id, question_id, delivered_at, limit in deliveries.values_list(
+                'attempt_id', 'question_id', 'delivered_at', 'question__time_limit_seconds'):
+            self.schedule_question(attempt_id, question_id, delivered_at + timedelta(seconds=limit))
+        self.watermark = now
+
+    def pop_due(self, now):
+        """Remove and return up to ``batch_size`` attempts whose deadline has passed, as a dict of
+        attempt id to deadline"""
+        due = {}
+        while self.heap and self.heap[0][0] <= now and len(due) < self.batch_size:
+            deadline, attempt_id = heapq.heappop(self.heap)
+            if self.deadlines.get(attempt_id) == deadline:
+                del self.deadlines[attempt_id]
+                due[attempt_id] = deadline
+        return due
+
+    def pop_due_questions(self, now):
+        """Remove and return the ``(attempt id, question id)`` pairs whose time limit has passed,
+        leaving out attempts that are no longer scheduled"""
+        due = []
+        while self.question_heap and self.question_heap[0][0] <= now:
+            deadline, attempt_id, question_id = heapq.heappop(self.question_heap)
+            key = (attempt_id, question_id)
+            if self.question_deadlines.get(key) == deadline:
+                del self.question_deadlines[key]
+                if attempt_id in self.deadlines:
+                    due.append(key)
+        return due
+
+    async def expire_due(self, now):
+        while due := self.pop_due(now):
+            try:
+                expired = await sync_to_async(AttemptService.expire)(list(due), now)
+            except Exception:
+                logger.exception("Expiring %d attempts failed, retrying in %s", len(due), self.RETRY_DELAY)
+                for attempt_id, deadline in due.items():
+                    self.schedule(attempt_id, deadline)
+                self.retry_at = now + self.RETRY_DELAY
+                return
+            for attempt_id in expired:
+                await self.channel_layer.group_send(attempt_group(attempt_id), {'type': 'attempt.expired'})
+
+    async def step(self):
+        """Do whatever is due now; returns the seconds until something is due again"""
+        now = self.clock.now()
+        if self.next_refresh is None or now >= self.next_refresh:
+            await sync_to_async(self.refresh)(now)
+            self.next_refresh = now + self.refresh_interval
+
+        if self.retry_at is None or now >= self.retry_at:
+            self.retry_at = None
+            await self.expire_due(now)
+
+        for attempt_id, question_id in self.pop_due_questions(now):
+            await self.channel_layer.group_send(attempt_group(attempt_id), {
+                'type': 'attempt.question_expired', 'question': str(question_id),
+            })
+
+        if self.push_interval and (self.next_push is None or now >= self.next_push):
+            await self.push_time_remaining(now)
+            self.next_push = now + self.push_interval
+
+        wake = [self.retry_at or (self.heap[0][0] if self.heap else None),
+                self.question_heap[0][0] if self.question_heap else None,
+                self.next_refresh if self.refresh_interval else None,
+                self.next_push if self.push_interval else None]
+        wake_at = min((at for at in wake if at is not None), default=now + self.IDLE_DELAY)
+        return max(0.0, (wake_at - now).total_seconds())
+
+    async def push_time_remaining(self, now):
+        for attempt_id, deadline in list(self.deadlines.items()):
+            await self.channel_layer.group_send(attempt_group(attempt_id), {
+                'type': 'attempt.time',
+                'time_remaining_seconds': max(0, int((deadline - now).total_seconds())),
+                'deadline': deadline.isoformat(),
+            })
+
+    async def run(self):
+        self.running = True
+        while self.running:
+            try:
+                delay = await self.step()
+            except Exception:
+                logger.exception("Attempt expiry scheduler step failed, retrying in %s", self.RETRY_DELAY)
+                delay = self.RETRY_DELAY.total_seconds()
+            await self.clock.sleep(delay)
+
+    def stop(self):
+        self.running = False
@@ -5,12 +5,21 @@ from api.core.schema import SuccessResponseSerializer, ErrorResponseSerializer
 from api.exams.serializers import (
     ExamSerializer, ExamCreateSerializer, ExamUpdateSerializer, AssignProctorSerializer, 
     QuestionSerializer, QuestionCreateSerializer, QuestionOptionSerializer,
-    ExamProctorSerializer
+    ExamProctorSerializer, QuestionBulkCreateSerializer, AttemptAutosaveSerializer, AdaptiveStepSerializer
 )
 
 # Admin Exam Schemas
 exam_list_schema = {
     "tags": ["Admin - Exams"],
+    "parameters": [
+        OpenApiParameter(
+            name="stream",
+            type=OpenApiTypes.BOOL,
+            location=OpenApiParameter.QUERY,
+            description="Stream every matching item as one JSON response instead of a page",
+            required=False,
+        ),
+    ],
     "responses": {
         200: OpenApiResponse(response=SuccessResponseSerializer, description="Exams retrieved successfully"),
         403: OpenApiResponse(response=ErrorResponseSerializer, description="Admin access required"),
@@ -26,6 +35,33 @@ exam_detail_schema = {
     },
 }
 
+exam_cache_stats_schema = {
+    "tags": ["Admin - Exams"],
+    "responses": {
+        200: OpenApiResponse(response=SuccessResponseSerializer, description="Exam paper cache stats retrieved successfully"),
+        403: OpenApiResponse(response=ErrorResponseSerializer, description="Admin access required"),
+    },
+}
+
+exam_export_schema = {
+    "tags": ["Admin - Exams"],
+    "responses": {
+        (200, "application/x-ndjson"): OpenApiResponse(description="NDJSON stream: the exam, its questions, then their options"),
+        403: OpenApiResponse(response=ErrorResponseSerializer, description="Admin access required"),
+        404: OpenApiResponse(response=ErrorResponseSerializer, description="Exam not found"),
+    },
+}
+
+exam_import_schema = {
+    "tags": ["Admin - Exams"],
+    "request": {"application/x-ndjson": {"type": "string", "format": "binary"}},
+    "responses": {
+        201: OpenApiResponse(response=SuccessResponseSerializer, description="Exam imported successfully"),
+        400: OpenApiResponse(response=ErrorResponseSerializer, description="Malformed export"),
+        403: OpenApiResponse(response=ErrorResponseSerializer, description="Admin access required"),
+    },
+}
+
 exam_create_schema = {
     "tags": ["Admin - Exams"],
     "request": ExamCreateSerializer,
@@ -65,6 +101,13 @@ exam_proctor_list_schema = {
             description="Filter by proctor ID",
             required=False,
         ),
+        OpenApiParameter(
+            name="stream",
+            type=OpenApiTypes.BOOL,
+            location=OpenApiParameter.QUERY,
+            description="Stream every matching item as one JSON response instead of a page",
+            required=False,
+        ),
     ],
     "responses": {
         200: OpenApiResponse(response=SuccessResponseSerializer, description="Exam-proctor assignments retrieved successfully"),
@@ -93,6 +136,16 @@ question_create_schema = {
     },
 }
 
+question_bulk_create_schema = {
+    "tags": ["Proctor - Questions"],
+    "request": QuestionBulkCreateSerializer,
+    "responses": {
+        201: OpenApiResponse(response=SuccessResponseSerializer, description="Questions imported successfully"),
+        400: OpenApiResponse(response=ErrorResponseSerializer, description="Per-item validation errors"),
+        403: OpenApiResponse(response=ErrorResponseSerializer, description="Not assigned as proctor to this exam"),
+    },
+}
+
 question_list_schema = {
     "tags": ["Proctor - Questions"],
     "parameters": [
@@ -131,3 +184,61 @@ proctor_exam_list_schema = {
         403: OpenApiResponse(response=ErrorResponseSerializer, description="Proctor access required"),
     },
 }
+
+# Candidate Attempt Schemas
+attempt_start_schema = {
+    "tags": ["Candidate - Attempts"],
+    "request": None,
+    "responses": {
+        200: OpenApiResponse(response=SuccessResponseSerializer, description="Attempt in progress resumed"),
+        201: OpenApiResponse(response=SuccessResponseSerializer, description="Attempt started successfully"),
+        400: OpenApiResponse(response=ErrorResponseSerializer, description="Exam not open for attempts"),
+        403: OpenApiResponse(response=ErrorResponseSerializer, description="Candidate access required or no attempts left"),
+        404: OpenApiResponse(response=ErrorResponseSerializer, description="Exam not found"),
+    },
+}
+
+attempt_autosave_schema = {
+    "tags": ["Candidate - Attempts"],
+    "request": AttemptAutosaveSerializer,
+    "responses": {
+        200: OpenApiResponse(response=SuccessResponseSerializer, description="Answers saved; rejected items listed by position"),
+        400: OpenApiResponse(response=ErrorResponseSerializer, description="Validation error"),
+        403: OpenApiResponse(response=ErrorResponseSerializer, description="Candidate access required or time is over"),
+        404: OpenApiResponse(response=ErrorResponseSerializer, description="Attempt not found"),
+        409: OpenApiResponse(response=ErrorResponseSerializer, description="Attempt already submitted"),
+    },
+}
+
+attempt_paper_schema = {
+    "tags": ["Candidate - Attempts"],
+    "responses": {
+        200: OpenApiResponse(response=SuccessResponseSerializer, description="Exam paper without the answer key"),
+        403: OpenApiResponse(response=ErrorResponseSerializer, description="Candidate access required"),
+        404: OpenApiResponse(response=ErrorResponseSerializer, description="Attempt not found"),
+        409: OpenApiResponse(response=ErrorResponseSerializer, description="Attempt already submitted"),
+    },
+}
+
+attempt_next_item_schema = {
+    "tags": ["Candidate - Attempts"],
+    "request": AdaptiveStepSerializer,
+    "responses": {
+        200: OpenApiResponse(response=SuccessResponseSerializer, description="Next question, or the final ability estimate"),
+        400: OpenApiResponse(response=ErrorResponseSerializer, description="Not an adaptive exam or not the current question"),
+        403: OpenApiResponse(response=ErrorResponseSerializer, description="Candidate access required or time is over"),
+        404: OpenApiResponse(response=ErrorResponseSerializer, description="Attempt not found"),
+        409: OpenApiResponse(response=ErrorResponseSerializer, description="Attempt already submitted"),
+    },
+}
+
+attempt_submit_schema = {
+    "tags": ["Candidate - Attempts"],
+    "request": None,
+    "responses": {
+        200: OpenApiResponse(response=SuccessResponseSerializer, description="Attempt submitted and graded"),
+        403: OpenApiResponse(response=ErrorResponseSerializer, description="Candidate access required"),
+        404: OpenApiResponse(response=ErrorResponseSerializer, description="Attempt not found"),
+        409: OpenApiResponse(response=ErrorResponseSerializer, description="Attempt already submitted"),
+    },
+}
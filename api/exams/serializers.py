@@ -1,18 +1,20 @@
 # serializers.py
 
+from django.utils import timezone
 from rest_framework import serializers
-from .models import Exam, ExamProctor, Question, QuestionOption
+from .models import Exam, ExamAttempt, ExamProctor, Question, QuestionOption
+from api.core.metrics import TimedSerializerMixin
 from api.users.models import User
 
 
-class QuestionOptionSerializer(serializers.ModelSerializer):
+class QuestionOptionSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = QuestionOption
         fields = '__all__'
         read_only_fields = ['created_at']
 
 
-class QuestionSerializer(serializers.ModelSerializer):
+class QuestionSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     options = QuestionOptionSerializer(many=True, read_only=True, source='questionoption_set')
     
     class Meta:
@@ -21,14 +23,40 @@ class QuestionSerializer(serializers.ModelSerializer):
         read_only_fields = ['created_at', 'updated_at']
 
 
-class QuestionCreateSerializer(serializers.ModelSerializer):
+class QuestionCreateSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Question
         fields = '__all__'
         read_only_fields = ['created_at', 'updated_at']
 
 
-class ExamSerializer(serializers.ModelSerializer):
+class BulkQuestionOptionSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    class Meta:
+        model = QuestionOption
+        fields = ['option_text', 'is_correct', 'order_index', 'explanation', 'media_url']
+
+
+class BulkQuestionSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    options = BulkQuestionOptionSerializer(many=True, required=False)
+
+    class Meta:
+        model = Question
+        fields = ['question_text', 'question_type', 'points', 'time_limit_seconds', 'order_index',
+                  'is_required', 'media_urls', 'metadata', 'options']
+
+    def validate_options(self, options):
+        order_indexes = [option['order_index'] for option in options]
+        if len(order_indexes) != len(set(order_indexes)):
+            raise serializers.ValidationError("Option order_index values must be unique within a question.")
+        return options
+
+
+class QuestionBulkCreateSerializer(TimedSerializerMixin, serializers.Serializer):
+    """A whole question tree for one exam, validated in a single pass"""
+    questions = BulkQuestionSerializer(many=True, allow_empty=False)
+
+
+class ExamSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     questions = QuestionSerializer(many=True, read_only=True, source='question_set')
     created_by_name = serializers.CharField(source='created_by.get_full_name', read_only=True)
     total_questions = serializers.SerializerMethodField()
@@ -39,24 +67,40 @@ class ExamSerializer(serializers.ModelSerializer):
         read_only_fields = ['created_by', 'created_at', 'updated_at']
     
     def get_total_questions(self, obj):
+        # Querysets built with ``Exam.objects.with_question_count()`` carry the count already
+        if hasattr(obj, 'question_count'):
+            return obj.question_count
         return obj.question_set.count()
 
 
-class ExamCreateSerializer(serializers.ModelSerializer):
+class ExamSummarySerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    """Lightweight list representation: no nested questions, annotated counts only"""
+    created_by_name = serializers.CharField(source='created_by.get_full_name', read_only=True)
+    total_questions = serializers.IntegerField(source='question_count', read_only=True)
+
+    class Meta:
+        model = Exam
+        fields = ['id', 'title', 'created_by', 'created_by_name', 'duration_minutes', 'max_attempts',
+                  'passing_score', 'exam_type', 'status', 'start_time', 'end_time', 'proctoring_enabled',
+                  'ai_monitoring_level', 'total_questions', 'created_at', 'updated_at']
+        read_only_fields = fields
+
+
+class ExamCreateSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Exam
         read_only_fields = ['created_by', 'created_at', 'updated_at']
         exclude = ['created_at', 'updated_at']
 
 
-class ExamUpdateSerializer(serializers.ModelSerializer):
+class ExamUpdateSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Exam
         read_only_fields = ['created_by', 'created_at', 'updated_at']
         exclude = ['created_by', 'created_at', 'updated_at']
 
 
-class ProctorSerializer(serializers.ModelSerializer):
+class ProctorSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     full_name = serializers.CharField(source='get_full_name', read_only=True)
     
     class Meta:
@@ -64,7 +108,7 @@ class ProctorSerializer(serializers.ModelSerializer):
         fields = ['id', 'username', 'first_name', 'last_name', 'full_name', 'email']
 
 
-class ExamProctorSerializer(serializers.ModelSerializer):
+class ExamProctorSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     proctor_details = ProctorSerializer(source='proctor', read_only=True)
     assigned_by_name = serializers.CharField(source='assigned_by.get_full_name', read_only=True)
     exam_title = serializers.CharField(source='exam.title', read_only=True)
@@ -76,7 +120,7 @@ class ExamProctorSerializer(serializers.ModelSerializer):
         read_only_fields = ['assigned_by', 'assigned_at']
 
 
-class AssignProctorSerializer(serializers.ModelSerializer):
+class AssignProctorSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = ExamProctor
         fields = ['exam', 'proctor', 'is_primary', 'status']
@@ -91,3 +135,64 @@ class AssignProctorSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError("Selected user must have proctor role.")
         
         return data
+
+
+class ExamAttemptSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    time_remaining_seconds = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ExamAttempt
+        fields = ['id', 'exam', 'candidate', 'attempt_number', 'status', 'started_at', 'deadline', 'submitted_at',
+                  'time_remaining_seconds']
+        read_only_fields = fields
+
+    def get_time_remaining_seconds(self, obj):
+        if obj.status != 'in_progress':
+            return 0
+        return max(0, int((obj.deadline - timezone.now()).total_seconds()))
+
+
+class AttemptAnswerInputSerializer(TimedSerializerMixin, serializers.Serializer):
+    question = serializers.UUIDField()
+    selected_options = serializers.ListField(child=serializers.UUIDField(), required=False, max_length=50)
+    answer_text = serializers.CharField(required=False, allow_blank=True)
+
+
+class AdaptiveStepSerializer(TimedSerializerMixin, serializers.Serializer):
+    """The answer to the current adaptive item, if there is one"""
+    answer = AttemptAnswerInputSerializer(required=False)
+
+
+class AttemptAutosaveSerializer(TimedSerializerMixin, serializers.Serializer):
+    """A batch of answers for one attempt; the last answer per question wins"""
+    answers = AttemptAnswerInputSerializer(many=True, allow_empty=False, max_length=500)
+
+
+class CandidateQuestionOptionSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    """Option as shown to candidates: no is_correct or explanation"""
+
+    class Meta:
+        model = QuestionOption
+        fields = ['id', 'option_text', 'order_index', 'media_url']
+        read_only_fields = fields
+
+
+class CandidateQuestionSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    options = CandidateQuestionOptionSerializer(many=True, read_only=True, source='questionoption_set')
+
+    class Meta:
+        model = Question
+        fields = ['id', 'question_text', 'question_type', 'points', 'time_limit_seconds', 'order_index',
+                  'is_required', 'media_urls', 'options']
+        read_only_fields = fields
+
+
+class CandidatePaperSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    """The exam paper a candidate sits, without the answer key"""
+    questions = CandidateQuestionSerializer(many=True, read_only=True, source='question_set')
+
+    class Meta:
+        model = Exam
+        fields = ['id', 'title', 'description', 'instructions', 'duration_minutes', 'exam_type', 'start_time',
+                  'end_time', 'questions']
+        read_only_fields = fields
@@ -0,0 +1,719 @@
+import hashlib
+import json
+import uuid
+from datetime import timedelta
+from functools import partial
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from api.core.exceptions.exceptions import BadRequestException, ConflictException, ForbiddenException, NotFoundException
+from api.core.routers import read_from_primary
+from api.exams.adaptive import ItemIndex
+from api.exams.cache import adaptive_item_cache, candidate_paper_cache, exam_paper_cache
+from api.results.models import ExamResult
+from api.results.services import GradingService
+from .models import AttemptAnswer, Exam, ExamAttempt, ExamProctor, Question, QuestionDelivery, QuestionOption
+from .serializers import CandidatePaperSerializer
+from .shuffle import SHUFFLED_EXAM_TYPES, PaperShuffle
+
+
+class ProctorAssignmentService:
+    """Answers "is this proctor assigned to that exam?" with at most one query per request.
+
+    A proctor's assignments are loaded once as ``{exam_id: status}``, memoized on the request
+    and, unless ``PROCTOR_ASSIGNMENT_CACHE_TIMEOUT`` is 0, kept in the default cache until an
+    ``ExamProctor`` row for that proctor changes.
+    """
+    REQUEST_ATTR = '_proctor_assignments'
+
+    @staticmethod
+    def cache_key(user_id):
+        return f"proctor-assignments:{user_id}"
+
+    @staticmethod
+    def invalidate(user_id):
+        cache.delete(ProctorAssignmentService.cache_key(user_id))
+
+    @staticmethod
+    def assignments(request):
+        assignments = getattr(request, ProctorAssignmentService.REQUEST_ATTR, None)
+        if assignments is not None:
+            return assignments
+
+        timeout = getattr(settings, 'PROCTOR_ASSIGNMENT_CACHE_TIMEOUT', 0)
+        key = ProctorAssignmentService.cache_key(request.user.pk)
+        assignments = cache.get(key) if timeout else None
+        if assignments is None:
+            assignments = {
+                str(exam_id): assignment_status
+                for exam_id, assignment_status in ExamProctor.objects.filter(proctor=request.user)
+                .values_list('exam_id', 'status')
+            }
+            if timeout:
+                cache.set(key, assignments, timeout)
+
+        setattr(request, ProctorAssignmentService.REQUEST_ATTR, assignments)
+        return assignments
+
+    @staticmethod
+    async def aassignments(request):
+        """Async ``assignments()`` for async views"""
+        assignments = getattr(request, ProctorAssignmentService.REQUEST_ATTR, None)
+        if assignments is not None:
+            return assignments
+
+        timeout = getattr(settings, 'PROCTOR_ASSIGNMENT_CACHE_TIMEOUT', 0)
+        key = ProctorAssignmentService.cache_key(request.user.pk)
+        assignments = await cache.aget(key) if timeout else None
+        if assignments is None:
+            rows = ExamProctor.objects.filter(proctor=request.user).values_list('exam_id', 'status')
+            assignments = {str(exam_id): assignment_status async for exam_id, assignment_status in rows}
+            if timeout:
+                await cache.aset(key, assignments, timeout)
+
+        setattr(request, ProctorAssignmentService.REQUEST_ATTR, assignments)
+        return assignments
+
+    @staticmethod
+    def _normalize(exam_id):
+        try:
+            return str(uuid.UUID(str(exam_id)))
+        except ValueError:
+            return None
+
+    @staticmethod
+    def is_assigned(request, exam_id):
+        exam_id = ProctorAssignmentService._normalize(exam_id)
+        return exam_id is not None and exam_id in ProctorAssignmentService.assignments(request)
+
+    @staticmethod
+    async def ais_assigned(request, exam_id):
+        exam_id = ProctorAssignmentService._normalize(exam_id)
+        return exam_id is not None and exam_id in await ProctorAssignmentService.aassignments(request)
+
+    @staticmethod
+    def _filter_statuses(assignments, statuses):
+        return [
+            exam_id for exam_id, assignment_status in assignments.items()
+            if statuses is None or assignment_status in statuses
+        ]
+
+    @staticmethod
+    def exam_ids(request, statuses=None):
+        return ProctorAssignmentService._filter_statuses(ProctorAssignmentService.assignments(request), statuses)
+
+    @staticmethod
+    async def aexam_ids(request, statuses=None):
+        assignments = await ProctorAssignmentService.aassignments(request)
+        return ProctorAssignmentService._filter_statuses(assignments, statuses)
+
+
+class ExamService:
+    @staticmethod
+    def paper_validators(exam_id):
+        """``(etag, last_modified)`` of an exam's paper; ``None`` if the exam doesn't exist.
+
+        Kept under the paper's cache version, so repeat reads cost no query and any write that
+        invalidates the paper also recomputes them. Not counted in the paper cache stats; like
+        the paper, computed from the primary.
+        """
+        key = exam_paper_cache.paper_key(exam_id, exam_paper_cache.version(exam_id), 'validators')
+        validators = exam_paper_cache.cache.get(key)
+        if validators is None:
+            with read_from_primary():
+                validators = ExamService.compute_paper_validators(exam_id)
+            if validators is not None:
+                exam_paper_cache.cache.set(key, validators)
+        return validators
+
+    @staticmethod
+    def compute_paper_validators(exam_id):
+        """``paper_validators()`` from one aggregate query over the exam, question and option timestamps"""
+        exam = (Exam.objects.filter(id=exam_id).with_paper_changes()
+                .values('updated_at', 'questions_updated_at', 'options_updated_at',
+                        'paper_question_count', 'paper_option_count').first())
+        if exam is None:
+            return None
+        timestamps = [exam[name] for name in ('updated_at', 'questions_updated_at', 'options_updated_at')]
+        last_modified = max(timestamp for timestamp in timestamps if timestamp is not None)
+        state = "|".join(str(exam[name]) for name in sorted(exam))
+        return hashlib.md5(f"{exam_id}|{state}".encode()).hexdigest(), last_modified
+
+
+class QuestionService:
+    BULK_BATCH_SIZE = 1000
+
+    @staticmethod
+    def find_order_index_conflicts(exam_id, order_indexes):
+        """Return ``{index: errors}`` for the order indexes that repeat within the payload or
+        collide with a question already on the exam. ``None`` entries (items whose order_index
+        failed validation) are skipped."""
+        taken = set(Question.objects.filter(exam_id=exam_id).values_list('order_index', flat=True))
+        errors = {}
+        for index, order_index in enumerate(order_indexes):
+            if order_index is None:
+                continue
+            if order_index in taken:
+                errors[index] = {'order_index': [f"Order index {order_index} is already used in this exam."]}
+            taken.add(order_index)
+        return errors
+
+    @staticmethod
+    def bulk_create_tree(exam_id, questions):
+        """Insert validated questions and their nested options in one transaction. Raises
+        ``IntegrityError`` when a concurrent write took one of their order indexes."""
+        question_rows, option_rows = [], []
+        for data in questions:
+            data = dict(data)
+            options = data.pop('options', [])
+            question = Question(exam_id=exam_id, **data)
+            question_rows.append(question)
+            option_rows.extend(QuestionOption(question=question, **option) for option in options)
+
+        with transaction.atomic():
+            Question.objects.bulk_create(question_rows, batch_size=QuestionService.BULK_BATCH_SIZE)
+            QuestionOption.objects.bulk_create(option_rows, batch_size=QuestionService.BULK_BATCH_SIZE)
+
+        # bulk_create doesn't send post_save, so drop the cached paper explicitly (once committed,
+        # like the signal handlers do)
+        transaction.on_commit(partial(exam_paper_cache.invalidate, exam_id))
+        return question_rows, option_rows
+
+
+class ExamTransferService:
+    """Move an exam with its questions and options between environments as NDJSON.
+
+    The stream is one ``{"type": ..., "data": ...}`` object per line: the exam first, then
+    every question, then every option. Both directions work in fixed-size chunks, so memory
+    use doesn't grow with the size of the exam.
+    """
+    CHUNK_SIZE = 2000
+
+    EXAM_FIELDS = ['title', 'description', 'duration_minutes', 'max_attempts', 'passing_score', 'instructions',
+                   'exam_type', 'status', 'start_time', 'end_time', 'proctoring_enabled', 'ai_monitoring_level',
+                   'settings']
+    QUESTION_FIELDS = ['id', 'question_text', 'question_type', 'points', 'time_limit_seconds', 'order_index',
+                       'is_required', 'media_urls', 'metadata']
+    OPTION_FIELDS = ['question', 'option_text', 'is_correct', 'order_index', 'explanation', 'media_url']
+
+    @staticmethod
+    def _line(kind, data):
+        return json.dumps({'type': kind, 'data': data}, cls=DjangoJSONEncoder) + '\n'
+
+    @staticmethod
+    def export_lines(exam_id, chunk_size=CHUNK_SIZE):
+        """Yield the NDJSON lines for an exam; raises ``Exam.DoesNotExist`` before the first line"""
+        exam = Exam.objects.values('id', *ExamTransferService.EXAM_FIELDS).get(id=exam_id)
+
+        def lines():
+            yield ExamTransferService._line('exam', exam)
+            questions = (Question.objects.filter(exam_id=exam_id).order_by('order_index')
+                         .values(*ExamTransferService.QUESTION_FIELDS))
+            for question in questions.iterator(chunk_size=chunk_size):
+                yield ExamTransferService._line('question', question)
+            options = (QuestionOption.objects.filter(question__exam_id=exam_id)
+                       .order_by('question__order_index', 'order_index')
+                       .values(*ExamTransferService.OPTION_FIELDS))
+            for option in options.iterator(chunk_size=chunk_size):
+                yield ExamTransferService._line('option', option)
+
+        return lines()
+
+    @staticmethod
+    def _build(model, data, fields, **extra):
+        values = {name: model._meta.get_field(name).to_python(data[name]) for name in fields if name in data}
+        return model(**values, **extra)
+
+    @staticmethod
+    def import_lines(lines, created_by, chunk_size=CHUNK_SIZE):
+        """Create a new exam from NDJSON lines and return it.
+
+        Questions get ids derived from the new exam id and their original id, so options can be
+        re-pointed without keeping an id map in memory.
+        """
+        try:
+            with transaction.atomic():
+                return ExamTransferService._import_chunked(lines, created_by, chunk_size)
+        except IntegrityError as e:
+            raise BadRequestException(f"The export references missing or duplicate rows: {e}")
+
+    @staticmethod
+    def _import_chunked(lines, created_by, chunk_size):
+        exam = None
+        questions, options = [], []
+
+        def flush_questions():
+            Question.objects.bulk_create(questions)
+            questions.clear()
+
+        def flush_options():
+            # Options reference questions that may still be buffered
+            flush_questions()
+            QuestionOption.objects.bulk_create(options)
+            options.clear()
+
+        for number, line in enumerate(lines, start=1):
+            if isinstance(line, bytes):
+                line = line.decode('utf-8')
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+                exam = ExamTransferService._import_record(exam, record['type'], record['data'], created_by,
+                                                          questions, options)
+            except (ValueError, KeyError, TypeError, ValidationError) as e:
+                raise BadRequestException(f"Line {number} is not a valid export record: {e}")
+
+            if len(questions) >= chunk_size:
+                flush_questions()
+            if len(options) >= chunk_size:
+                flush_options()
+
+        if exam is None:
+            raise BadRequestException("The export contains no exam")
+        flush_options()
+        return exam
+
+    @staticmethod
+    def _import_record(exam, kind, data, created_by, questions, options):
+        """Apply one export record, buffering questions and options; returns the exam being imported"""
+        if kind == 'exam':
+            if exam is not None:
+                raise ValueError("an export can contain only one exam")
+            exam = ExamTransferService._build(Exam, data, ExamTransferService.EXAM_FIELDS, created_by=created_by)
+            exam.save()
+        elif exam is None:
+            raise ValueError("the exam record must come first")
+        elif kind == 'question':
+            questions.append(ExamTransferService._build(
+                Question, data, ExamTransferService.QUESTION_FIELDS[1:],
+                exam=exam, id=uuid.uuid5(exam.id, str(data['id'])),
+            ))
+        elif kind == 'option':
+            options.append(ExamTransferService._build(
+                QuestionOption, data, ExamTransferService.OPTION_FIELDS[1:],
+                question_id=uuid.uuid5(exam.id, str(data['question'])),
+            ))
+        else:
+            raise ValueError(f"unknown record type '{kind}'")
+        return exam
+
+
+class AttemptService:
+    """Starts, autosaves and submits candidate attempts.
+
+    Autosave is a blind upsert keyed on (attempt, question): answer rows are never read
+    before they are written. The attempt's status and deadline and the exam's question time
+    limits are cached, so a warm autosave is a single INSERT ... ON CONFLICT DO UPDATE, plus
+    one indexed read when the batch touches time-limited questions. Their limit runs from
+    the first time the question was delivered (see ``deliver``). Adaptive attempts get no
+    paper and no autosave: their questions come and are answered one at a time through
+    ``AdaptiveService.next_item``.
+    """
+    ADAPTIVE_MESSAGE = "Adaptive exams are answered one question at a time through the next item endpoint"
+
+    @staticmethod
+    def state_key(attempt_id):
+        # v2: the state carries exam_type
+        return f"attempt-state:v2:{attempt_id}"
+
+    @staticmethod
+    def invalidate(attempt_id):
+        cache.delete(AttemptService.state_key(attempt_id))
+
+    @staticmethod
+    def state(attempt_id):
+        """``{exam_id, exam_type, candidate_id, status, deadline}`` for an attempt"""
+        timeout = getattr(settings, 'ATTEMPT_STATE_CACHE_TIMEOUT', 0)
+        key = AttemptService.state_key(attempt_id)
+        state = cache.get(key) if timeout else None
+        if state is None:
+            state = (ExamAttempt.objects.filter(pk=attempt_id)
+                     .values('exam_id', 'candidate_id', 'status', 'deadline', exam_type=F('exam__exam_type'))
+                     .first())
+            if state is None:
+                raise NotFoundException("Attempt not found")
+            if timeout:
+                cache.set(key, state, timeout)
+        return state
+
+    @staticmethod
+    def question_limits(exam_id):
+        """``{question_id: time_limit_seconds}`` for every question of the exam, cached with its paper"""
+        def build():
+            return {
+                str(question_id): time_limit
+                for question_id, time_limit in Question.objects.filter(exam_id=exam_id)
+                .values_list('id', 'time_limit_seconds')
+            }
+
+        return exam_paper_cache.get_or_build(exam_id, build, kind='question-limits')
+
+    @staticmethod
+    def deliver(attempt_id, exam_id, question_ids):
+        """Start the clock of the time-limited questions among ``question_ids``; one INSERT ... ON
+        CONFLICT DO NOTHING, so a question delivered again keeps its first delivery time"""
+        limits = AttemptService.question_limits(exam_id)
+        now = timezone.now()
+        deliveries = [QuestionDelivery(attempt_id=attempt_id, question_id=question_id, delivered_at=now)
+                      for question_id in map(str, question_ids) if limits.get(question_id)]
+        if deliveries:
+            QuestionDelivery.objects.bulk_create(deliveries, ignore_conflicts=True)
+
+    @staticmethod
+    def start(exam_id, candidate):
+        """Return ``(attempt, created)``; an attempt still in progress is resumed instead of starting another"""
+        exam = Exam.objects.filter(pk=exam_id).first()
+        if exam is None:
+            raise NotFoundException("Exam not found")
+        if exam.status != 'published':
+            raise BadRequestException("This exam is not open for attempts")
+        now = timezone.now()
+        if exam.start_time and now < exam.start_time:
+            raise BadRequestException("This exam has not started yet")
+        if exam.end_time and now >= exam.end_time:
+            raise BadRequestException("This exam has ended")
+
+        attempts = ExamAttempt.objects.filter(exam=exam, candidate=candidate)
+        current = attempts.filter(status='in_progress', deadline__gt=now).first()
+        if current is not None:
+            return current, False
+        used = attempts.count()
+        if used >= exam.max_attempts:
+            raise ForbiddenException("You have used all attempts for this exam")
+
+        deadline = AttemptService.deadline(exam, now)
+        try:
+            with transaction.atomic():
+                attempt = ExamAttempt.objects.create(exam=exam, candidate=candidate, attempt_number=used + 1,
+                                                     started_at=now, deadline=deadline)
+        except IntegrityError:
+            raise ConflictException("Another attempt for this exam was started at the same time")
+        return attempt, True
+
+    @staticmethod
+    def deadline(exam, started_at):
+        """``started_at`` plus the exam's duration, capped by its end time"""
+        deadline = started_at + timedelta(minutes=exam.duration_minutes)
+        if exam.end_time:
+            deadline = min(deadline, exam.end_time)
+        return deadline
+
+    @staticmethod
+    def reschedule(exam_id):
+        """Move the deadline of the exam's attempts in progress after its duration or end time
+        changed; the expiry scheduler picks them up at its next refresh"""
+        exam = Exam.objects.filter(pk=exam_id).only('duration_minutes', 'end_time').first()
+        if exam is None:
+            return
+        attempts = ExamAttempt.objects.filter(exam_id=exam_id, status='in_progress').only('started_at', 'deadline')
+        moved = []
+        for attempt in attempts:
+            deadline = AttemptService.deadline(exam, attempt.started_at)
+            if deadline != attempt.deadline:
+                attempt.deadline = deadline
+                moved.append(attempt)
+        if moved:
+            ExamAttempt.objects.bulk_update(moved, ['deadline'])
+            cache.delete_many([AttemptService.state_key(attempt.pk) for attempt in moved])
+
+    @staticmethod
+    def owned_state(attempt_id, candidate):
+        state = AttemptService.state(attempt_id)
+        if state['candidate_id'] != candidate.pk:
+            raise NotFoundException("Attempt not found")
+        return state
+
+    @staticmethod
+    def autosave(attempt_id, candidate, answers):
+        """Upsert validated answers; returns ``(saved, rejected, saved_at, deadline)``.
+
+        The last answer for a question in the batch wins. Answers for unknown questions, and for
+        time-limited questions that weren't delivered or whose limit has run out since, are
+        reported in ``rejected`` by position instead of failing the whole batch.
+        """
+        state = AttemptService.owned_state(attempt_id, candidate)
+        if state['exam_type'] == 'adaptive':
+            raise BadRequestException(AttemptService.ADAPTIVE_MESSAGE)
+        return AttemptService.save_answers(attempt_id, state, answers)
+
+    @staticmethod
+    def save_answers(attempt_id, state, answers):
+        """``autosave`` for an attempt whose ``state`` is already loaded, whatever the exam type"""
+        if state['status'] != 'in_progress':
+            raise ConflictException("This attempt has already been submitted")
+        now = timezone.now()
+        if now >= state['deadline']:
+            raise ForbiddenException("The time for this attempt is over")
+
+        limits = AttemptService.question_limits(state['exam_id'])
+        latest, rejected = {}, []
+        for index, answer in enumerate(answers):
+            question_id = str(answer['question'])
+            if question_id in limits:
+                latest[question_id] = (index, answer)
+            else:
+                rejected.append({'index': index, 'errors': {'question': ["Question does not belong to this exam."]}})
+
+        timed = [question_id for question_id in latest if limits[question_id]]
+        if timed:
+            delivered = {
+                str(question_id): delivered_at
+                for question_id, delivered_at in QuestionDelivery.objects.filter(
+                    attempt_id=attempt_id, question_id__in=timed).values_list('question_id', 'delivered_at')
+            }
+            for question_id in timed:
+                started = delivered.get(question_id)
+                if started is None:
+                    message = "This question has not been delivered to this attempt."
+                elif now > started + timedelta(seconds=limits[question_id]):
+                    message = "The time limit for this question is over."
+                else:
+                    continue
+                index, _ = latest.pop(question_id)
+                rejected.append({'index': index, 'errors': {'question': [message]}})
+
+        rows = [
+            AttemptAnswer(attempt_id=attempt_id, question_id=question_id,
+                          selected_options=[str(option) for option in answer.get('selected_options', [])],
+                          answer_text=answer.get('answer_text', ''), first_saved_at=now, saved_at=now)
+            for question_id, (index, answer) in latest.items()
+        ]
+        if rows:
+            with transaction.atomic():
+                # The cached state can be stale in another process, and submit() can land between
+                # the check above and the write: only write while the locked row is in progress
+                if not ExamAttempt.objects.select_for_update().filter(
+                        pk=attempt_id, status='in_progress', deadline__gt=now).exists():
+                    AttemptService.invalidate(attempt_id)
+                    raise ConflictException("This attempt has already been submitted")
+                # first_saved_at is left out of update_fields, so it keeps the value of the first save
+                AttemptAnswer.objects.bulk_create(
+                    rows, update_conflicts=True, unique_fields=['attempt', 'question'],
+                    update_fields=['selected_options', 'answer_text', 'saved_at'],
+                )
+        rejected.sort(key=lambda item: item['index'])
+        return len(rows), rejected, now, state['deadline']
+
+    @staticmethod
+    def paper(attempt_id, candidate):
+        """The candidate-safe paper for an attempt in progress, in the attempt's own order"""
+        state = AttemptService.owned_state(attempt_id, candidate)
+        if state['status'] != 'in_progress':
+            raise ConflictException("This attempt has already been submitted")
+        paper = CandidatePaperService.paper(state['exam_id'])
+        if paper is None:
+            raise NotFoundException("Exam not found")
+        if paper['exam_type'] == 'adaptive':
+            raise BadRequestException(AttemptService.ADAPTIVE_MESSAGE)
+        if paper['exam_type'] in SHUFFLED_EXAM_TYPES:
+            paper = PaperShuffle(state['exam_id'], attempt_id).apply(paper)
+        # The whole paper is in the candidate's hands now: every time limit starts running
+        AttemptService.deliver(attempt_id, state['exam_id'], [question['id'] for question in paper['questions']])
+        return paper
+
+    @staticmethod
+    def submit(attempt_id, candidate):
+        """Close the attempt and grade its objective answers; returns ``(attempt, result)``"""
+        state = AttemptService.owned_state(attempt_id, candidate)
+        submitted = (ExamAttempt.objects.filter(pk=attempt_id, status='in_progress')
+                     .update(status='submitted', submitted_at=timezone.now()))
+        AttemptService.invalidate(attempt_id)
+        if not submitted:
+            raise ConflictException("This attempt has already been submitted")
+
+        return ExamAttempt.objects.get(pk=attempt_id), AttemptService.grade(attempt_id, state['exam_id'], candidate.pk)
+
+    @staticmethod
+    def grade(attempt_id, exam_id, candidate_id):
+        """Grade one attempt; the candidate's result always reflects their latest graded attempt"""
+        AttemptService.grade_attempts(exam_id, [(attempt_id, candidate_id)])
+        return ExamResult.objects.get(exam_id=exam_id, candidate_id=candidate_id)
+
+    @staticmethod
+    def grade_attempts(exam_id, attempts):
+        """Grade ``(attempt_id, candidate_id)`` pairs of one exam with a single answer query"""
+        selected = {attempt_id: [] for attempt_id, _ in attempts}
+        rows = AttemptAnswer.objects.filter(attempt_id__in=selected).values_list('attempt_id', 'selected_options')
+        for attempt_id, options in rows:
+            selected[attempt_id].extend(options)
+        # One result per candidate; a later attempt in the batch wins
+        submissions = {candidate_id: selected[attempt_id] for attempt_id, candidate_id in attempts}
+        GradingService.grade_exam(exam_id, submissions.items())
+
+    @staticmethod
+    def expire(attempt_ids, now=None):
+        """Auto-submit the given attempts if they are still in progress past their deadline, grade
+        them and return the ids that were expired"""
+        now = now or timezone.now()
+        with transaction.atomic():
+            attempts = list(ExamAttempt.objects.select_for_update()
+                            .filter(pk__in=attempt_ids, status='in_progress', deadline__lte=now)
+                            .order_by('deadline').values_list('id', 'exam_id', 'candidate_id'))
+            ExamAttempt.objects.filter(pk__in=[attempt_id for attempt_id, _, _ in attempts]).update(
+                status='expired', submitted_at=now,
+            )
+        cache.delete_many([AttemptService.state_key(attempt_id) for attempt_id, _, _ in attempts])
+
+        by_exam = {}
+        for attempt_id, exam_id, candidate_id in attempts:
+            by_exam.setdefault(exam_id, []).append((attempt_id, candidate_id))
+        for exam_id, exam_attempts in by_exam.items():
+            AttemptService.grade_attempts(exam_id, exam_attempts)
+        return [attempt_id for attempt_id, _, _ in attempts]
+
+
+class CandidatePaperService:
+    """Serves published papers to candidates from pre-built snapshots"""
+
+    @staticmethod
+    def build(exam_id):
+        exam = Exam.objects.with_paper().filter(id=exam_id, status='published').first()
+        return CandidatePaperSerializer(exam).data if exam else None
+
+    @staticmethod
+    def paper(exam_id, version=None):
+        return candidate_paper_cache.get_or_build(
+            exam_id, lambda: CandidatePaperService.build(exam_id), cacheable=lambda data: data is not None,
+            version=version,
+        )
+
+    @staticmethod
+    def prewarm(within_minutes):
+        """Build snapshots for published exams opening within ``within_minutes`` or already open;
+        returns their ids"""
+        now = timezone.now()
+        exam_ids = list(
+            Exam.objects.filter(status='published', start_time__lte=now + timedelta(minutes=within_minutes))
+            .exclude(end_time__lte=now).values_list('id', flat=True)
+        )
+        for exam_id in exam_ids:
+            CandidatePaperService.paper(exam_id)
+        return exam_ids
+
+
+class AdaptiveService:
+    """Runs adaptive attempts one item at a time.
+
+    Each step grades the answer to the current item against the exam's in-memory
+    ``ItemIndex``, updates the ability estimate and picks the most informative remaining item.
+    The items given and the responses are kept in the default cache, so a step's only queries
+    are the autosave of the answer. Steps of one attempt run one at a time under a short-lived
+    lock key in the same cache, so concurrent answers can't both be appended.
+    """
+    LOCK_TIMEOUT = 10
+
+    @staticmethod
+    def progress_key(attempt_id):
+        return f"adaptive-progress:{attempt_id}"
+
+    @staticmethod
+    def item_index(exam_id, version=None):
+        return adaptive_item_cache.get_or_build(
+            exam_id, lambda: ItemIndex.for_exam(exam_id), cacheable=lambda index: index is not None, version=version,
+        )
+
+    @staticmethod
+    def _advance(index, progress):
+        """Estimate ability from the responses so far and, unless the test is over, queue the next
+        item; returns ``(ability, standard_error, finished)``"""
+        items, responses = progress['items'], progress['responses']
+        thetas, standard_errors = index.estimate(index.log_posterior(items[:len(responses)], responses))
+        ability, standard_error = float(thetas[0]), float(standard_errors[0])
+        pending = len(items) > len(responses)
+        finished = not pending and (len(responses) >= index.max_items or len(items) == len(index)
+                                    or standard_error <= index.min_standard_error)
+        if not pending and not finished:
+            administered = np.zeros((1, len(index)), dtype=bool)
+            administered[0, items] = True
+            items.append(int(index.select(thetas, administered)[0]))
+        return ability, standard_error, finished
+
+    @staticmethod
+    def _progress(attempt_id, index, version):
+        progress = cache.get(AdaptiveService.progress_key(attempt_id))
+        if progress is None or progress['version'] != version:
+            # Lost from the cache, or its item positions are those of an older index: replay the
+            # answers in the order they were first saved. Selection is deterministic, so the item
+            # that was pending is queued again.
+            progress = {'version': version, 'items': [], 'responses': []}
+            answers = (AttemptAnswer.objects.filter(attempt_id=attempt_id).order_by('first_saved_at')
+                       .values_list('question_id', 'selected_options'))
+            for question_id, options in answers:
+                position = index.positions.get(str(question_id))
+                if position is not None:
+                    progress['items'].append(position)
+                    progress['responses'].append(index.is_correct(position, options))
+            AdaptiveService._advance(index, progress)
+        return progress
+
+    @staticmethod
+    def next_item(attempt_id, candidate, answer=None):
+        """Record ``answer`` to the current item (if given) and return the next step:
+        ``{finished, question, items_answered, ability, standard_error}``.
+
+        Without an answer the current item is returned again, so the call is safe to retry.
+        """
+        state = AttemptService.owned_state(attempt_id, candidate)
+        if state['status'] != 'in_progress':
+            raise ConflictException("This attempt has already been submitted")
+        lock_key = f"lock:{AdaptiveService.progress_key(attempt_id)}"
+        if not cache.add(lock_key, 1, timeout=AdaptiveService.LOCK_TIMEOUT):
+            raise ConflictException("Another answer to this attempt is being recorded, try again")
+        try:
+            return AdaptiveService._step(attempt_id, state, answer)
+        finally:
+            cache.delete(lock_key)
+
+    @staticmethod
+    def _step(attempt_id, state, answer):
+        # One version for both snapshots, so the index's items are those of the paper
+        version = candidate_paper_cache.version(state['exam_id'])
+        paper = CandidatePaperService.paper(state['exam_id'], version)
+        if paper is None or paper['exam_type'] != 'adaptive':
+            raise BadRequestException("This exam is not adaptive")
+
+        index = AdaptiveService.item_index(state['exam_id'], version)
+        progress = AdaptiveService._progress(attempt_id, index, version)
+        items, responses = progress['items'], progress['responses']
+
+        if answer is not None:
+            position = index.positions.get(str(answer['question']))
+            if len(items) == len(responses) or position != items[-1]:
+                raise BadRequestException("Answer the current question of this attempt")
+            _, rejected, _, _ = AttemptService.save_answers(attempt_id, state, [answer])
+            if rejected:
+                raise BadRequestException(rejected[0]['errors']['question'][0])
+            responses.append(index.is_correct(position, answer.get('selected_options', [])))
+
+        ability, standard_error, finished = AdaptiveService._advance(index, progress)
+        timeout = max(1, int((state['deadline'] - timezone.now()).total_seconds()) + 60)
+        cache.set(AdaptiveService.progress_key(attempt_id), progress, timeout)
+
+        question = None
+        if not finished:
+            question_id = index.question_ids[items[-1]]
+            question = next((question for question in paper['questions'] if question['id'] == question_id), None)
+            if question is None:
+                # Only when the snapshots were built on either side of an edit, whose version bump is due
+                cache.delete(AdaptiveService.progress_key(attempt_id))
+                raise ConflictException("This exam has just changed, try again")
+            question = dict(question)
+            options = question['options']
+            question['options'] = [options[i] for i in
+                                   PaperShuffle(state['exam_id'], attempt_id).option_permutation(question)]
+            AttemptService.deliver(attempt_id, state['exam_id'], [question_id])
+        return {
+            'finished': finished,
+            'question': question,
+            'items_answered': len(responses),
+            'ability': round(ability, 3) if finished else None,
+            'standard_error': round(standard_error, 3) if finished else None,
+        }
@@ -0,0 +1,61 @@
+import math
+import random
+from hashlib import blake2b
+
+# Exam types whose questions and options are shown in a per-candidate order
+SHUFFLED_EXAM_TYPES = ('standard', 'adaptive')
+
+
+class PaperShuffle:
+    """Per-attempt question and option order, derived from (exam id, attempt id) and never stored.
+
+    Permutations are seeded Fisher-Yates shuffles and stable across processes;
+    ``permutation[displayed] == base`` position. Options get their own seed per question, so
+    editing one question doesn't reorder the options of the others.
+    """
+    # 20! < 2**64: up to this many items one 64-bit digest drives the whole shuffle
+    DIGEST_SHUFFLE_MAX = 20
+    DIGEST_RANGE = 1 << 64
+
+    def __init__(self, exam_id, attempt_id):
+        self.seed = f"{exam_id}:{attempt_id}"
+
+    def permutation(self, count, salt=''):
+        order = list(range(count))
+        key = f"{self.seed}:{salt}"
+        if count > self.DIGEST_SHUFFLE_MAX:
+            random.Random(key).shuffle(order)
+            return order
+        # Seeding a Mersenne Twister costs several times more than hashing, and option lists are short.
+        # Digests past the last whole multiple of count! would favour some orders: hash again.
+        orders = math.factorial(count)
+        limit = self.DIGEST_RANGE - self.DIGEST_RANGE % orders
+        state, rounds = self.digest(key), 0
+        while state >= limit:
+            rounds += 1
+            state = self.digest(f"{key}:{rounds}")
+        for i in range(count - 1, 0, -1):
+            state, j = divmod(state, i + 1)
+            order[i], order[j] = order[j], order[i]
+        return order
+
+    @staticmethod
+    def digest(key):
+        return int.from_bytes(blake2b(key.encode(), digest_size=8).digest(), 'big')
+
+    def question_permutation(self, paper):
+        return self.permutation(len(paper['questions']))
+
+    def option_permutation(self, question):
+        return self.permutation(len(question['options']), question['id'])
+
+    def apply(self, paper):
+        """Return a shuffled copy of a candidate paper; the (shared, immutable) snapshot is untouched"""
+        questions = paper['questions']
+        shuffled = []
+        for base in self.question_permutation(paper):
+            question = dict(questions[base])
+            options = question['options']
+            question['options'] = [options[i] for i in self.option_permutation(question)]
+            shuffled.append(question)
+        return {**paper, 'questions': shuffled}
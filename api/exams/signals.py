@@ -0,0 +1,85 @@
+from functools import partial
+
+from django.db import transaction
+from django.db.models import QuerySet
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from api.exams.cache import exam_paper_cache
+from api.exams.models import Exam, ExamAttempt, ExamProctor, Question, QuestionOption
+from api.exams.services import AttemptService, ProctorAssignmentService
+
+
+def invalidate_paper_on_commit(exam_id):
+    """Bump the exam's paper version once the change is committed. Bumped any earlier, a
+    concurrent read could cache a paper built from the rows as they were before, under the
+    new version."""
+    transaction.on_commit(partial(exam_paper_cache.invalidate, exam_id))
+
+
+@receiver([post_save, post_delete], sender=Exam)
+def invalidate_exam_paper(sender, instance, **kwargs):
+    invalidate_paper_on_commit(instance.pk)
+
+
+@receiver(post_save, sender=Exam)
+def reschedule_exam_attempts(sender, instance, created, **kwargs):
+    """A changed duration or end time moves the deadline of the attempts in progress"""
+    if not created:
+        transaction.on_commit(partial(AttemptService.reschedule, instance.pk))
+
+
+@receiver([post_save, post_delete], sender=Question)
+def invalidate_question_paper(sender, instance, **kwargs):
+    invalidate_paper_on_commit(instance.exam_id)
+
+
+def option_exam_id(option):
+    if QuestionOption.question.is_cached(option):
+        return option.question.exam_id
+    return Question.objects.filter(pk=option.question_id).values_list('exam_id', flat=True).first()
+
+
+@receiver([post_save, post_delete], sender=QuestionOption)
+def invalidate_option_paper(sender, instance, **kwargs):
+    exam_id = option_exam_id(instance)
+    if exam_id:
+        invalidate_paper_on_commit(exam_id)
+
+
+@receiver(post_delete, sender=Question)
+@receiver(post_delete, sender=QuestionOption)
+def touch_exam_on_delete(sender, instance, origin=None, **kwargs):
+    """Move the exam's ``updated_at`` forward, so ``Last-Modified`` changes when rows go away.
+
+    Rows deleted along with their parent (an exam, or a question for its options) are skipped:
+    the parent's own deletion takes care of it.
+    """
+    origin_model = origin.model if isinstance(origin, QuerySet) else type(origin)
+    if origin is not None and origin_model is not sender:
+        return
+    exam_id = instance.exam_id if sender is Question else option_exam_id(instance)
+    if exam_id:
+        Exam.objects.filter(pk=exam_id).update(updated_at=timezone.now())
+
+
+@receiver(pre_save, sender=ExamProctor)
+def remember_previous_proctor(sender, instance, **kwargs):
+    """Keep the proctor a saved assignment had, so moving it invalidates both proctors"""
+    instance._previous_proctor_id = None if instance._state.adding else (
+        ExamProctor.objects.filter(pk=instance.pk).values_list('proctor_id', flat=True).first())
+
+
+@receiver([post_save, post_delete], sender=ExamProctor)
+def invalidate_proctor_assignments(sender, instance, **kwargs):
+    """Drop the cached assignments once the change is committed, for the same reason as
+    ``invalidate_paper_on_commit``"""
+    previous = getattr(instance, '_previous_proctor_id', None)
+    for proctor_id in {instance.proctor_id, previous} - {None}:
+        transaction.on_commit(partial(ProctorAssignmentService.invalidate, proctor_id))
+
+
+@receiver([post_save, post_delete], sender=ExamAttempt)
+def invalidate_attempt_state(sender, instance, **kwargs):
+    AttemptService.invalidate(instance.pk)
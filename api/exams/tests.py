@@ -1,3 +1,1250 @@
-from django.test import TestCase
+import gzip
+import json
+import os
+import threading
+import time
+import uuid
+from datetime import timedelta
+from unittest import mock, skipUnless
 
-# Create your tests here.
+try:
+    import brotli
+except ImportError:
+    brotli = None
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+import numpy as np
+from asgiref.sync import sync_to_async
+from channels.layers import get_channel_layer
+from channels.testing import WebsocketCommunicator
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.db import DatabaseError, connection
+from django.db.migrations.executor import MigrationExecutor
+from django.core.management import CommandError, call_command
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from api.exams.adaptive import ItemIndex
+from api.exams.cache import CacheStats, PaperSnapshotCache, candidate_paper_cache, exam_paper_cache
+from api.exams.checks import check_caches_are_shared
+from api.exams.consumers import attempt_group
+from api.exams.models import AttemptAnswer, Exam, ExamAttempt, ExamProctor, Question, QuestionDelivery, QuestionOption
+from api.exams.scheduler import AttemptExpiryScheduler
+from api.exams.services import AdaptiveService, AttemptService, CandidatePaperService, ExamService, QuestionService
+from api.exams.shuffle import PaperShuffle
+from api.results.models import ExamResult
+from api.users.models import User
+from config.asgi import application
+
+
+# First and last name of the users ``create_user`` makes, by role
+USER_NAMES = {'admin': ('Ada', 'Admin'), 'proctor': ('Pat', 'Proctor'), 'candidate': ('Cat', 'Candidate')}
+
+
+def create_user(role, username=None, **kwargs):
+    username = username or role
+    first_name, last_name = USER_NAMES[role]
+    fields = {'first_name': first_name, 'last_name': last_name, **kwargs}
+    return User.objects.create(username=username, email=f"{username}@example.com", role=role, **fields)
+
+
+def create_exam(author, questions=2, options=4, **kwargs):
+    exam = Exam.objects.create(
+        title=kwargs.pop('title', 'Exam'),
+        created_by=author,
+        duration_minutes=60,
+        passing_score=50,
+        **kwargs,
+    )
+    for q in range(questions):
+        question = Question.objects.create(
+            exam=exam, question_text=f"Q{q}", question_type='multiple_choice', order_index=q
+        )
+        QuestionOption.objects.bulk_create([
+            QuestionOption(question=question, option_text=f"O{o}", is_correct=o == 0, order_index=o)
+            for o in range(options)
+        ])
+    return exam
+
+
+class ExamReadQueryCountTests(TestCase):
+    def setUp(self):
+        self.admin = create_user('admin')
+        self.proctor = create_user('proctor')
+        self.client = APIClient()
+
+    def count_queries(self, url, user):
+        # Compare cold requests: nothing served from the assignment or paper caches
+        cache.clear()
+        caches[settings.EXAM_PAPER_CACHE].clear()
+        self.client.force_authenticate(user)
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(ctx.captured_queries)
+
+    def grow(self, exams, questions):
+        created = []
+        for i in range(exams):
+            exam = create_exam(self.admin, questions=questions, title=f"Exam {i}")
+            ExamProctor.objects.create(exam=exam, proctor=self.proctor, assigned_by=self.admin)
+            created.append(exam)
+        return created
+
+    def test_exam_list_query_count_is_constant(self):
+        url = reverse('exam-list')
+        self.grow(1, 1)
+        small = self.count_queries(url, self.admin)
+        self.grow(5, 6)
+        self.assertEqual(self.count_queries(url, self.admin), small)
+
+    def test_exam_detail_query_count_is_constant(self):
+        small_exam, = self.grow(1, 1)
+        large_exam, = self.grow(1, 20)
+        small = self.count_queries(reverse('exam-detail', kwargs={'id': small_exam.id}), self.admin)
+        large = self.count_queries(reverse('exam-detail', kwargs={'id': large_exam.id}), self.admin)
+        self.assertEqual(small, large)
+
+    def test_proctor_exam_list_query_count_is_constant(self):
+        url = reverse('proctor-exam-list')
+        self.grow(1, 1)
+        small = self.count_queries(url, self.proctor)
+        self.grow(4, 5)
+        self.assertEqual(self.count_queries(url, self.proctor), small)
+
+    def test_question_list_query_count_is_constant(self):
+        small_exam, = self.grow(1, 1)
+        large_exam, = self.grow(1, 15)
+        small = self.count_queries(reverse('question-list', kwargs={'exam_id': small_exam.id}), self.proctor)
+        large = self.count_queries(reverse('question-list', kwargs={'exam_id': large_exam.id}), self.proctor)
+        self.assertEqual(small, large)
+
+    def test_total_questions_uses_annotation(self):
+        exam, = self.grow(1, 3)
+        self.client.force_authenticate(self.admin)
+        response = self.client.get(reverse('exam-detail', kwargs={'id': exam.id}))
+        data = response.data['data']
+        self.assertEqual(data['total_questions'], 3)
+        self.assertEqual([q['order_index'] for q in data['questions']], [0, 1, 2])
+        self.assertEqual([o['order_index'] for o in data['questions'][0]['options']], [0, 1, 2, 3])
+
+
+class ExamListPaginationTests(TestCase):
+    def setUp(self):
+        self.admin = create_user('admin')
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def test_exam_list_is_summary_only_and_keyset_paginated(self):
+        for i in range(5):
+            create_exam(self.admin, questions=i, title=f"Exam {i}")
+
+        response = self.client.get(reverse('exam-list'), {'page_size': 2})
+        page = response.data['data']
+        self.assertEqual(len(page['results']), 2)
+        self.assertNotIn('questions', page['results'][0])
+        self.assertIsNotNone(page['next'])
+
+        seen = [exam['id'] for exam in page['results']]
+        while page['next']:
+            page = self.client.get(page['next']).data['data']
+            seen.extend(exam['id'] for exam in page['results'])
+
+        expected = Exam.objects.order_by('-created_at', 'id').values_list('id', flat=True)
+        self.assertEqual(seen, [str(exam_id) for exam_id in expected])
+
+    def test_proctor_cursor_is_the_primary_key(self):
+        # Same names throughout: the cursor must not rely on them
+        proctors = [create_user('proctor', f"proctor{i}").pk for i in range(4)]
+        page = self.client.get(reverse('proctor-list'), {'page_size': 1}).data['data']
+        seen = [proctor['id'] for proctor in page['results']]
+        while page['next']:
+            page = self.client.get(page['next']).data['data']
+            seen.extend(proctor['id'] for proctor in page['results'])
+        self.assertEqual(seen, proctors)
+
+
+class ExamListStreamingTests(TestCase):
+    def setUp(self):
+        self.admin = create_user('admin')
+        for i in range(5):
+            create_exam(self.admin, questions=i, title=f"Exam {i}")
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def test_stream_sends_every_item_in_the_envelope(self):
+        with mock.patch('api.core.responses.STREAM_CHUNK_BYTES', 1):
+            response = self.client.get(reverse('exam-list'), {'stream': 'true', 'fields': 'id,total_questions'})
+            self.assertTrue(response.streaming)
+            with self.assertNumQueries(1):
+                chunks = list(response.streaming_content)
+        self.assertGreater(len(chunks), 5)
+        body = json.loads(b''.join(chunks))
+        self.assertEqual(body['status'], 'success')
+        self.assertEqual(body['message'], 'Exams retrieved successfully')
+
+        expected = Exam.objects.order_by('-created_at', 'id').values_list('id', flat=True)
+        self.assertEqual([exam['id'] for exam in body['data']], [str(exam_id) for exam_id in expected])
+        self.assertEqual(set(body['data'][0]), {'id', 'total_questions'})
+
+    def test_stream_of_empty_list(self):
+        response = self.client.get(reverse('exam-proctor-list'), {'stream': '1'})
+        self.assertEqual(json.loads(b''.join(response.streaming_content))['data'], [])
+
+    def test_responses_are_gzipped_when_accepted(self):
+        response = self.client.get(reverse('exam-list'), HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertEqual(len(json.loads(gzip.decompress(response.content))['data']['results']), 5)
+
+        response = self.client.get(reverse('exam-list'), {'stream': 'true'}, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(len(json.loads(gzip.decompress(b''.join(response.streaming_content)))['data']), 5)
+
+    @skipUnless(brotli, "brotli is not installed")
+    def test_brotli_is_preferred_when_accepted(self):
+        response = self.client.get(reverse('exam-list'), {'stream': 'true'}, HTTP_ACCEPT_ENCODING='gzip, br')
+        self.assertEqual(response['Content-Encoding'], 'br')
+        self.assertEqual(len(json.loads(brotli.decompress(b''.join(response.streaming_content)))['data']), 5)
+
+        response = self.client.get(reverse('exam-list'), HTTP_ACCEPT_ENCODING='br')
+        self.assertEqual(response['Content-Encoding'], 'br')
+        self.assertEqual(json.loads(brotli.decompress(response.content))['status'], 'success')
+
+    @skipUnless(brotli, "brotli is not installed")
+    def test_brotli_bodies_are_padded(self):
+        # Same content, random-length padding (BREACH), like gzip's random file name
+        bodies = [self.client.get(reverse('exam-list'), HTTP_ACCEPT_ENCODING='br').content for _ in range(20)]
+        self.assertGreater(len({len(body) for body in bodies}), 1)
+        self.assertEqual(len({brotli.decompress(body) for body in bodies}), 1)
+
+
+class ExamPaperCacheTests(TestCase):
+    def setUp(self):
+        caches[settings.EXAM_PAPER_CACHE].clear()
+        exam_paper_cache.stats = CacheStats()
+        self.admin = create_user('admin')
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def get_paper(self, exam):
+        return self.client.get(reverse('exam-detail', kwargs={'id': exam.id})).data['data']
+
+    def test_published_paper_is_served_from_cache(self):
+        exam = create_exam(self.admin, questions=2, status='published')
+        self.get_paper(exam)
+        with self.assertNumQueries(0):
+            self.client.get(reverse('exam-detail', kwargs={'id': exam.id}))
+        self.assertEqual(exam_paper_cache.stats.as_dict(), {'hits': 1, 'misses': 1})
+
+    def test_draft_paper_is_not_cached(self):
+        exam = create_exam(self.admin, questions=1)
+        self.get_paper(exam)
+        self.get_paper(exam)
+        self.assertEqual(exam_paper_cache.stats.as_dict(), {'hits': 0, 'misses': 2})
+
+    def test_writes_invalidate_the_paper(self):
+        exam = create_exam(self.admin, questions=1, status='published')
+        self.assertEqual(self.get_paper(exam)['total_questions'], 1)
+
+        version = exam_paper_cache.version(exam.id)
+        with self.captureOnCommitCallbacks(execute=True):
+            question = Question.objects.create(
+                exam=exam, question_text="New", question_type='true_false', order_index=5
+            )
+            # Bumped only once committed, so reads until then keep the committed paper
+            self.assertEqual(exam_paper_cache.version(exam.id), version)
+        self.assertEqual(self.get_paper(exam)['total_questions'], 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            QuestionOption.objects.create(question=question, option_text="True", order_index=0)
+        self.assertEqual(len(self.get_paper(exam)['questions'][1]['options']), 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(reverse('exam-update', kwargs={'id': exam.id}), {'title': 'Renamed'})
+        self.assertEqual(self.get_paper(exam)['title'], 'Renamed')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            question.delete()
+        self.assertEqual(self.get_paper(exam)['total_questions'], 1)
+
+
+class PaperCacheCheckTests(SimpleTestCase):
+    def test_process_local_cache_is_reported(self):
+        self.assertEqual([warning.id for warning in check_caches_are_shared(None)], ['exams.W001'] * 2)
+        with mock.patch('api.exams.checks.is_shared_cache', return_value=True):
+            self.assertEqual(check_caches_are_shared(None), [])
+
+
+class ExamPayloadFormatTests(TestCase):
+    def setUp(self):
+        caches[settings.EXAM_PAPER_CACHE].clear()
+        self.admin = create_user('admin')
+        self.exam = create_exam(self.admin, questions=2, status='published')
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def test_sparse_fieldset_on_detail(self):
+        url = reverse('exam-detail', kwargs={'id': self.exam.id})
+        response = self.client.get(url, {'fields': 'id,title,questions.id,questions.options.id'})
+        data = response.json()['data']
+        self.assertEqual(set(data), {'id', 'title', 'questions'})
+        self.assertEqual([set(question) for question in data['questions']], [{'id', 'options'}] * 2)
+        self.assertEqual(set(data['questions'][0]['options'][0]), {'id'})
+        self.assertEqual(response.json()['status'], 'success')
+
+        # The cached paper itself is left whole
+        self.assertIn('description', self.client.get(url).json()['data'])
+
+    def test_sparse_fieldset_on_paginated_list(self):
+        page = self.client.get(reverse('exam-list'), {'fields': 'id'}).json()['data']
+        self.assertEqual(page['results'], [{'id': str(self.exam.id)}])
+        self.assertIn('next', page)
+
+    def test_errors_are_not_filtered(self):
+        response = self.client.get(reverse('exam-detail', kwargs={'id': uuid.uuid4()}), {'fields': 'id'})
+        self.assertEqual(response.status_code, 404)
+        self.assertIn('message', response.json())
+
+    @skipUnless(msgpack, "msgpack is not installed")
+    def test_messagepack_is_negotiated_by_accept(self):
+        url = reverse('exam-detail', kwargs={'id': self.exam.id})
+        response = self.client.get(url, {'fields': 'id,questions.id'}, HTTP_ACCEPT='application/msgpack')
+        self.assertEqual(response['Content-Type'], 'application/msgpack')
+        data = msgpack.unpackb(response.content)['data']
+        self.assertEqual(data['id'], str(self.exam.id))
+        self.assertEqual(len(data['questions']), 2)
+
+
+class ConditionalReadTests(TestCase):
+    def setUp(self):
+        caches[settings.EXAM_PAPER_CACHE].clear()
+        self.admin = create_user('admin')
+        self.proctor = create_user('proctor')
+        self.exam = create_exam(self.admin, questions=2, status='published')
+        self.url = reverse('exam-detail', kwargs={'id': self.exam.id})
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def test_validators_are_one_aggregate_query(self):
+        with self.assertNumQueries(1):
+            etag, last_modified = ExamService.compute_paper_validators(self.exam.id)
+        self.assertEqual(last_modified, QuestionOption.objects.filter(question__exam=self.exam).latest('updated_at').updated_at)
+        self.assertIsNone(ExamService.compute_paper_validators(uuid.uuid4()))
+
+    def test_unchanged_paper_is_not_resent(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+        self.assertTrue(etag.startswith('W/"'))
+        self.assertIn('Last-Modified', response)
+
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+        self.assertEqual(response['ETag'], etag)
+
+        modified = self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(modified.status_code, 304)
+
+    def test_option_edits_and_deletes_change_the_etag(self):
+        etags = [self.client.get(self.url)['ETag']]
+
+        option = QuestionOption.objects.filter(question__exam=self.exam).first()
+        option.option_text = 'Changed'
+        with self.captureOnCommitCallbacks(execute=True):
+            option.save()
+        etags.append(self.client.get(self.url)['ETag'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            option.delete()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etags[-1])
+        self.assertEqual(response.status_code, 200)
+        etags.append(response['ETag'])
+        self.assertEqual(len(set(etags)), 3)
+
+    def test_deletes_move_last_modified_forward(self):
+        url = reverse('question-list', kwargs={'exam_id': self.exam.id})
+
+        def backdated_last_modified():
+            # HTTP dates have whole seconds, so move every timestamp well into the past first
+            an_hour_ago = timezone.now() - timedelta(hours=1)
+            Exam.objects.filter(pk=self.exam.pk).update(updated_at=an_hour_ago)
+            Question.objects.filter(exam=self.exam).update(updated_at=an_hour_ago)
+            QuestionOption.objects.filter(question__exam=self.exam).update(updated_at=an_hour_ago)
+            exam_paper_cache.invalidate(self.exam.id)
+            return self.client.get(url)['Last-Modified']
+
+        last_modified = backdated_last_modified()
+        with self.captureOnCommitCallbacks(execute=True):
+            QuestionOption.objects.filter(question__exam=self.exam).first().delete()
+        self.assertEqual(self.client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified).status_code, 200)
+
+        last_modified = backdated_last_modified()
+        with self.captureOnCommitCallbacks(execute=True):
+            Question.objects.filter(exam=self.exam).first().delete()
+        response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()['data']), 1)
+
+    def test_question_list_etag_only_for_users_who_see_the_questions(self):
+        url = reverse('question-list', kwargs={'exam_id': self.exam.id})
+        self.client.force_authenticate(self.proctor)
+        response = self.client.get(url)
+        self.assertEqual(response.json()['data'], [])
+        self.assertNotIn('ETag', response)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            ExamProctor.objects.create(exam=self.exam, proctor=self.proctor, assigned_by=self.admin)
+        response = self.client.get(url)
+        self.assertEqual(len(response.json()['data']), 2)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+
+
+class QuestionBulkCreateTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.admin = create_user('admin')
+        self.proctor = create_user('proctor')
+        self.exam = create_exam(self.admin, questions=1)
+        ExamProctor.objects.create(exam=self.exam, proctor=self.proctor, assigned_by=self.admin)
+        self.url = reverse('question-bulk-create', kwargs={'exam_id': self.exam.id})
+        self.client = APIClient()
+        self.client.force_authenticate(self.proctor)
+
+    def payload(self, count, start=1):
+        return {'questions': [{
+            'question_text': f"Bulk {i}",
+            'question_type': 'multiple_choice',
+            'order_index': i,
+            'options': [{'option_text': f"O{o}", 'is_correct': o == 0, 'order_index': o} for o in range(4)],
+        } for i in range(start, start + count)]}
+
+    def test_imports_question_tree_in_a_handful_of_queries(self):
+        response = self.client.post(self.url, self.payload(2), format='json')
+        self.assertEqual(response.status_code, 201)
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.post(self.url, self.payload(50, start=10), format='json')
+        # permission check, order_index lookup, savepoints and a few batched INSERTs
+        self.assertLessEqual(len(ctx.captured_queries), 10)
+        self.assertEqual(Question.objects.filter(exam=self.exam).count(), 53)
+        self.assertEqual(QuestionOption.objects.filter(question__exam=self.exam).count(), 4 + 52 * 4)
+
+    def test_reports_per_item_errors_and_writes_nothing(self):
+        payload = self.payload(3)
+        payload['questions'][1]['question_type'] = 'unknown'
+        payload['questions'][2]['order_index'] = 0  # taken by the existing question
+
+        # Validation errors and order_index conflicts come back together
+        response = self.client.post(self.url, payload, format='json')
+        self.assertEqual(response.status_code, 400)
+        errors = response.data['errors']
+        self.assertEqual([(item['index'], list(item['errors'])) for item in errors],
+                         [(1, ['question_type']), (2, ['order_index'])])
+        self.assertEqual(Question.objects.filter(exam=self.exam).count(), 1)
+
+    def test_order_index_taken_during_the_import_is_a_per_item_error(self):
+        payload = self.payload(2)
+        original = QuestionService.bulk_create_tree
+
+        def bulk_create_tree(exam_id, questions):
+            # A concurrent import takes order_index 2 after the check
+            Question.objects.create(exam=self.exam, question_text='Raced', question_type='essay', order_index=2)
+            return original(exam_id, questions)
+
+        with mock.patch('api.exams.views.QuestionService.bulk_create_tree', bulk_create_tree):
+            response = self.client.post(self.url, payload, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual([item['index'] for item in response.data['errors']], [1])
+        self.assertEqual(Question.objects.filter(exam=self.exam).count(), 2)
+
+    def test_requires_assignment(self):
+        other = create_exam(self.admin, questions=0)
+        url = reverse('question-bulk-create', kwargs={'exam_id': other.id})
+        self.assertEqual(self.client.post(url, self.payload(1), format='json').status_code, 403)
+
+
+class QuestionOrderMigrationTests(TransactionTestCase):
+    before = [('exams', '0001_initial')]
+    after = [('exams', '0002_exam_exam_created_at_idx_and_more')]
+
+    def migrate(self, targets):
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate(targets)
+        return executor.loader.project_state(targets).apps
+
+    def tearDown(self):
+        self.migrate(MigrationExecutor(connection).loader.graph.leaf_nodes())
+
+    def test_duplicate_order_indexes_are_renumbered(self):
+        apps = self.migrate(self.before)
+        Exam = apps.get_model('exams', 'Exam')
+        Question = apps.get_model('exams', 'Question')
+        admin = create_user('admin')
+        exam = Exam.objects.create(title='Exam', created_by_id=admin.pk, duration_minutes=60, passing_score=50)
+        for text, order_index in [('a', 0), ('b', 1), ('c', 1), ('d', 2), ('e', 5), ('f', 5)]:
+            Question.objects.create(exam=exam, question_text=text, question_type='essay', order_index=order_index)
+
+        apps = self.migrate(self.after)
+        questions = apps.get_model('exams', 'Question').objects.filter(exam_id=exam.id).order_by('order_index')
+        self.assertEqual([(q.question_text, q.order_index) for q in questions],
+                         [('a', 0), ('b', 1), ('c', 2), ('d', 3), ('e', 5), ('f', 6)])
+
+
+class ExamTransferTests(TestCase):
+    def setUp(self):
+        self.admin = create_user('admin')
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def test_export_then_import_round_trips_the_exam(self):
+        exam = create_exam(self.admin, questions=3, options=2, title='Source', status='published')
+        response = self.client.get(reverse('exam-export', kwargs={'id': exam.id}))
+        self.assertEqual(response.status_code, 200)
+        body = b''.join(response.streaming_content)
+        self.assertEqual(len(body.splitlines()), 1 + 3 + 3 * 2)
+
+        response = self.client.post(reverse('exam-import'), body, content_type='application/x-ndjson')
+        self.assertEqual(response.status_code, 201)
+        copy = Exam.objects.get(id=response.data['data']['id'])
+        self.assertEqual((copy.title, copy.status, copy.created_by), ('Source', 'published', self.admin))
+        self.assertEqual(
+            list(QuestionOption.objects.filter(question__exam=copy)
+                 .order_by('question__order_index', 'order_index')
+                 .values_list('question__order_index', 'option_text', 'is_correct')),
+            list(QuestionOption.objects.filter(question__exam=exam)
+                 .order_by('question__order_index', 'order_index')
+                 .values_list('question__order_index', 'option_text', 'is_correct')),
+        )
+
+    def test_import_rejects_malformed_stream(self):
+        response = self.client.post(reverse('exam-import'), b'{"type": "question", "data": {}}\n',
+                                    content_type='application/x-ndjson')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(Exam.objects.count(), 0)
+
+
+class ProctorAssignmentLookupTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.admin = create_user('admin')
+        self.proctor = create_user('proctor')
+        self.exam = create_exam(self.admin, questions=1)
+        self.assignment = ExamProctor.objects.create(exam=self.exam, proctor=self.proctor, assigned_by=self.admin)
+        self.question = self.exam.question_set.get()
+        self.client = APIClient()
+        self.client.force_authenticate(self.proctor)
+
+    def assignment_queries(self, ctx):
+        return [q for q in ctx.captured_queries if 'exams_examproctor' in q['sql']]
+
+    def test_assignments_are_loaded_at_most_once_per_request(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.post(reverse('question-option-create'), {
+                'question': self.question.id, 'option_text': 'Extra', 'order_index': 9,
+            })
+        self.assertEqual(response.status_code, 201)
+        self.assertLessEqual(len(self.assignment_queries(ctx)), 1)
+
+    def test_assignments_are_cached_across_requests_until_they_change(self):
+        url = reverse('question-list', kwargs={'exam_id': self.exam.id})
+        self.client.get(url)
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertEqual(len(self.client.get(url).data['data']), 1)
+        self.assertEqual(self.assignment_queries(ctx), [])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assignment.delete()
+        self.assertEqual(self.client.get(url).data['data'], [])
+
+    def test_moving_an_assignment_invalidates_both_proctors(self):
+        other = create_user('proctor', 'other')
+        url = reverse('question-list', kwargs={'exam_id': self.exam.id})
+        self.client.get(url)
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            self.assignment.proctor = other
+            self.assignment.save()
+            # Nothing is dropped before the commit: a concurrent request could cache the old rows again
+            self.assertEqual(len(self.client.get(url).data['data']), 1)
+        self.assertEqual(len(callbacks), 2)
+        self.assertEqual(self.client.get(url).data['data'], [])
+
+        self.client.force_authenticate(other)
+        self.assertEqual(len(self.client.get(url).data['data']), 1)
+
+
+class HotQueryPlanTests(TestCase):
+    """Every SELECT behind the hot read endpoints must use an index for both lookup and ordering"""
+
+    def setUp(self):
+        cache.clear()
+        caches[settings.EXAM_PAPER_CACHE].clear()
+        self.admin = create_user('admin')
+        self.proctor = create_user('proctor')
+        self.exam = create_exam(self.admin, questions=3)
+        other = create_exam(self.admin, questions=2)
+        for exam in (self.exam, other):
+            ExamProctor.objects.create(exam=exam, proctor=self.proctor, assigned_by=self.admin)
+        self.client = APIClient()
+
+    def query_plans(self, url, user):
+        self.client.force_authenticate(user)
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertEqual(self.client.get(url).status_code, 200)
+        plans = {}
+        with connection.cursor() as cursor:
+            for query in ctx.captured_queries:
+                if not query['sql'].startswith('SELECT'):
+                    continue
+                cursor.execute('EXPLAIN QUERY PLAN ' + query['sql'])
+                plans[query['sql']] = [row[-1] for row in cursor.fetchall()]
+        return plans
+
+    def assertIndexedPlans(self, url, user, sorts_primary_key_lookups=False):
+        plans = self.query_plans(url, user)
+        self.assertTrue(plans)
+        for sql, steps in plans.items():
+            keyed = any(step.startswith('SEARCH') and '(id=?)' in step for step in steps)
+            for step in steps:
+                full_scan = step.startswith('SCAN') and 'USING' not in step
+                self.assertFalse(full_scan, f"Full scan ({step}) in: {sql}")
+                if not (sorts_primary_key_lookups and keyed):
+                    self.assertNotIn('TEMP B-TREE', step, f"Sort without index in: {sql}")
+
+    @skipUnless(connection.vendor == 'sqlite', "Query plans are checked on SQLite")
+    def test_hot_endpoints_use_indexes(self):
+        self.assertIndexedPlans(reverse('exam-list'), self.admin)
+        self.assertIndexedPlans(reverse('exam-detail', kwargs={'id': self.exam.id}), self.admin)
+        self.assertIndexedPlans(reverse('exam-proctor-list'), self.admin)
+        self.assertIndexedPlans(reverse('proctor-list'), self.admin)
+        # A proctor's exams are fetched by primary key, so only their own few rows get sorted
+        self.assertIndexedPlans(reverse('proctor-exam-list'), self.proctor, sorts_primary_key_lookups=True)
+        self.assertIndexedPlans(reverse('question-list', kwargs={'exam_id': self.exam.id}), self.proctor)
+
+
+class AsyncReadViewTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        caches[settings.EXAM_PAPER_CACHE].clear()
+        self.admin = create_user('admin')
+        self.proctor = create_user('proctor')
+        self.exam = create_exam(self.admin, questions=3, status='published')
+        ExamProctor.objects.create(exam=self.exam, proctor=self.proctor, assigned_by=self.admin)
+        self.candidate = create_user('candidate')
+        self.tokens = {user.pk: str(RefreshToken.for_user(user).access_token)
+                       for user in (self.admin, self.proctor, self.candidate)}
+
+    def auth(self, user):
+        return {'Authorization': f"Bearer {self.tokens[user.pk]}"}
+
+    async def test_async_views_match_sync_views(self):
+        sync_client = APIClient()
+        for user, name, kwargs in [
+            (self.admin, 'exam-detail', {'id': self.exam.id}),
+            (self.proctor, 'question-list', {'exam_id': self.exam.id}),
+        ]:
+            response = await self.async_client.get(reverse(f"{name}-async", kwargs=kwargs), headers=self.auth(user))
+            self.assertEqual(response.status_code, 200)
+            sync_client.force_authenticate(user)
+            expected = await sync_to_async(sync_client.get)(reverse(name, kwargs=kwargs))
+            self.assertEqual(response.json(), json.loads(expected.content))
+
+    async def test_proctor_assigned_exams(self):
+        response = await self.async_client.get(reverse('proctor-exam-list-async'), headers=self.auth(self.proctor))
+        self.assertEqual([exam['id'] for exam in response.json()['data']['results']], [str(self.exam.id)])
+
+        # Same pagination as the sync view: bad page sizes fall back to the default
+        sync_client = APIClient()
+        sync_client.force_authenticate(self.proctor)
+        for page_size in ('-1', '0', 'x', '1'):
+            params = {'page_size': page_size}
+            response = await self.async_client.get(reverse('proctor-exam-list-async'), params,
+                                                   headers=self.auth(self.proctor))
+            self.assertEqual(response.status_code, 200)
+            expected = await sync_to_async(sync_client.get)(reverse('proctor-exam-list'), params)
+            self.assertEqual(response.json(), json.loads(expected.content))
+
+        response = await self.async_client.get(reverse('proctor-exam-list-async'), headers=self.auth(self.admin))
+        self.assertEqual(response.status_code, 403)
+
+    async def test_answer_key_is_admin_only(self):
+        sync_client = APIClient()
+        for user in (self.proctor, self.candidate):
+            response = await self.async_client.get(reverse('exam-detail-async', kwargs={'id': self.exam.id}),
+                                                   headers=self.auth(user))
+            self.assertEqual(response.status_code, 403)
+            sync_client.force_authenticate(user)
+            response = await sync_to_async(sync_client.get)(reverse('exam-detail', kwargs={'id': self.exam.id}))
+            self.assertEqual(response.status_code, 403)
+            self.assertNotIn(b'is_correct', response.content)
+
+    async def test_requires_token(self):
+        response = await self.async_client.get(reverse('exam-detail-async', kwargs={'id': self.exam.id}))
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response.json()['status'], 'error')
+
+
+class ExamAttemptTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        caches[settings.EXAM_PAPER_CACHE].clear()
+        self.admin = create_user('admin')
+        self.candidate = create_user('candidate')
+        self.exam = create_exam(self.admin, questions=3, status='published', max_attempts=2)
+        self.questions = list(Question.objects.filter(exam=self.exam).with_options())
+        self.client = APIClient()
+        self.client.force_authenticate(self.candidate)
+
+    def start(self):
+        response = self.client.post(reverse('attempt-start', kwargs={'exam_id': self.exam.id}))
+        self.assertIn(response.status_code, (200, 201))
+        return response.json()['data']
+
+    def answer(self, question, option_index=0):
+        return {'question': str(question.id),
+                'selected_options': [str(question.questionoption_set.all()[option_index].id)]}
+
+    def autosave(self, attempt_id, answers):
+        return self.client.put(reverse('attempt-answers', kwargs={'attempt_id': attempt_id}),
+                               {'answers': answers}, format='json')
+
+    def test_start_resumes_and_limits_attempts(self):
+        attempt = self.start()
+        self.assertEqual(attempt['attempt_number'], 1)
+        self.assertGreater(attempt['time_remaining_seconds'], 59 * 60)
+        self.assertEqual(self.start()['id'], attempt['id'])
+
+        ExamAttempt.objects.filter(id=attempt['id']).update(status='submitted')
+        self.assertEqual(self.start()['attempt_number'], 2)
+        ExamAttempt.objects.filter(exam=self.exam).update(status='submitted')
+        response = self.client.post(reverse('attempt-start', kwargs={'exam_id': self.exam.id}))
+        self.assertEqual(response.status_code, 403)
+
+    def test_start_is_capped_by_exam_window(self):
+        self.exam.end_time = timezone.now() + timedelta(minutes=10)
+        self.exam.save()
+        attempt = self.start()
+        self.assertLessEqual(attempt['time_remaining_seconds'], 10 * 60)
+
+        draft = create_exam(self.admin, questions=1)
+        response = self.client.post(reverse('attempt-start', kwargs={'exam_id': draft.id}))
+        self.assertEqual(response.status_code, 400)
+
+    def test_autosave_is_an_idempotent_upsert(self):
+        attempt = self.start()
+        first, second = self.questions[:2]
+        response = self.autosave(attempt['id'], [self.answer(first, 1), self.answer(second)])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['data']['saved'], 2)
+        first_saved_at = AttemptAnswer.objects.get(attempt_id=attempt['id'], question=first).first_saved_at
+
+        # Warm path: attempt state and question limits are cached, the locked status check and
+        # the upsert are the only queries
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.autosave(attempt['id'], [self.answer(first), self.answer(first, 2)])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len([q for q in ctx.captured_queries if 'SAVEPOINT' not in q['sql']]), 2)
+
+        answers = AttemptAnswer.objects.filter(attempt_id=attempt['id'])
+        self.assertEqual(answers.count(), 2)
+        answer = answers.get(question=first)
+        self.assertEqual(answer.selected_options, [str(first.questionoption_set.all()[2].id)])
+        self.assertEqual(answer.first_saved_at, first_saved_at)
+
+    def test_autosave_rejects_foreign_and_expired_questions(self):
+        attempt = self.start()
+        timed = self.questions[0]
+        Question.objects.filter(id=timed.id).update(time_limit_seconds=30)
+        exam_paper_cache.invalidate(self.exam.id)
+        other = create_exam(self.admin, questions=1).question_set.get()
+
+        # The limit runs from delivery: before the paper is fetched the timed question can't be answered
+        rejected = self.autosave(attempt['id'], [self.answer(timed)]).json()['data']['rejected']
+        self.assertEqual(rejected[0]['errors']['question'], ["This question has not been delivered to this attempt."])
+        self.client.get(reverse('attempt-paper', kwargs={'attempt_id': attempt['id']}))
+        self.assertEqual(self.autosave(attempt['id'], [self.answer(timed)]).json()['data']['saved'], 1)
+
+        # Fetching the paper again doesn't restart the clock
+        QuestionDelivery.objects.filter(question=timed).update(delivered_at=timezone.now() - timedelta(minutes=1))
+        self.client.get(reverse('attempt-paper', kwargs={'attempt_id': attempt['id']}))
+        response = self.autosave(attempt['id'], [self.answer(other), self.answer(timed, 1), self.answer(self.questions[1])])
+        data = response.json()['data']
+        self.assertEqual(data['saved'], 1)
+        self.assertEqual([item['index'] for item in data['rejected']], [0, 1])
+        self.assertEqual(QuestionDelivery.objects.filter(attempt_id=attempt['id']).count(), 1)
+
+    def test_autosave_after_deadline_or_by_another_candidate(self):
+        attempt = self.start()
+        ExamAttempt.objects.filter(id=attempt['id']).update(deadline=timezone.now() - timedelta(seconds=1))
+        AttemptService.invalidate(attempt['id'])
+        self.assertEqual(self.autosave(attempt['id'], [self.answer(self.questions[0])]).status_code, 403)
+
+        intruder = create_user('candidate', 'other')
+        self.client.force_authenticate(intruder)
+        self.assertEqual(self.autosave(attempt['id'], [self.answer(self.questions[0])]).status_code, 404)
+
+    def test_submit_grades_and_closes_the_attempt(self):
+        attempt = self.start()
+        self.autosave(attempt['id'], [self.answer(self.questions[0]), self.answer(self.questions[1], 1)])
+        url = reverse('attempt-submit', kwargs={'attempt_id': attempt['id']})
+        response = self.client.post(url)
+        self.assertEqual(response.status_code, 200)
+        data = response.json()['data']
+        self.assertEqual(data['status'], 'submitted')
+        self.assertEqual(data['result']['score'], '1.00')
+        self.assertEqual(data['result']['max_score'], '3.00')
+
+        self.assertEqual(self.client.post(url).status_code, 409)
+        self.assertEqual(self.autosave(attempt['id'], [self.answer(self.questions[2])]).status_code, 409)
+
+    def test_autosave_checks_the_row_behind_a_stale_state(self):
+        attempt = self.start()
+        self.autosave(attempt['id'], [self.answer(self.questions[0])])
+        # Submitted by another process: this one still has the attempt cached as in progress
+        ExamAttempt.objects.filter(id=attempt['id']).update(status='submitted', submitted_at=timezone.now())
+        self.assertEqual(AttemptService.state(attempt['id'])['status'], 'in_progress')
+
+        response = self.autosave(attempt['id'], [self.answer(self.questions[0], 1)])
+        self.assertEqual(response.status_code, 409)
+        answer = AttemptAnswer.objects.get(attempt_id=attempt['id'], question=self.questions[0])
+        self.assertEqual(answer.selected_options, [str(self.questions[0].questionoption_set.all()[0].id)])
+        self.assertEqual(AttemptService.state(attempt['id'])['status'], 'submitted')
+
+
+class FakeClock:
+    """Deterministic clock for the expiry scheduler: sleeping only moves time forward"""
+
+    def __init__(self, now, until=None, scheduler=None):
+        self.current = now
+        self.until = until
+        self.scheduler = scheduler
+        self.sleeps = []
+
+    def now(self):
+        return self.current
+
+    def advance(self, seconds):
+        self.current += timedelta(seconds=seconds)
+
+    async def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.advance(seconds)
+        if self.until and self.current >= self.until:
+            self.scheduler.stop()
+
+
+@override_settings(CHANNEL_LAYERS={'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}})
+class AttemptExpirySchedulerTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.admin = create_user('admin')
+        self.candidates = [create_user('candidate', f"candidate{i}", last_name=str(i)) for i in range(2)]
+        self.exam = create_exam(self.admin, questions=2, status='published')
+        self.start = timezone.now().replace(microsecond=0)
+
+    def attempt(self, candidate, seconds):
+        return ExamAttempt.objects.create(exam=self.exam, candidate=candidate, attempt_number=1,
+                                          started_at=self.start, deadline=self.start + timedelta(seconds=seconds))
+
+    def scheduler(self, clock):
+        return AttemptExpiryScheduler(clock=clock, batch_size=10, refresh_interval=5, push_interval=30,
+                                      channel_layer=get_channel_layer())
+
+    async def test_expires_only_due_attempts_and_notifies_clients(self):
+        soon = await sync_to_async(self.attempt)(self.candidates[0], 10)
+        later = await sync_to_async(self.attempt)(self.candidates[1], 60)
+        option = await QuestionOption.objects.filter(question__exam=self.exam, is_correct=True).afirst()
+        await AttemptAnswer.objects.acreate(attempt=soon, question_id=option.question_id,
+                                            selected_options=[str(option.id)], first_saved_at=self.start,
+                                            saved_at=self.start)
+        layer = get_channel_layer()
+        channel = await layer.new_channel()
+        await layer.group_add(attempt_group(soon.id), channel)
+
+        clock = FakeClock(self.start)
+        scheduler = self.scheduler(clock)
+        self.assertEqual(await scheduler.step(), 5)
+        pushed = await layer.receive(channel)
+        self.assertEqual((pushed['type'], pushed['time_remaining_seconds']), ('attempt.time', 10))
+
+        clock.advance(10)
+        await scheduler.step()
+        self.assertEqual((await layer.receive(channel))['type'], 'attempt.expired')
+        soon = await ExamAttempt.objects.aget(id=soon.id)
+        self.assertEqual((soon.status, soon.submitted_at), ('expired', self.start + timedelta(seconds=10)))
+        self.assertEqual((await ExamAttempt.objects.aget(id=later.id)).status, 'in_progress')
+        result = await ExamResult.objects.aget(exam=self.exam, candidate=self.candidates[0])
+        self.assertEqual(result.correct_count, 1)
+
+    async def test_run_sleeps_until_the_next_deadline(self):
+        await sync_to_async(self.attempt)(self.candidates[0], 12)
+        clock = FakeClock(self.start, until=self.start + timedelta(seconds=20))
+        scheduler = self.scheduler(clock)
+        clock.scheduler = scheduler
+
+        original_refresh = scheduler.refresh
+
+        def refresh(now):
+            original_refresh(now)
+            # Another process starts an attempt at t=10; the refresh at t=15 picks it up
+            if now == self.start + timedelta(seconds=10):
+                ExamAttempt.objects.create(exam=self.exam, candidate=self.candidates[1], attempt_number=1,
+                                           started_at=now, deadline=self.start + timedelta(seconds=16))
+
+        scheduler.refresh = refresh
+        await scheduler.run()
+
+        self.assertEqual(clock.sleeps, [5, 5, 2, 3, 1, 4])
+        submitted = [attempt.submitted_at - self.start async for attempt in
+                     ExamAttempt.objects.filter(status='expired').order_by('submitted_at')]
+        self.assertEqual(submitted, [timedelta(seconds=12), timedelta(seconds=16)])
+
+    async def test_failed_steps_are_logged_and_retried(self):
+        await sync_to_async(self.attempt)(self.candidates[0], 12)
+        clock = FakeClock(self.start, until=self.start + timedelta(seconds=20))
+        scheduler = self.scheduler(clock)
+        clock.scheduler = scheduler
+
+        def fail_once(original):
+            calls = []
+
+            def call(*args):
+                calls.append(args)
+                if len(calls) == 1:
+                    raise DatabaseError("database is down")
+                return original(*args)
+            return call
+
+        # The first refresh fails and is retried at t=5; the expiry due at t=12 fails and is retried at t=17
+        scheduler.refresh = fail_once(scheduler.refresh)
+        with mock.patch('api.exams.scheduler.AttemptService.expire', fail_once(AttemptService.expire)), \
+                self.assertLogs('api.exams.scheduler', 'ERROR') as logs:
+            await scheduler.run()
+
+        self.assertEqual(len(logs.records), 2)
+        self.assertEqual(clock.sleeps, [5, 5, 2, 3, 2, 3])
+        attempt = await ExamAttempt.objects.aget(candidate=self.candidates[0])
+        self.assertEqual((attempt.status, attempt.submitted_at), ('expired', self.start + timedelta(seconds=17)))
+
+    async def test_refreshes_follow_submissions_exam_edits_and_deliveries(self):
+        submitted = await sync_to_async(self.attempt)(self.candidates[0], 60)
+        moved = await sync_to_async(self.attempt)(self.candidates[1], 60)
+        layer = get_channel_layer()
+        channel = await layer.new_channel()
+        await layer.group_add(attempt_group(moved.id), channel)
+        clock = FakeClock(self.start)
+        scheduler = self.scheduler(clock)
+        await scheduler.step()
+        await layer.receive(channel)
+
+        # Submitted elsewhere: no more pushes for it
+        await ExamAttempt.objects.filter(id=submitted.id).aupdate(status='submitted', submitted_at=self.start)
+        # The exam now ends at t=20, and a 5s question was delivered at t=2
+        question = await Question.objects.filter(exam=self.exam).afirst()
+        await Question.objects.filter(id=question.id).aupdate(time_limit_seconds=5)
+        await QuestionDelivery.objects.acreate(attempt=moved, question=question,
+                                               delivered_at=self.start + timedelta(seconds=2))
+        self.exam.end_time = self.start + timedelta(seconds=20)
+
+        def edit_exam():
+            with self.captureOnCommitCallbacks(execute=True):
+                self.exam.save()
+
+        await sync_to_async(edit_exam)()
+
+        clock.advance(5)
+        self.assertEqual(await scheduler.step(), 2)
+        self.assertEqual(scheduler.deadlines, {moved.id: self.start + timedelta(seconds=20)})
+
+        clock.advance(2)
+        await scheduler.step()
+        self.assertEqual(await layer.receive(channel), {'type': 'attempt.question_expired', 'question': str(question.id)})
+
+        clock.advance(13)
+        await scheduler.step()
+        self.assertEqual((await layer.receive(channel))['type'], 'attempt.expired')
+        self.assertEqual((await ExamAttempt.objects.aget(id=moved.id)).status, 'expired')
+
+    async def test_zero_intervals_are_honoured(self):
+        await sync_to_async(self.attempt)(self.candidates[0], 12)
+        scheduler = AttemptExpiryScheduler(clock=FakeClock(self.start), refresh_interval=0, push_interval=0,
+                                           channel_layer=get_channel_layer())
+        # No periodic refresh or push to wake up for: sleep until the deadline
+        self.assertEqual(await scheduler.step(), 12)
+        self.assertEqual(scheduler.refresh_interval, timedelta(0))
+
+
+@override_settings(CHANNEL_LAYERS={'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}})
+class AttemptTimerConsumerTests(TransactionTestCase):
+    def setUp(self):
+        self.admin = create_user('admin')
+        self.candidate = create_user('candidate')
+        exam = create_exam(self.admin, questions=1, status='published')
+        now = timezone.now()
+        self.attempt = ExamAttempt.objects.create(exam=exam, candidate=self.candidate, attempt_number=1,
+                                                  started_at=now, deadline=now + timedelta(minutes=30))
+        self.token = str(RefreshToken.for_user(self.candidate).access_token)
+
+    async def test_pushes_time_and_expiry(self):
+        communicator = WebsocketCommunicator(
+            application, f"/ws/exams/attempts/{self.attempt.id}/timer/?token={self.token}",
+            headers=[(b'origin', b'http://testserver'), (b'host', b'testserver')],
+        )
+        self.assertTrue((await communicator.connect())[0])
+        first = await communicator.receive_json_from()
+        self.assertEqual(first['type'], 'time')
+        self.assertGreater(first['time_remaining_seconds'], 29 * 60)
+
+        await get_channel_layer().group_send(attempt_group(self.attempt.id), {'type': 'attempt.expired'})
+        self.assertEqual(await communicator.receive_json_from(), {'type': 'expired'})
+        await communicator.disconnect()
+
+
+class CandidatePaperSnapshotTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        caches[settings.EXAM_PAPER_CACHE].clear()
+        self.admin = create_user('admin')
+        self.candidate = create_user('candidate')
+        self.exam = create_exam(self.admin, questions=3, status='published')
+        self.client = APIClient()
+        self.client.force_authenticate(self.candidate)
+
+    def test_paper_hides_the_answer_key_and_is_served_without_queries(self):
+        attempt, _ = AttemptService.start(self.exam.id, self.candidate)
+        url = reverse('attempt-paper', kwargs={'attempt_id': attempt.id})
+        self.client.get(url)
+
+        with self.assertNumQueries(0):
+            response = self.client.get(url)
+        paper = response.json()['data']
+        self.assertEqual(len(paper['questions']), 3)
+        option = paper['questions'][0]['options'][0]
+        self.assertNotIn('is_correct', option)
+        self.assertNotIn('explanation', option)
+
+    def test_edits_replace_the_snapshot(self):
+        first = CandidatePaperService.paper(self.exam.id)
+        with self.captureOnCommitCallbacks(execute=True):
+            Question.objects.filter(exam=self.exam, order_index=0).get().delete()
+        self.assertEqual(len(first['questions']), 3)
+        self.assertEqual(len(CandidatePaperService.paper(self.exam.id)['questions']), 2)
+
+    def test_drafts_are_not_served(self):
+        draft = create_exam(self.admin, questions=1)
+        self.assertIsNone(CandidatePaperService.paper(draft.id))
+
+    def test_concurrent_misses_build_once(self):
+        snapshots = PaperSnapshotCache('single-flight-test')
+        builds = []
+
+        def build():
+            builds.append(1)
+            time.sleep(0.1)
+            return {'questions': []}
+
+        threads = [threading.Thread(target=snapshots.get_or_build, args=(self.exam.id, build)) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(builds), 1)
+        self.assertEqual(snapshots.stats.as_dict(), {'hits': 7, 'misses': 1})
+
+    def test_prewarm_builds_exams_about_to_open(self):
+        now = timezone.now()
+        Exam.objects.filter(id=self.exam.id).update(start_time=now + timedelta(minutes=5))
+        later = create_exam(self.admin, questions=1, status='published', start_time=now + timedelta(hours=2))
+        # Refused on the per-process cache tests run with: the warmed papers would die with the command
+        with self.assertRaisesMessage(CommandError, "local to each process"):
+            call_command('prewarm_exam_papers', minutes=10, stdout=open(os.devnull, 'w'))
+        with mock.patch('api.exams.management.commands.prewarm_exam_papers.is_shared_cache', return_value=True):
+            call_command('prewarm_exam_papers', minutes=10, stdout=open(os.devnull, 'w'))
+
+        misses = candidate_paper_cache.stats.misses
+        CandidatePaperService.paper(self.exam.id)
+        self.assertEqual(candidate_paper_cache.stats.misses, misses)
+        CandidatePaperService.paper(later.id)
+        self.assertEqual(candidate_paper_cache.stats.misses, misses + 1)
+
+
+class PaperShuffleTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        caches[settings.EXAM_PAPER_CACHE].clear()
+        self.admin = create_user('admin')
+        self.candidates = [create_user('candidate', f"candidate{i}", last_name=str(i)) for i in range(2)]
+        self.exam = create_exam(self.admin, questions=20, options=5, status='published')
+
+    def paper(self, candidate):
+        attempt, _ = AttemptService.start(self.exam.id, candidate)
+        return attempt, AttemptService.paper(attempt.id, candidate)
+
+    @staticmethod
+    def order(paper):
+        return [question['id'] for question in paper['questions']]
+
+    def test_order_is_per_attempt_and_stable(self):
+        attempt, first = self.paper(self.candidates[0])
+        _, again = self.paper(self.candidates[0])
+        _, other = self.paper(self.candidates[1])
+        base = CandidatePaperService.paper(self.exam.id)
+
+        self.assertEqual(first, again)
+        self.assertNotEqual(self.order(first), self.order(other))
+        self.assertNotEqual(self.order(first), self.order(base))
+        self.assertEqual(sorted(self.order(first)), sorted(self.order(base)))
+        # The shared snapshot is never reordered in place
+        self.assertEqual([q['order_index'] for q in base['questions']], list(range(20)))
+
+        question = first['questions'][0]
+        base_question = next(q for q in base['questions'] if q['id'] == question['id'])
+        self.assertEqual(sorted(o['id'] for o in question['options']),
+                         sorted(o['id'] for o in base_question['options']))
+
+    def test_permutation_maps_displayed_to_base_positions(self):
+        attempt, shuffled = self.paper(self.candidates[0])
+        base = CandidatePaperService.paper(self.exam.id)
+        permutation = PaperShuffle(self.exam.id, attempt.id).question_permutation(base)
+        self.assertEqual(self.order(shuffled), [base['questions'][i]['id'] for i in permutation])
+
+    def test_digests_past_the_last_whole_cycle_are_redrawn(self):
+        shuffle = PaperShuffle(self.exam.id, 'attempt')
+        # 2**64 % 3! == 4: the four largest digests would favour the first orders
+        digests = iter([PaperShuffle.DIGEST_RANGE - 1, PaperShuffle.DIGEST_RANGE - 4, 5])
+        with mock.patch.object(PaperShuffle, 'digest', side_effect=lambda key: next(digests)) as digest:
+            order = shuffle.permutation(3)
+        self.assertEqual([call.args[0] for call in digest.call_args_list],
+                         [f"{shuffle.seed}:", f"{shuffle.seed}::1", f"{shuffle.seed}::2"])
+        # 5 -> swap(2, 5 % 3 = 2), then swap(1, 1 % 2 = 1): the identity
+        self.assertEqual(order, [0, 1, 2])
+
+    def test_timed_exams_keep_the_base_order(self):
+        Exam.objects.filter(id=self.exam.id).update(exam_type='timed')
+        exam_paper_cache.invalidate(self.exam.id)
+        _, paper = self.paper(self.candidates[0])
+        self.assertEqual([q['order_index'] for q in paper['questions']], list(range(20)))
+
+
+class AdaptiveExamTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        caches[settings.EXAM_PAPER_CACHE].clear()
+        self.admin = create_user('admin')
+        self.candidate = create_user('candidate')
+        self.exam = create_exam(self.admin, questions=9, status='published', exam_type='adaptive',
+                                settings={'adaptive': {'max_items': 4, 'min_standard_error': 0.01}})
+        # Difficulties -2 .. 2 in steps of 0.5, in paper order
+        for question in Question.objects.filter(exam=self.exam):
+            question.metadata = {'irt': {'a': 1.5, 'b': (question.order_index - 4) / 2}}
+            question.save()
+        self.attempt, _ = AttemptService.start(self.exam.id, self.candidate)
+        self.client = APIClient()
+        self.client.force_authenticate(self.candidate)
+        self.url = reverse('attempt-next-item', kwargs={'attempt_id': self.attempt.id})
+
+    def step(self, answer=None):
+        response = self.client.post(self.url, {'answer': answer} if answer else {}, format='json')
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json()['data']
+
+    @staticmethod
+    def answer(question, correct):
+        option = next(o for o in question['options'] if (o['order_index'] == 0) == correct)
+        return {'question': question['id'], 'selected_options': [option['id']]}
+
+    def difficulty(self, question):
+        return Question.objects.get(id=question['id']).metadata['irt']['b']
+
+    def test_paper_and_autosave_are_refused(self):
+        question = self.step()['question']
+        response = self.client.get(reverse('attempt-paper', kwargs={'attempt_id': self.attempt.id}))
+        self.assertEqual(response.status_code, 400)
+        response = self.client.put(reverse('attempt-answers', kwargs={'attempt_id': self.attempt.id}),
+                                   {'answers': [self.answer(question, True)]}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(AttemptAnswer.objects.filter(attempt=self.attempt).exists())
+        self.assertEqual(self.step(self.answer(question, True))['items_answered'], 1)
+
+    def test_item_index_selects_the_most_informative_item(self):
+        index = ItemIndex.for_exam(self.exam.id)
+        self.assertEqual(len(index), 9)
+        administered = np.zeros((2, 9), dtype=bool)
+        administered[1, 4] = True
+        items = index.select(np.array([0.0, 0.0]), administered)
+        self.assertEqual(self.difficulty({'id': index.question_ids[items[0]]}), 0)
+        self.assertIn(self.difficulty({'id': index.question_ids[items[1]]}), (-0.5, 0.5))
+
+    def test_correct_answers_raise_the_difficulty(self):
+        first = self.step()
+        self.assertEqual(self.difficulty(first['question']), 0)
+        self.assertEqual(self.step()['question']['id'], first['question']['id'])
+        AttemptService.question_limits(self.exam.id)
+
+        # Warm path: the only queries per step are the locked status check and the answer's upsert
+        with CaptureQueriesContext(connection) as ctx:
+            second = self.step(self.answer(first['question'], correct=True))
+        self.assertEqual(len([q for q in ctx.captured_queries if 'SAVEPOINT' not in q['sql']]), 2)
+        self.assertGreater(self.difficulty(second['question']), 0)
+
+        third = self.step(self.answer(second['question'], correct=False))
+        self.assertLess(self.difficulty(third['question']), self.difficulty(second['question']))
+        self.assertFalse(third['finished'])
+        self.assertNotIn('is_correct', third['question']['options'][0])
+
+    def test_finishes_after_max_items_and_survives_a_lost_cache(self):
+        question = self.step()['question']
+        for _ in range(3):
+            cache.delete(AdaptiveService.progress_key(self.attempt.id))
+            question = self.step(self.answer(question, correct=True))['question']
+        final = self.step(self.answer(question, correct=True))
+        self.assertTrue(final['finished'])
+        self.assertEqual(final['items_answered'], 4)
+        self.assertGreater(final['ability'], 1)
+
+    def test_concurrent_steps_of_one_attempt_are_refused(self):
+        question = self.step()['question']
+        cache.add(f"lock:{AdaptiveService.progress_key(self.attempt.id)}", 1)
+        response = self.client.post(self.url, {'answer': self.answer(question, True)}, format='json')
+        self.assertEqual(response.status_code, 409)
+        self.assertFalse(AttemptAnswer.objects.filter(attempt=self.attempt).exists())
+
+    def test_progress_follows_edits_to_the_exam(self):
+        first = self.step()['question']
+        second = self.step(self.answer(first, correct=True))['question']
+        with self.captureOnCommitCallbacks(execute=True):
+            Question.objects.exclude(id__in=[first['id'], second['id']]).filter(exam=self.exam).first().delete()
+        # The positions kept for the old index are replayed against the new one
+        self.assertEqual(self.step()['question']['id'], second['id'])
+        self.assertEqual(self.step(self.answer(second, correct=True))['items_answered'], 2)
+
+    def test_item_missing_from_the_paper_is_a_conflict(self):
+        question = self.step()['question']
+        paper = CandidatePaperService.paper(self.exam.id)
+        stale = dict(paper, questions=[item for item in paper['questions'] if item['id'] != question['id']])
+        with mock.patch('api.exams.services.CandidatePaperService.paper', return_value=stale):
+            response = self.client.post(self.url, {}, format='json')
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(self.step()['question']['id'], question['id'])
+
+    def test_rejects_answers_to_other_items_and_non_adaptive_exams(self):
+        first = self.step()
+        other = Question.objects.filter(exam=self.exam).exclude(id=first['question']['id']).first()
+        response = self.client.post(self.url, {'answer': {'question': str(other.id), 'selected_options': []}},
+                                    format='json')
+        self.assertEqual(response.status_code, 400)
+
+        standard = create_exam(self.admin, questions=1, status='published', title='Standard')
+        attempt, _ = AttemptService.start(standard.id, self.candidate)
+        response = self.client.post(reverse('attempt-next-item', kwargs={'attempt_id': attempt.id}), {},
+                                    format='json')
+        self.assertEqual(response.status_code, 400)
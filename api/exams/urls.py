@@ -1,12 +1,18 @@
 # urls.py
 
 from django.urls import path
+from .async_views import AsyncExamDetailView, AsyncQuestionListView, AsyncProctorExamListView
 from .views import (
     # Admin views
-    ExamListAPIView, ExamDetailAPIView, ExamCreateAPIView, ExamUpdateAPIView,
+    ExamListAPIView, ExamDetailAPIView, ExamCreateAPIView, ExamUpdateAPIView, ExamPaperCacheStatsAPIView,
+    ExamExportAPIView, ExamImportAPIView,
     ExamProctorListAPIView, AssignProctorAPIView, ProctorListAPIView,
     # Proctor views
-    ProctorExamListAPIView, QuestionCreateAPIView, QuestionListAPIView, QuestionOptionCreateAPIView
+    ProctorExamListAPIView, QuestionCreateAPIView, QuestionBulkCreateAPIView, QuestionListAPIView,
+    QuestionOptionCreateAPIView,
+    # Candidate views
+    ExamAttemptStartAPIView, AttemptPaperAPIView, AttemptAnswerAutosaveAPIView, AdaptiveNextItemAPIView,
+    AttemptSubmitAPIView
 )
 
 urlpatterns = [
@@ -15,6 +21,9 @@ urlpatterns = [
     path('<uuid:id>/', ExamDetailAPIView.as_view(), name='exam-detail'),
     path('create/', ExamCreateAPIView.as_view(), name='exam-create'),
     path('<uuid:id>/update/', ExamUpdateAPIView.as_view(), name='exam-update'),
+    path('<uuid:id>/export/', ExamExportAPIView.as_view(), name='exam-export'),
+    path('import/', ExamImportAPIView.as_view(), name='exam-import'),
+    path('cache/stats/', ExamPaperCacheStatsAPIView.as_view(), name='exam-cache-stats'),
     
     # Admin - Proctor Management
     path('proctors/', ProctorListAPIView.as_view(), name='proctor-list'),
@@ -27,5 +36,18 @@ urlpatterns = [
     # Proctor - Question Management
     path('questions/create/', QuestionCreateAPIView.as_view(), name='question-create'),
     path('<uuid:exam_id>/questions/', QuestionListAPIView.as_view(), name='question-list'),
+    path('<uuid:exam_id>/questions/bulk/', QuestionBulkCreateAPIView.as_view(), name='question-bulk-create'),
     path('question-options/create/', QuestionOptionCreateAPIView.as_view(), name='question-option-create'),
+
+    # Candidate - Attempts
+    path('<uuid:exam_id>/attempts/start/', ExamAttemptStartAPIView.as_view(), name='attempt-start'),
+    path('attempts/<uuid:attempt_id>/paper/', AttemptPaperAPIView.as_view(), name='attempt-paper'),
+    path('attempts/<uuid:attempt_id>/answers/', AttemptAnswerAutosaveAPIView.as_view(), name='attempt-answers'),
+    path('attempts/<uuid:attempt_id>/next/', AdaptiveNextItemAPIView.as_view(), name='attempt-next-item'),
+    path('attempts/<uuid:attempt_id>/submit/', AttemptSubmitAPIView.as_view(), name='attempt-submit'),
+
+    # Async read paths for ASGI deployments
+    path('async/<uuid:id>/', AsyncExamDetailView.as_view(), name='exam-detail-async'),
+    path('async/<uuid:exam_id>/questions/', AsyncQuestionListView.as_view(), name='question-list-async'),
+    path('async/proctor/assigned/', AsyncProctorExamListView.as_view(), name='proctor-exam-list-async'),
 ]
@@ -1,51 +1,90 @@
+from django.http import StreamingHttpResponse
 from django.shortcuts import render, get_object_or_404
 from drf_spectacular.utils import extend_schema
 from rest_framework import generics, status
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
+from django.db import IntegrityError
 from django.db.models import Q
 
 from api import permissions
+from api.core.mixins import ConditionalGetMixin, ReplicaReadMixin, SparseFieldsetMixin, StreamingListMixin
+from api.core.pagination import KeysetPagination, ExamProctorKeysetPagination, ProctorKeysetPagination
 from api.core.responses import success, error
+from api.exams.cache import exam_paper_cache
 from api.exams.models import Exam, ExamProctor, Question, QuestionOption
 from api.exams.schema import (
     exam_create_schema, assign_proctor_schema, question_create_schema,
     exam_list_schema, exam_detail_schema, exam_update_schema,
-    question_option_create_schema, exam_proctor_list_schema
+    question_option_create_schema, exam_proctor_list_schema, exam_cache_stats_schema,
+    question_bulk_create_schema, exam_export_schema, exam_import_schema,
+    attempt_start_schema, attempt_autosave_schema, attempt_paper_schema, attempt_next_item_schema,
+    attempt_submit_schema
 )
 from api.exams.serializers import (
-    ExamSerializer, ExamCreateSerializer, ExamUpdateSerializer, AssignProctorSerializer, 
+    ExamSerializer, ExamSummarySerializer, ExamCreateSerializer, ExamUpdateSerializer, AssignProctorSerializer,
     QuestionSerializer, QuestionCreateSerializer, QuestionOptionSerializer,
-    ExamProctorSerializer
+    ExamProctorSerializer, ProctorSerializer, QuestionBulkCreateSerializer,
+    ExamAttemptSerializer, AttemptAutosaveSerializer, AdaptiveStepSerializer
 )
-from api.permissions import IsAssignedProctor
+from api.exams.services import (
+    ExamService, QuestionService, ExamTransferService, ProctorAssignmentService, AttemptService, AdaptiveService
+)
+from api.permissions import IsAssignedProctor, IsCandidate
+from api.results.serializers import ExamResultSerializer
 from api.users.models import User
 
 
 # Admin Views
-class ExamListAPIView(generics.ListAPIView):
+class ExamListAPIView(StreamingListMixin, SparseFieldsetMixin, ReplicaReadMixin, generics.ListAPIView):
     """Admin view to list all examinations"""
-    queryset = Exam.objects.all().order_by('-created_at')
-    serializer_class = ExamSerializer
+    queryset = Exam.objects.select_related('created_by').with_question_count()
+    serializer_class = ExamSummarySerializer
+    pagination_class = KeysetPagination
     permission_classes = [IsAuthenticated, permissions.IsAdminUser]
 
     @extend_schema(**exam_list_schema)
     def get(self, request, *args, **kwargs):
+        if (response := self.stream_response(request, "Exams retrieved successfully")) is not None:
+            return response
         response = super().get(request, *args, **kwargs)
         return success(response.data, "Exams retrieved successfully")
 
 
-class ExamDetailAPIView(generics.RetrieveAPIView):
-    """Admin view to get detailed exam information"""
-    queryset = Exam.objects.all()
+class ExamDetailAPIView(ConditionalGetMixin, SparseFieldsetMixin, generics.RetrieveAPIView):
+    """Admin view to get detailed exam information, answer key included.
+
+    Read from the primary, like its ETag: a body from a lagging replica would go out (and be
+    cached by clients) under the validators of the newer data.
+    """
+    queryset = Exam.objects.with_paper().with_question_count()
     serializer_class = ExamSerializer
-    permission_classes = [IsAuthenticated, permissions.IsAdminUser]
+    permission_classes = [IsAuthenticated, permissions.IsAdmin]
     lookup_field = 'id'
 
+    def get_validators(self):
+        return ExamService.paper_validators(self.kwargs['id'])
+
     @extend_schema(**exam_detail_schema)
     def get(self, request, *args, **kwargs):
-        response = super().get(request, *args, **kwargs)
-        return success(response.data, "Exam details retrieved successfully")
+        if (response := self.not_modified(request)) is not None:
+            return response
+        # Published papers are served from the read-through cache; drafts are always rebuilt
+        data = exam_paper_cache.get_or_build(
+            self.kwargs['id'],
+            lambda: self.retrieve(request, *args, **kwargs).data,
+            cacheable=lambda data: data['status'] == 'published',
+        )
+        return success(data, "Exam details retrieved successfully")
+
+
+class ExamPaperCacheStatsAPIView(generics.GenericAPIView):
+    """Admin view to scrape exam paper cache hit/miss counters for this process"""
+    permission_classes = [IsAuthenticated, permissions.IsAdminUser]
+
+    @extend_schema(**exam_cache_stats_schema)
+    def get(self, request, *args, **kwargs):
+        return success(exam_paper_cache.stats.as_dict(), "Exam paper cache stats retrieved successfully")
 
 
 class ExamCreateAPIView(generics.CreateAPIView):
@@ -81,10 +120,39 @@ class ExamUpdateAPIView(generics.UpdateAPIView):
         return success(response.data, "Exam updated successfully")
 
 
-class ExamProctorListAPIView(generics.ListAPIView):
+class ExamExportAPIView(generics.GenericAPIView):
+    """Admin view to stream an exam with its questions and options as NDJSON"""
+    # The export includes the answer key
+    permission_classes = [IsAuthenticated, permissions.IsAdmin]
+
+    @extend_schema(**exam_export_schema)
+    def get(self, request, *args, **kwargs):
+        try:
+            lines = ExamTransferService.export_lines(self.kwargs['id'])
+        except Exam.DoesNotExist:
+            return error("Exam not found", status.HTTP_404_NOT_FOUND)
+        response = StreamingHttpResponse(lines, content_type='application/x-ndjson')
+        response['Content-Disposition'] = f'attachment; filename="exam-{self.kwargs["id"]}.ndjson"'
+        return response
+
+
+class ExamImportAPIView(generics.GenericAPIView):
+    """Admin view to create an exam from an NDJSON export streamed in the request body"""
+    permission_classes = [IsAuthenticated, permissions.IsAdminUser]
+
+    @extend_schema(**exam_import_schema)
+    def post(self, request, *args, **kwargs):
+        # Read the raw body line by line instead of parsing it into request.data
+        exam = ExamTransferService.import_lines(request.stream or [], created_by=request.user)
+        data = {'id': exam.id, 'questions': exam.question_set.count()}
+        return success(data, "Exam imported successfully", status.HTTP_201_CREATED)
+
+
+class ExamProctorListAPIView(StreamingListMixin, generics.ListAPIView):
     """Admin view to list all exam-proctor assignments"""
-    queryset = ExamProctor.objects.all().order_by('-assigned_at')
+    queryset = ExamProctor.objects.select_related('exam', 'proctor', 'assigned_by')
     serializer_class = ExamProctorSerializer
+    pagination_class = ExamProctorKeysetPagination
     permission_classes = [IsAuthenticated, permissions.IsAdminUser]
 
     def get_queryset(self):
@@ -101,8 +169,11 @@ class ExamProctorListAPIView(generics.ListAPIView):
 
     @extend_schema(**exam_proctor_list_schema)
     def get(self, request, *args, **kwargs):
+        message = "Exam-proctor assignments retrieved successfully"
+        if (response := self.stream_response(request, message)) is not None:
+            return response
         response = super().get(request, *args, **kwargs)
-        return success(response.data, "Exam-proctor assignments retrieved successfully")
+        return success(response.data, message)
 
 
 class AssignProctorAPIView(generics.CreateAPIView):
@@ -125,26 +196,21 @@ class AssignProctorAPIView(generics.CreateAPIView):
 
 class ProctorListAPIView(generics.ListAPIView):
     """Admin view to list all available proctors"""
-    queryset = User.objects.filter(role='proctor').order_by('first_name', 'last_name')
+    queryset = User.objects.filter(role='proctor')
+    serializer_class = ProctorSerializer
+    pagination_class = ProctorKeysetPagination
     permission_classes = [IsAuthenticated, permissions.IsAdminUser]
 
     def get(self, request, *args, **kwargs):
-        proctors = self.get_queryset()
-        data = [{
-            'id': proctor.id,
-            'username': proctor.username,
-            'first_name': proctor.first_name,
-            'last_name': proctor.last_name,
-            'full_name': proctor.get_full_name(),
-            'email': proctor.email,
-        } for proctor in proctors]
-        return success(data, "Available proctors retrieved successfully")
+        response = super().get(request, *args, **kwargs)
+        return success(response.data, "Available proctors retrieved successfully")
 
 
 # Proctor Views
-class ProctorExamListAPIView(generics.ListAPIView):
+class ProctorExamListAPIView(SparseFieldsetMixin, ReplicaReadMixin, generics.ListAPIView):
     """Proctor view to list assigned exams"""
-    serializer_class = ExamSerializer
+    serializer_class = ExamSummarySerializer
+    pagination_class = KeysetPagination
     permission_classes = [IsAuthenticated]
 
     def get_queryset(self):
@@ -152,12 +218,9 @@ class ProctorExamListAPIView(generics.ListAPIView):
             return Exam.objects.none()
         
         # Get exams assigned to this proctor
-        exam_ids = ExamProctor.objects.filter(
-            proctor=self.request.user,
-            status__in=['assigned', 'active']
-        ).values_list('exam_id', flat=True)
+        exam_ids = ProctorAssignmentService.exam_ids(self.request, statuses=['assigned', 'active'])
         
-        return Exam.objects.filter(id__in=exam_ids).order_by('-created_at')
+        return Exam.objects.filter(id__in=exam_ids).select_related('created_by').with_question_count()
 
     def get(self, request, *args, **kwargs):
         if request.user.role != 'proctor':
@@ -182,8 +245,66 @@ class QuestionCreateAPIView(generics.CreateAPIView):
             return error(str(e), status.HTTP_400_BAD_REQUEST)
 
 
-class QuestionListAPIView(generics.ListAPIView):
-    """Proctor view to list questions for an assigned exam"""
+class QuestionBulkCreateAPIView(generics.GenericAPIView):
+    """Proctor view to import a whole question tree (questions with nested options) into an assigned exam"""
+    serializer_class = QuestionBulkCreateSerializer
+    permission_classes = [IsAuthenticated, IsAssignedProctor]
+
+    @staticmethod
+    def item_error_response(item_errors):
+        errors = [{'index': index, 'errors': errors} for index, errors in sorted(item_errors.items())]
+        return error(f"{len(errors)} question(s) failed validation", status.HTTP_400_BAD_REQUEST, errors)
+
+    def order_indexes(self, serializer, item_errors):
+        """The order_index of every item, ``None`` where it didn't validate, so order_index conflicts
+        are reported along with the other errors of the payload"""
+        if not item_errors:
+            return [question['order_index'] for question in serializer.validated_data['questions']]
+        field = serializer.fields['questions'].child.fields['order_index']
+        return [
+            field.to_internal_value(item['order_index'])
+            if isinstance(item, dict) and 'order_index' in item and 'order_index' not in errors else None
+            for item, errors in zip(serializer.initial_data['questions'], item_errors)
+        ]
+
+    @extend_schema(**question_bulk_create_schema)
+    def post(self, request, *args, **kwargs):
+        exam_id = self.kwargs['exam_id']
+        serializer = self.get_serializer(data=request.data)
+        item_errors = []
+        if not serializer.is_valid():
+            item_errors = serializer.errors.get('questions')
+            if not isinstance(item_errors, list):
+                return error("Invalid question payload", status.HTTP_400_BAD_REQUEST, serializer.errors)
+
+        order_indexes = self.order_indexes(serializer, item_errors)
+        errors = QuestionService.find_order_index_conflicts(exam_id, order_indexes)
+        for index, item in enumerate(item_errors):
+            if item:
+                errors[index] = {**item, **errors.get(index, {})}
+        if errors:
+            return self.item_error_response(errors)
+
+        try:
+            questions = serializer.validated_data['questions']
+            question_rows, option_rows = QuestionService.bulk_create_tree(exam_id, questions)
+        except IntegrityError:
+            # Another write took one of the order indexes since they were checked
+            conflicts = QuestionService.find_order_index_conflicts(exam_id, order_indexes)
+            if not conflicts:
+                raise
+            return self.item_error_response(conflicts)
+        data = {
+            'questions_created': len(question_rows),
+            'options_created': len(option_rows),
+            'question_ids': [question.id for question in question_rows],
+        }
+        return success(data, "Questions imported successfully", status.HTTP_201_CREATED)
+
+
+class QuestionListAPIView(ConditionalGetMixin, SparseFieldsetMixin, generics.ListAPIView):
+    """Proctor view to list questions for an assigned exam; read from the primary, like
+    ``ExamDetailAPIView``, so the body matches its ETag"""
     serializer_class = QuestionSerializer
     permission_classes = [IsAuthenticated]
 
@@ -191,21 +312,32 @@ class QuestionListAPIView(generics.ListAPIView):
         exam_id = self.kwargs.get('exam_id')
         
         if self.request.user.role == 'admin':
-            return Question.objects.filter(exam_id=exam_id).order_by('order_index')
+            return Question.objects.filter(exam_id=exam_id).with_options()
         elif self.request.user.role == 'proctor':
             # Check if proctor is assigned to this exam
-            if ExamProctor.objects.filter(exam_id=exam_id, proctor=self.request.user).exists():
-                return Question.objects.filter(exam_id=exam_id).order_by('order_index')
+            if ProctorAssignmentService.is_assigned(self.request, exam_id):
+                return Question.objects.filter(exam_id=exam_id).with_options()
         
         return Question.objects.none()
 
+    def get_validators(self):
+        # Only for users who see the questions: the empty list others get must not share the ETag
+        exam_id = self.kwargs['exam_id']
+        if self.request.user.role == 'admin' or (self.request.user.role == 'proctor'
+                                                 and ProctorAssignmentService.is_assigned(self.request, exam_id)):
+            return ExamService.paper_validators(exam_id)
+        return None
+
     def get(self, request, *args, **kwargs):
         exam_id = self.kwargs.get('exam_id')
         if not exam_id:
             return error("Exam ID is required", status.HTTP_400_BAD_REQUEST)
         
+        if (response := self.not_modified(request)) is not None:
+            return response
+
         # Verify exam exists
-        if not Exam.objects.filter(id=exam_id).exists():
+        if self.validators is None and not Exam.objects.filter(id=exam_id).exists():
             return error("Exam not found", status.HTTP_404_NOT_FOUND)
         
         response = super().get(request, *args, **kwargs)
@@ -225,14 +357,17 @@ class QuestionOptionCreateAPIView(generics.CreateAPIView):
             return error("Question ID is required", status.HTTP_400_BAD_REQUEST)
         
         try:
-            question = get_object_or_404(Question, id=question_id)
+            # Only the exam id is needed for the permission check
+            exam_id = Question.objects.filter(id=question_id).values_list('exam_id', flat=True).first()
+            if exam_id is None:
+                return error("Question not found", status.HTTP_404_NOT_FOUND)
             
             # Check if user has permission to add options to this question
             if request.user.role == 'admin':
                 pass  # Admin can add options to any question
             elif request.user.role == 'proctor':
                 # Check if proctor is assigned to the exam that contains this question
-                if not ExamProctor.objects.filter(exam=question.exam, proctor=request.user).exists():
+                if not ProctorAssignmentService.is_assigned(request, exam_id):
                     return error("You are not assigned to this exam", status.HTTP_403_FORBIDDEN)
             else:
                 return error("You don't have permission to perform this action", status.HTTP_403_FORBIDDEN)
@@ -246,3 +381,76 @@ class QuestionOptionCreateAPIView(generics.CreateAPIView):
     @extend_schema(**question_option_create_schema)
     def post(self, request, *args, **kwargs):
         return self.create(request, *args, **kwargs)
+
+
+# Candidate Views
+class ExamAttemptStartAPIView(generics.GenericAPIView):
+    """Candidate view to start an attempt, or resume the one in progress"""
+    serializer_class = ExamAttemptSerializer
+    permission_classes = [IsAuthenticated, IsCandidate]
+
+    @extend_schema(**attempt_start_schema)
+    def post(self, request, *args, **kwargs):
+        attempt, created = AttemptService.start(self.kwargs['exam_id'], request.user)
+        if created:
+            return success(self.get_serializer(attempt).data, "Attempt started successfully", status.HTTP_201_CREATED)
+        return success(self.get_serializer(attempt).data, "Attempt resumed successfully")
+
+
+class AttemptPaperAPIView(SparseFieldsetMixin, generics.GenericAPIView):
+    """Candidate view to get the paper for an attempt in progress, served from a pre-built snapshot"""
+    permission_classes = [IsAuthenticated, IsCandidate]
+
+    @extend_schema(**attempt_paper_schema)
+    def get(self, request, *args, **kwargs):
+        paper = AttemptService.paper(self.kwargs['attempt_id'], request.user)
+        return success(paper, "Exam paper retrieved successfully")
+
+
+class AttemptAnswerAutosaveAPIView(generics.GenericAPIView):
+    """Candidate view to autosave a batch of answers; safe to retry"""
+    serializer_class = AttemptAutosaveSerializer
+    permission_classes = [IsAuthenticated, IsCandidate]
+
+    @extend_schema(**attempt_autosave_schema)
+    def put(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        saved, rejected, saved_at, deadline = AttemptService.autosave(
+            self.kwargs['attempt_id'], request.user, serializer.validated_data['answers'],
+        )
+        data = {
+            'saved': saved,
+            'rejected': rejected,
+            'saved_at': saved_at,
+            'time_remaining_seconds': max(0, int((deadline - saved_at).total_seconds())),
+        }
+        return success(data, "Answers saved successfully")
+
+
+class AdaptiveNextItemAPIView(SparseFieldsetMixin, generics.GenericAPIView):
+    """Candidate view to answer the current item of an adaptive exam and get the next one"""
+    serializer_class = AdaptiveStepSerializer
+    permission_classes = [IsAuthenticated, IsCandidate]
+
+    @extend_schema(**attempt_next_item_schema)
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        step = AdaptiveService.next_item(self.kwargs['attempt_id'], request.user,
+                                         serializer.validated_data.get('answer'))
+        message = "Adaptive exam finished" if step['finished'] else "Next question retrieved successfully"
+        return success(step, message)
+
+
+class AttemptSubmitAPIView(generics.GenericAPIView):
+    """Candidate view to submit an attempt and get its objective score"""
+    serializer_class = ExamAttemptSerializer
+    permission_classes = [IsAuthenticated, IsCandidate]
+
+    @extend_schema(**attempt_submit_schema)
+    def post(self, request, *args, **kwargs):
+        attempt, result = AttemptService.submit(self.kwargs['attempt_id'], request.user)
+        data = self.get_serializer(attempt).data
+        data['result'] = ExamResultSerializer(result).data
+        return success(data, "Attempt submitted successfully")
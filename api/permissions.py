@@ -1,6 +1,6 @@
 from rest_framework.permissions import BasePermission, SAFE_METHODS
 
-from api.exams.models import ExamProctor
+from api.exams.services import ProctorAssignmentService
 
 
 class IsAssignedProctor(BasePermission):
@@ -10,7 +10,7 @@ class IsAssignedProctor(BasePermission):
         if request.method in SAFE_METHODS:
             return True
         exam_id = request.data.get("exam") or view.kwargs.get("exam_id")
-        return ExamProctor.objects.filter(exam_id=exam_id, proctor=request.user).exists() and request.user.role == 'proctor'
+        return request.user.role == 'proctor' and ProctorAssignmentService.is_assigned(request, exam_id)
 
 
 class IsAdminUser(BasePermission):
@@ -19,4 +19,19 @@ class IsAdminUser(BasePermission):
     def has_permission(self, request, view):
         if request.method in SAFE_METHODS:
             return True
-        return request.user.role == 'admin'
\ No newline at end of file
+        return request.user.role == 'admin'
+
+
+class IsAdmin(BasePermission):
+    """``IsAdminUser`` for views whose reads are admin-only too, e.g. ones exposing the answer key"""
+    message = "This action can be done only by admin"
+
+    def has_permission(self, request, view):
+        return request.user.role == 'admin'
+
+
+class IsCandidate(BasePermission):
+    message = "This action can be done only by candidates"
+
+    def has_permission(self, request, view):
+        return request.user.role == 'candidate'
@@ -0,0 +1,179 @@
+import asyncio
+import logging
+from datetime import timezone as dt_timezone
+
+from channels.db import database_sync_to_async
+from channels.generic.websocket import AsyncJsonWebsocketConsumer
+from django.conf import settings
+from django.db import DatabaseError
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from api.exams.models import Exam, ExamAttempt, ExamProctor
+from api.proctoring.models import ProctoringEvent
+
+logger = logging.getLogger(__name__)
+
+EVENT_SEVERITY = {
+    'focus_lost': 'warning',
+    'tab_switch': 'warning',
+    'fullscreen_exit': 'warning',
+    'copy_paste': 'warning',
+    'face_not_detected': 'critical',
+    'multiple_faces': 'critical',
+    'face_mismatch': 'critical',
+}
+EVENT_TYPES = {event_type for event_type, _ in ProctoringEvent.EVENT_TYPES}
+
+
+def proctor_alert_group(proctor_id):
+    return f"proctor.alerts.{proctor_id}"
+
+
+class CandidateEventConsumer(AsyncJsonWebsocketConsumer):
+    """Ingests a candidate's proctoring telemetry for one exam.
+
+    A message is a single event or ``{"events": [...]}``, each event being
+    ``{"event_type": ..., "timestamp": <ISO 8601>, "payload": {...}}``. Events are buffered
+    per connection and written with ``bulk_create`` once ``BATCH_SIZE`` is reached or every
+    ``FLUSH_INTERVAL_SECONDS``; alert-worthy events are pushed straight to the exam's
+    proctors. Only candidates with an attempt in progress on a published exam can connect.
+    A batch that fails to write stays buffered for the next flush.
+    """
+
+    MAX_BUFFERED_BATCHES = 10
+
+    async def connect(self):
+        user = self.scope.get('user')
+        if not user or not user.is_authenticated or user.role != 'candidate':
+            await self.close(code=4403)
+            return
+
+        self.exam_id = self.scope['url_route']['kwargs']['exam_id']
+        close_code, self.proctor_ids = await self.load_proctor_ids(user)
+        if close_code:
+            await self.close(code=close_code)
+            return
+
+        config = settings.PROCTORING_EVENTS
+        self.batch_size = config['BATCH_SIZE']
+        self.flush_interval = config['FLUSH_INTERVAL_SECONDS']
+        self.alert_severities = set(config['ALERT_SEVERITIES'])
+        self.buffer = []
+        self.flush_task = asyncio.create_task(self.flush_periodically())
+        await self.accept()
+
+    @database_sync_to_async
+    def load_proctor_ids(self, user):
+        """``(close code, None)`` when the candidate may not send events for the exam, else
+        ``(None, ids of the exam's proctors)``"""
+        if not Exam.objects.filter(id=self.exam_id, status='published').exists():
+            return 4404, None
+        if not ExamAttempt.objects.filter(exam_id=self.exam_id, candidate=user, status='in_progress',
+                                          deadline__gt=timezone.now()).exists():
+            return 4403, None
+        return None, list(ExamProctor.objects.filter(exam_id=self.exam_id, status__in=['assigned', 'active'])
+                          .values_list('proctor_id', flat=True))
+
+    async def receive_json(self, content, **kwargs):
+        events = content.get('events') if isinstance(content, dict) and 'events' in content else [content]
+        if not isinstance(events, list):
+            events = [events]
+
+        rejected = 0
+        for raw in events:
+            event = self.build_event(raw)
+            if event is None:
+                rejected += 1
+                continue
+            self.buffer.append(event)
+            if event.severity in self.alert_severities:
+                await self.send_alert(event)
+
+        if rejected:
+            await self.send_json({'type': 'error', 'message': f"{rejected} event(s) rejected"})
+        if len(self.buffer) >= self.batch_size:
+            await self.flush()
+
+    def build_event(self, raw):
+        if not isinstance(raw, dict) or raw.get('event_type') not in EVENT_TYPES:
+            return None
+        try:
+            occurred_at = parse_datetime(raw['timestamp']) if isinstance(raw.get('timestamp'), str) else None
+        except ValueError:  # well-formed but not a real date, e.g. month 13
+            return None
+        if occurred_at is None:
+            occurred_at = timezone.now()
+        elif timezone.is_naive(occurred_at):
+            occurred_at = timezone.make_aware(occurred_at, dt_timezone.utc)
+        payload = raw.get('payload')
+        return ProctoringEvent(
+            exam_id=self.exam_id,
+            candidate_id=self.scope['user'].pk,
+            event_type=raw['event_type'],
+            severity=EVENT_SEVERITY.get(raw['event_type'], 'info'),
+            payload=payload if isinstance(payload, dict) else {},
+            occurred_at=occurred_at,
+        )
+
+    async def send_alert(self, event):
+        alert = {
+            'type': 'proctoring.alert',
+            'alert': {
+                'exam_id': str(event.exam_id),
+                'candidate_id': event.candidate_id,
+                'event_type': event.event_type,
+                'severity': event.severity,
+                'occurred_at': event.occurred_at.isoformat(),
+                'payload': event.payload,
+            },
+        }
+        for proctor_id in self.proctor_ids:
+            await self.channel_layer.group_send(proctor_alert_group(proctor_id), alert)
+
+    async def flush(self):
+        if not self.buffer:
+            return
+        # Swap the buffer first so events arriving during the write go to the next batch
+        batch, self.buffer = self.buffer, []
+        try:
+            await database_sync_to_async(ProctoringEvent.objects.bulk_create)(batch, batch_size=self.batch_size)
+        except DatabaseError:
+            logger.exception("Writing %d proctoring events failed; keeping them for the next flush", len(batch))
+            # While the database is down keep only the newest events, not an ever-growing buffer
+            self.buffer = (batch + self.buffer)[-self.batch_size * self.MAX_BUFFERED_BATCHES:]
+
+    async def flush_periodically(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception:
+                logger.exception("Periodic flush of proctoring events failed")
+
+    async def disconnect(self, code):
+        flush_task = getattr(self, 'flush_task', None)
+        if flush_task is None:
+            return
+        flush_task.cancel()
+        await self.flush()
+
+
+class ProctorAlertConsumer(AsyncJsonWebsocketConsumer):
+    """Streams alerts for every exam the connected proctor is assigned to"""
+
+    async def connect(self):
+        user = self.scope.get('user')
+        if not user or not user.is_authenticated or user.role != 'proctor':
+            await self.close(code=4403)
+            return
+        self.group_name = proctor_alert_group(user.pk)
+        await self.channel_layer.group_add(self.group_name, self.channel_name)
+        await self.accept()
+
+    async def disconnect(self, code):
+        if hasattr(self, 'group_name'):
+            await self.channel_layer.group_discard(self.group_name, self.channel_name)
+
+    async def proctoring_alert(self, event):
+        await self.send_json(event['alert'])
@@ -0,0 +1,39 @@
+from urllib.parse import parse_qs
+
+from channels.db import database_sync_to_async
+from channels.middleware import BaseMiddleware
+from django.contrib.auth.models import AnonymousUser
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.exceptions import InvalidToken
+
+from api.users.authentication.jwt import CachedJWTAuthentication
+
+
+class JWTAuthMiddleware(BaseMiddleware):
+    """Populate ``scope['user']`` from a JWT access token.
+
+    Browsers can't set headers on WebSocket handshakes, so the token is read from the
+    ``token`` query parameter, falling back to a ``Authorization: Bearer`` header.
+    """
+    authenticator = CachedJWTAuthentication()
+
+    async def __call__(self, scope, receive, send):
+        scope = dict(scope)
+        scope['user'] = await self.get_user(self.get_raw_token(scope))
+        return await super().__call__(scope, receive, send)
+
+    def get_raw_token(self, scope):
+        token = parse_qs(scope.get('query_string', b'').decode()).get('token')
+        if token:
+            return token[0].encode()
+        header = dict(scope.get('headers', [])).get(b'authorization')
+        return self.authenticator.get_raw_token(header) if header else None
+
+    @database_sync_to_async
+    def get_user(self, raw_token):
+        if raw_token is None:
+            return AnonymousUser()
+        try:
+            return self.authenticator.get_user(self.authenticator.get_validated_token(raw_token))
+        except (InvalidToken, AuthenticationFailed):
+            return AnonymousUser()
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.4 on 2026-10-18 10:47
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('exams', '0002_exam_exam_created_at_idx_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProctoringEvent',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('event_type', models.CharField(choices=[('focus_lost', 'Focus Lost'), ('focus_gained', 'Focus Gained'), ('tab_switch', 'Tab Switch'), ('fullscreen_exit', 'Fullscreen Exit'), ('copy_paste', 'Copy/Paste'), ('face_not_detected', 'Face Not Detected'), ('multiple_faces', 'Multiple Faces'), ('face_mismatch', 'Face Mismatch'), ('other', 'Other')], max_length=50)),
+                ('severity', models.CharField(choices=[('info', 'Info'), ('warning', 'Warning'), ('critical', 'Critical')], default='info', max_length=20)),
+                ('payload', models.JSONField(blank=True, default=dict)),
+                ('occurred_at', models.DateTimeField()),
+                ('received_at', models.DateTimeField(auto_now_add=True)),
+                ('candidate', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+                ('exam', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='exams.exam')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['exam', 'candidate', 'occurred_at'], name='event_exam_candidate_idx')],
+            },
+        ),
+    ]
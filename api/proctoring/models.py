@@ -1,3 +1,43 @@
+import uuid
+
+from django.conf import settings
 from django.db import models
 
-# Create your models here.
+from api.exams.models import Exam
+
+
+class ProctoringEvent(models.Model):
+    EVENT_TYPES = [
+        ('focus_lost', 'Focus Lost'),
+        ('focus_gained', 'Focus Gained'),
+        ('tab_switch', 'Tab Switch'),
+        ('fullscreen_exit', 'Fullscreen Exit'),
+        ('copy_paste', 'Copy/Paste'),
+        ('face_not_detected', 'Face Not Detected'),
+        ('multiple_faces', 'Multiple Faces'),
+        ('face_mismatch', 'Face Mismatch'),
+        ('other', 'Other'),
+    ]
+
+    SEVERITY_CHOICES = [
+        ('info', 'Info'),
+        ('warning', 'Warning'),
+        ('critical', 'Critical'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    exam = models.ForeignKey(Exam, on_delete=models.CASCADE)
+    candidate = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
+    event_type = models.CharField(max_length=50, choices=EVENT_TYPES)
+    severity = models.CharField(max_length=20, choices=SEVERITY_CHOICES, default='info')
+    payload = models.JSONField(default=dict, blank=True)
+    occurred_at = models.DateTimeField()
+    received_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['exam', 'candidate', 'occurred_at'], name='event_exam_candidate_idx'),
+        ]
+
+    def __str__(self):
+        return f"Proctoring Event - {self.event_type} - {self.candidate_id}"
@@ -0,0 +1,8 @@
+from django.urls import path
+
+from api.proctoring.consumers import CandidateEventConsumer, ProctorAlertConsumer
+
+websocket_urlpatterns = [
+    path('ws/proctoring/exams/<uuid:exam_id>/events/', CandidateEventConsumer.as_asgi()),
+    path('ws/proctoring/alerts/', ProctorAlertConsumer.as_asgi()),
+]
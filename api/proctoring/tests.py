@@ -1,3 +1,129 @@
-from django.test import TestCase
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from channels.db import database_sync_to_async
+from channels.testing import WebsocketCommunicator
+from django.db import OperationalError
+from django.test import TransactionTestCase, override_settings
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from api.exams.models import Exam, ExamAttempt, ExamProctor
+from api.proctoring.models import ProctoringEvent
+from api.users.models import User
+from config.asgi import application
+
+
+@override_settings(
+    CHANNEL_LAYERS={'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}},
+    PROCTORING_EVENTS={'BATCH_SIZE': 3, 'FLUSH_INTERVAL_SECONDS': 60, 'ALERT_SEVERITIES': ['critical']},
+)
+class ProctoringEventConsumerTests(TransactionTestCase):
+    def setUp(self):
+        self.admin = User.objects.create(
+            username='admin', email='admin@example.com', first_name='Ada', last_name='Admin', role='admin'
+        )
+        self.proctor = User.objects.create(
+            username='proctor', email='proctor@example.com', first_name='Pat', last_name='Proctor', role='proctor'
+        )
+        self.candidate = User.objects.create(
+            username='candidate', email='candidate@example.com', first_name='Cam', last_name='Candidate',
+            role='candidate'
+        )
+        self.exam = Exam.objects.create(
+            title='Exam', created_by=self.admin, duration_minutes=60, passing_score=50, status='published'
+        )
+        ExamProctor.objects.create(exam=self.exam, proctor=self.proctor, assigned_by=self.admin)
+        now = timezone.now()
+        self.attempt = ExamAttempt.objects.create(exam=self.exam, candidate=self.candidate, attempt_number=1,
+                                                  started_at=now, deadline=now + timedelta(hours=1))
+        self.tokens = {user.pk: str(RefreshToken.for_user(user).access_token)
+                       for user in (self.proctor, self.candidate)}
+
+    def communicator(self, path, user):
+        return WebsocketCommunicator(application, f"{path}?token={self.tokens[user.pk]}",
+                                     headers=[(b'origin', b'http://testserver'), (b'host', b'testserver')])
+
+    def events_path(self):
+        return f"/ws/proctoring/exams/{self.exam.id}/events/"
+
+    async def test_events_are_batched_and_alerts_fan_out(self):
+        proctor = self.communicator('/ws/proctoring/alerts/', self.proctor)
+        candidate = self.communicator(self.events_path(), self.candidate)
+        self.assertTrue((await proctor.connect())[0])
+        self.assertTrue((await candidate.connect())[0])
+
+        await candidate.send_json_to({'events': [
+            {'event_type': 'focus_lost', 'timestamp': '2026-01-01T10:00:00Z'},
+            {'event_type': 'multiple_faces', 'payload': {'faces': 2}},
+        ]})
+        alert = await proctor.receive_json_from()
+        self.assertEqual((alert['event_type'], alert['payload']), ('multiple_faces', {'faces': 2}))
+        # Below the batch size nothing is written yet
+        self.assertEqual(await database_sync_to_async(ProctoringEvent.objects.count)(), 0)
+
+        await candidate.send_json_to({'event_type': 'tab_switch'})
+        await candidate.send_json_to({'event_type': 'focus_gained'})
+        await candidate.disconnect()
+        await proctor.disconnect()
+
+        severities = await database_sync_to_async(
+            lambda: sorted(ProctoringEvent.objects.values_list('event_type', 'severity'))
+        )()
+        self.assertEqual(severities, [
+            ('focus_gained', 'info'), ('focus_lost', 'warning'),
+            ('multiple_faces', 'critical'), ('tab_switch', 'warning'),
+        ])
+
+    async def test_invalid_events_are_rejected(self):
+        candidate = self.communicator(self.events_path(), self.candidate)
+        await candidate.connect()
+        await candidate.send_json_to({'event_type': 'bogus'})
+        self.assertEqual((await candidate.receive_json_from())['type'], 'error')
+        await candidate.disconnect()
+
+    async def test_only_candidates_can_send_events(self):
+        connected, code = await self.communicator(self.events_path(), self.proctor).connect()
+        self.assertFalse(connected)
+        self.assertEqual(code, 4403)
+
+    async def test_impossible_timestamps_are_rejected(self):
+        candidate = self.communicator(self.events_path(), self.candidate)
+        await candidate.connect()
+        await candidate.send_json_to({'events': [
+            {'event_type': 'focus_lost', 'timestamp': '2024-13-45T00:00:00'},
+            {'event_type': 'tab_switch'},
+        ]})
+        self.assertEqual(await candidate.receive_json_from(), {'type': 'error', 'message': "1 event(s) rejected"})
+        await candidate.disconnect()
+        self.assertEqual(await database_sync_to_async(ProctoringEvent.objects.count)(), 1)
+
+    async def test_failed_writes_stay_buffered(self):
+        candidate = self.communicator(self.events_path(), self.candidate)
+        await candidate.connect()
+        bulk_create = ProctoringEvent.objects.bulk_create
+        outcomes = iter([OperationalError("database is locked")])
+
+        def fail_once(*args, **kwargs):
+            if error := next(outcomes, None):
+                raise error
+            return bulk_create(*args, **kwargs)
+
+        with mock.patch.object(ProctoringEvent.objects, 'bulk_create', side_effect=fail_once) as write, \
+                self.assertLogs('api.proctoring.consumers', 'ERROR') as logs:
+            await candidate.send_json_to({'events': [{'event_type': 'focus_lost'}] * 3})
+            await candidate.send_json_to({'events': [{'event_type': 'tab_switch'}] * 3})
+            await candidate.disconnect()
+        self.assertEqual(write.call_count, 2)
+        [record] = logs.records
+        self.assertEqual(record.getMessage(), "Writing 3 proctoring events failed; keeping them for the next flush")
+        self.assertIsInstance(record.exc_info[1], OperationalError)
+        self.assertEqual(await database_sync_to_async(ProctoringEvent.objects.count)(), 6)
+
+    async def test_candidates_need_a_published_exam_and_an_open_attempt(self):
+        await database_sync_to_async(Exam.objects.filter(pk=self.exam.pk).update)(status='draft')
+        self.assertEqual(await self.communicator(self.events_path(), self.candidate).connect(), (False, 4404))
+
+        await database_sync_to_async(Exam.objects.filter(pk=self.exam.pk).update)(status='published')
+        await database_sync_to_async(ExamAttempt.objects.filter(pk=self.attempt.pk).update)(status='submitted')
+        self.assertEqual(await self.communicator(self.events_path(), self.candidate).connect(), (False, 4403))
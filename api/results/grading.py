@@ -0,0 +1,84 @@
+from itertools import chain, repeat
+
+import numpy as np
+
+from api.exams.models import QuestionOption
+
+
+class AnswerKey:
+    """Answer key for the objective questions of one exam, laid out for array scoring.
+
+    Every option of a gradable question is one column, grouped by question in paper order,
+    so a cohort of submissions becomes a boolean ``(submissions x options)`` matrix. A
+    question is answered correctly when the selected options in its block match the key
+    exactly, which is one XOR plus one ``reduceat`` over the whole matrix.
+    """
+    GRADABLE_TYPES = ('multiple_choice', 'true_false')
+
+    def __init__(self, question_ids, points, option_ids, correct, offsets):
+        self.question_ids = question_ids
+        self.option_ids = option_ids
+        self.points = np.asarray(points, dtype=np.float64)
+        self.correct = np.asarray(correct, dtype=bool)
+        self.offsets = np.asarray(offsets, dtype=np.intp)
+        # Submissions may carry UUIDs or their string form
+        self.columns = {}
+        for column, option_id in enumerate(option_ids):
+            self.columns[option_id] = column
+            self.columns[str(option_id)] = column
+        self.max_score = float(self.points.sum())
+
+    @classmethod
+    def for_exam(cls, exam_id):
+        """Build the key with a single query; questions without a correct option are skipped"""
+        rows = (QuestionOption.objects
+                .filter(question__exam_id=exam_id, question__question_type__in=cls.GRADABLE_TYPES)
+                .order_by('question__order_index', 'order_index')
+                .values_list('question_id', 'question__points', 'id', 'is_correct'))
+
+        blocks = {}
+        for question_id, points, option_id, is_correct in rows:
+            blocks.setdefault(question_id, (points, []))[1].append((option_id, is_correct))
+
+        question_ids, points, option_ids, correct, offsets = [], [], [], [], []
+        for question_id, (question_points, options) in blocks.items():
+            if not any(is_correct for _, is_correct in options):
+                continue
+            question_ids.append(question_id)
+            points.append(float(question_points))
+            offsets.append(len(option_ids))
+            for option_id, is_correct in options:
+                option_ids.append(option_id)
+                correct.append(is_correct)
+        return cls(question_ids, points, option_ids, correct, offsets)
+
+    @property
+    def question_count(self):
+        return len(self.question_ids)
+
+    @property
+    def option_count(self):
+        return len(self.correct)
+
+    def encode(self, selections):
+        """Turn a sequence of selected-option-id lists into the submission matrix.
+
+        Options outside the key (other exams, non-objective questions) are ignored. String
+        ids hash much faster than ``UUID`` objects, so prefer them for large cohorts.
+        """
+        lengths = np.fromiter(map(len, selections), dtype=np.intp, count=len(selections))
+        flat = chain.from_iterable(selections)
+        cols = np.fromiter(map(self.columns.get, flat, repeat(-1)), dtype=np.intp, count=int(lengths.sum()))
+        rows = np.repeat(np.arange(len(selections)), lengths)
+        known = cols >= 0
+        matrix = np.zeros((len(selections), self.option_count), dtype=bool)
+        matrix[rows[known], cols[known]] = True
+        return matrix
+
+    def score(self, matrix):
+        """Return ``(scores, correct_counts)`` for a submission matrix"""
+        if not self.question_count:
+            return np.zeros(len(matrix)), np.zeros(len(matrix), dtype=np.intp)
+        mistakes = np.logical_or.reduceat(matrix ^ self.correct, self.offsets, axis=1)
+        answered_correctly = ~mistakes
+        return answered_correctly @ self.points, answered_correctly.sum(axis=1)
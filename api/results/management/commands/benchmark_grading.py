@@ -0,0 +1,87 @@
+import time
+import uuid
+
+import numpy as np
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from api.exams.models import Exam, Question, QuestionOption
+from api.results.grading import AnswerKey
+from api.results.services import GradingService
+from api.users.models import User
+
+
+class Command(BaseCommand):
+    help = ("Time the grading engine on synthetic submissions. Creates a throwaway exam (and candidates "
+            "with --persist) and deletes them afterwards.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--submissions', type=int, default=50000)
+        parser.add_argument('--questions', type=int, default=100)
+        parser.add_argument('--options', type=int, default=4)
+        parser.add_argument('--persist', action='store_true',
+                            help="Also create candidates and upsert results through GradingService")
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        suffix = uuid.uuid4().hex[:8]
+        admin, exam = self.create_fixture(suffix, options['questions'], options['options'])
+        candidates = []
+        try:
+            started = time.perf_counter()
+            key = AnswerKey.for_exam(exam.id)
+            self.report('build answer key', started)
+
+            selections = self.random_selections(key, options['submissions'], options['seed'])
+
+            started = time.perf_counter()
+            matrix = key.encode(selections)
+            self.report('encode submissions', started)
+
+            started = time.perf_counter()
+            scores, _ = key.score(matrix)
+            self.report('score submissions', started)
+            self.stdout.write(f"mean score {scores.mean():.2f} / {key.max_score:.2f}")
+
+            if options['persist']:
+                candidates = User.objects.bulk_create([
+                    User(username=f"bench-{suffix}-{i}", email=f"bench-{suffix}-{i}@example.com",
+                         first_name='Bench', last_name='Candidate', role='candidate')
+                    for i in range(options['submissions'])
+                ], batch_size=GradingService.BULK_BATCH_SIZE)
+                ids = User.objects.filter(username__startswith=f"bench-{suffix}-").values_list('id', flat=True)
+
+                started = time.perf_counter()
+                graded = GradingService.grade_exam(exam, zip(ids, selections))
+                self.report(f"grade and upsert {graded} results", started)
+        finally:
+            if candidates:
+                User.objects.filter(username__startswith=f"bench-{suffix}-").delete()
+            admin.delete()
+
+    def report(self, label, started):
+        self.stdout.write(f"{label:<32} {(time.perf_counter() - started) * 1000:9.1f} ms")
+
+    @transaction.atomic
+    def create_fixture(self, suffix, questions, options):
+        admin = User.objects.create(username=f"bench-admin-{suffix}", email=f"bench-admin-{suffix}@example.com",
+                                    first_name='Bench', last_name='Admin', role='admin')
+        exam = Exam.objects.create(title='Grading benchmark', created_by=admin, duration_minutes=60,
+                                   passing_score=50, status='published')
+        question_rows = [Question(exam=exam, question_text=f"Question {i}", question_type='multiple_choice',
+                                  order_index=i) for i in range(questions)]
+        Question.objects.bulk_create(question_rows)
+        QuestionOption.objects.bulk_create([
+            QuestionOption(question=question, option_text=f"Option {o}", is_correct=o == 0, order_index=o)
+            for question in question_rows for o in range(options)
+        ])
+        return admin, exam
+
+    @staticmethod
+    def random_selections(key, count, seed):
+        """One option per question for every submission, as lists of option id strings"""
+        option_ids = np.array([str(option_id) for option_id in key.option_ids], dtype=object)
+        block_sizes = np.diff(np.append(key.offsets, key.option_count))
+        rng = np.random.default_rng(seed)
+        picks = key.offsets + (rng.random((count, key.question_count)) * block_sizes).astype(np.intp)
+        return [option_ids[row].tolist() for row in picks]
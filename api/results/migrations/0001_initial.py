@@ -0,0 +1,36 @@
+# Generated by Django 5.2.4 on 2026-10-18 10:50
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('exams', '0002_exam_exam_created_at_idx_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExamResult',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('score', models.DecimalField(decimal_places=2, max_digits=8)),
+                ('max_score', models.DecimalField(decimal_places=2, max_digits=8)),
+                ('percentage', models.DecimalField(decimal_places=2, max_digits=5)),
+                ('correct_count', models.PositiveIntegerField(default=0)),
+                ('passed', models.BooleanField(default=False)),
+                ('graded_at', models.DateTimeField()),
+                ('candidate', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+                ('exam', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='exams.exam')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('exam', 'candidate'), name='unique_result_per_candidate')],
+            },
+        ),
+    ]
@@ -1,3 +1,27 @@
+import uuid
+
+from django.conf import settings
 from django.db import models
 
-# Create your models here.
+from api.exams.models import Exam
+
+
+class ExamResult(models.Model):
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    exam = models.ForeignKey(Exam, on_delete=models.CASCADE)
+    candidate = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
+    score = models.DecimalField(max_digits=8, decimal_places=2)
+    max_score = models.DecimalField(max_digits=8, decimal_places=2)
+    percentage = models.DecimalField(max_digits=5, decimal_places=2)
+    correct_count = models.PositiveIntegerField(default=0)
+    passed = models.BooleanField(default=False)
+    graded_at = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            # Also the conflict target for re-grading upserts
+            models.UniqueConstraint(fields=['exam', 'candidate'], name='unique_result_per_candidate'),
+        ]
+
+    def __str__(self):
+        return f"Exam Result - {self.exam_id} - {self.candidate_id}"
@@ -0,0 +1,13 @@
+from rest_framework import serializers
+
+from api.core.metrics import TimedSerializerMixin
+
+from .models import ExamResult
+
+
+class ExamResultSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    class Meta:
+        model = ExamResult
+        fields = ['id', 'exam', 'candidate', 'score', 'max_score', 'percentage', 'correct_count', 'passed',
+                  'graded_at']
+        read_only_fields = fields
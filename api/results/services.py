@@ -0,0 +1,57 @@
+from decimal import Decimal
+from itertools import islice
+
+from django.db import transaction
+from django.utils import timezone
+
+from api.exams.models import Exam
+from .grading import AnswerKey
+from .models import ExamResult
+
+
+class GradingService:
+    CHUNK_SIZE = 5000
+    BULK_BATCH_SIZE = 1000
+    RESULT_FIELDS = ['score', 'max_score', 'percentage', 'correct_count', 'passed', 'graded_at']
+
+    @staticmethod
+    def _decimal(value):
+        return Decimal(format(value, '.2f'))
+
+    @staticmethod
+    def grade_exam(exam, submissions, chunk_size=CHUNK_SIZE):
+        """Score ``(candidate_id, selected_option_ids)`` pairs against the exam's objective
+        questions and upsert one ``ExamResult`` per candidate; returns the number graded.
+
+        Submissions are consumed ``chunk_size`` at a time, so a generator over the whole
+        cohort keeps memory flat. Grading a candidate again replaces their previous result.
+        """
+        if not isinstance(exam, Exam):
+            exam = Exam.objects.get(pk=exam)
+        key = AnswerKey.for_exam(exam.pk)
+        passing_score = float(exam.passing_score)
+        max_score = GradingService._decimal(key.max_score)
+
+        graded = 0
+        submissions = iter(submissions)
+        while chunk := list(islice(submissions, chunk_size)):
+            candidate_ids, selections = zip(*chunk)
+            scores, correct_counts = key.score(key.encode(selections))
+            percentages = (scores / key.max_score * 100).round(2) if key.max_score else scores * 0
+            graded_at = timezone.now()
+
+            results = [
+                ExamResult(exam=exam, candidate_id=candidate_id, score=GradingService._decimal(score),
+                           max_score=max_score, percentage=GradingService._decimal(percentage),
+                           correct_count=int(correct_count), passed=bool(percentage >= passing_score),
+                           graded_at=graded_at)
+                for candidate_id, score, percentage, correct_count
+                in zip(candidate_ids, scores.tolist(), percentages.tolist(), correct_counts.tolist())
+            ]
+            with transaction.atomic():
+                ExamResult.objects.bulk_create(
+                    results, batch_size=GradingService.BULK_BATCH_SIZE, update_conflicts=True,
+                    unique_fields=['exam', 'candidate'], update_fields=GradingService.RESULT_FIELDS,
+                )
+            graded += len(results)
+        return graded
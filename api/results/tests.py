@@ -1,3 +1,81 @@
+from decimal import Decimal
+
 from django.test import TestCase
 
-# Create your tests here.
+from api.exams.models import Exam, Question, QuestionOption
+from api.results.grading import AnswerKey
+from api.results.models import ExamResult
+from api.results.services import GradingService
+from api.users.models import User
+
+
+class GradingEngineTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create(
+            username='admin', email='admin@example.com', first_name='Ada', last_name='Admin', role='admin'
+        )
+        self.candidates = [
+            User.objects.create(username=f"candidate{i}", email=f"candidate{i}@example.com",
+                                first_name='Cand', last_name=str(i), role='candidate')
+            for i in range(3)
+        ]
+        self.exam = Exam.objects.create(title='Exam', created_by=self.admin, duration_minutes=60, passing_score=60)
+        self.single = self.add_question(0, 'multiple_choice', points=2, correct=[0])
+        self.multi = self.add_question(1, 'multiple_choice', points=3, correct=[1, 2])
+        self.true_false = self.add_question(2, 'true_false', points=1, correct=[0], options=2)
+        self.essay = self.add_question(3, 'essay', points=10, correct=[0])
+
+    def add_question(self, order_index, question_type, points, correct, options=4):
+        question = Question.objects.create(exam=self.exam, question_text=f"Q{order_index}",
+                                           question_type=question_type, points=points, order_index=order_index)
+        return QuestionOption.objects.bulk_create([
+            QuestionOption(question=question, option_text=f"O{o}", is_correct=o in correct, order_index=o)
+            for o in range(options)
+        ])
+
+    def test_answer_key_covers_objective_questions_only(self):
+        with self.assertNumQueries(1):
+            key = AnswerKey.for_exam(self.exam.id)
+        self.assertEqual(key.question_count, 3)
+        self.assertEqual(key.option_count, 10)
+        self.assertEqual(key.max_score, 6)
+
+    def test_questions_need_an_exact_match(self):
+        key = AnswerKey.for_exam(self.exam.id)
+        selections = [
+            [self.single[0].id, self.multi[1].id, self.multi[2].id, self.true_false[0].id],
+            [self.single[0].id, self.multi[1].id, self.true_false[1].id],
+            [self.single[1].id, self.multi[1].id, self.multi[2].id, self.multi[3].id],
+            [],
+        ]
+        scores, correct_counts = key.score(key.encode(selections))
+        self.assertEqual(scores.tolist(), [6, 2, 0, 0])
+        self.assertEqual(correct_counts.tolist(), [3, 1, 0, 0])
+
+    def test_string_ids_and_unknown_options(self):
+        key = AnswerKey.for_exam(self.exam.id)
+        selections = [[str(self.single[0].id), str(self.essay[0].id), 'not-an-option']]
+        scores, _ = key.score(key.encode(selections))
+        self.assertEqual(scores.tolist(), [2])
+
+    def test_grade_exam_upserts_results(self):
+        submissions = [
+            (self.candidates[0].id, [self.single[0].id, self.multi[1].id, self.multi[2].id]),
+            (self.candidates[1].id, [self.single[0].id]),
+        ]
+        self.assertEqual(GradingService.grade_exam(self.exam, submissions, chunk_size=1), 2)
+
+        first = ExamResult.objects.get(exam=self.exam, candidate=self.candidates[0])
+        self.assertEqual(first.score, Decimal('5.00'))
+        self.assertEqual(first.max_score, Decimal('6.00'))
+        self.assertEqual(first.percentage, Decimal('83.33'))
+        self.assertEqual(first.correct_count, 2)
+        self.assertTrue(first.passed)
+        self.assertFalse(ExamResult.objects.get(exam=self.exam, candidate=self.candidates[1]).passed)
+
+        # Re-grading replaces the row instead of adding a second one
+        GradingService.grade_exam(self.exam.id, [(self.candidates[1].id, [self.single[0].id, self.multi[1].id,
+                                                                        self.multi[2].id, self.true_false[0].id])])
+        self.assertEqual(ExamResult.objects.filter(exam=self.exam).count(), 2)
+        self.assertEqual(ExamResult.objects.get(exam=self.exam, candidate=self.candidates[1]).score,
+                         Decimal('6.00'))
@@ -0,0 +1,47 @@
+import json
+
+from django.http import JsonResponse
+from django.views import View
+from rest_framework.exceptions import APIException, ParseError
+from rest_framework.utils.encoders import JSONEncoder
+
+from api.core.exceptions.exception_handlers import custom_exception_handler
+from api.core.responses import success_json
+from api.users.dtos import LoginDTO
+from api.users.login import login_pool
+from api.users.services import UserService
+
+
+class AsyncLoginView(View):
+    """Login with a username or email address and a password.
+
+    Hashing and token issuance run in ``login_pool``, so a burst of logins neither holds up the
+    event loop serving other endpoints nor queues without bound: once the pool is saturated
+    the answer is 503 with ``Retry-After``. Accepts a JSON or form body and answers with the
+    same envelope and token payload the DRF views use; errors go through
+    ``custom_exception_handler`` like theirs.
+    """
+    http_method_names = ['post']
+    # Headers DRF's exception handler may set that the JSON response has to carry over
+    ERROR_HEADERS = ('Retry-After', 'WWW-Authenticate')
+
+    async def post(self, request):
+        try:
+            try:
+                data = json.loads(request.body or b'{}') if request.content_type == 'application/json' else request.POST
+            except ValueError as exc:
+                raise ParseError('JSON parse error - %s' % exc)
+            if not isinstance(data, dict):
+                # Same wording as DRF serializers give a non-object body
+                raise ParseError(f"Invalid data. Expected a dictionary, but got {type(data).__name__}.")
+            dto = LoginDTO(username=data.get("username"), password=data.get("password"))
+            tokens = await login_pool.run(UserService.authenticate_user, dto)
+        except APIException as exc:
+            return self.handle_exception(request, exc)
+        # DRF's encoder, so token lifetimes render as seconds like everywhere else
+        return success_json(tokens, "User logged in successfully", encoder=JSONEncoder)
+
+    def handle_exception(self, request, exc):
+        handled = custom_exception_handler(exc, {'view': self, 'request': request})
+        headers = {name: handled[name] for name in self.ERROR_HEADERS if handled.has_header(name)}
+        return JsonResponse(handled.data, status=handled.status_code, headers=headers, encoder=JSONEncoder)
@@ -2,22 +2,33 @@
 
 from django.contrib.auth.backends import ModelBackend
 from django.contrib.auth import get_user_model
+from django.db.models import Q
 
 User = get_user_model()
 
 class EmailOrUsernameBackend(ModelBackend):
+    """Log in with a username or an email address.
+
+    One query finds the account either way, and the password is hashed exactly once per
+    attempt, also when no account matches, so unknown accounts can't be told apart by timing.
+    Permissions come from ``ModelBackend``.
+    """
+
     def authenticate(self, request, username=None, password=None, **kwargs):
-        user = None
-        try:
-            # Try fetching by username
-            user = User.objects.get(username=username)
-        except User.DoesNotExist:
-            # Try fetching by email
-            try:
-                user = User.objects.get(email=username)
-            except User.DoesNotExist:
-                return None
+        if username is None:
+            username = kwargs.get(User.USERNAME_FIELD)
+        if username is None or password is None:
+            return None
+
+        # A username that is also someone else's email address logs in the username's owner
+        users = sorted(User.objects.filter(Q(username=username) | Q(email=username))[:2],
+                       key=lambda user: user.username != username)
+        if not users:
+            User().set_password(password)
+            return None
 
-        if user and user.check_password(password):
+        # check_password() also rehashes the password when the configured hasher cost changed
+        user = users[0]
+        if user.check_password(password) and self.user_can_authenticate(user):
             return user
         return None
@@ -0,0 +1,124 @@
+import threading
+import time
+from collections import OrderedDict
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+
+from api.users.models import User
+
+ROLE_CLAIM = 'role'
+TOKEN_VERSION_CLAIM = 'token_version'
+
+# Everything but the password hash, which requests never need; it stays deferred on the principal
+PRINCIPAL_FIELDS = [field.attname for field in User._meta.concrete_fields if field.attname != 'password']
+
+
+class PrincipalCache:
+    """Process-local LRU of the user rows behind access tokens, each kept for ``TTL_SECONDS``.
+
+    Saving or deleting a user drops its entry in the process that made the change; other
+    processes see the change once their entry expires.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+
+    @staticmethod
+    def key(user_id):
+        return str(user_id)
+
+    def get(self, user_id):
+        key = self.key(user_id)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, values = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return values
+
+    def set(self, user_id, values):
+        config = settings.AUTH_PRINCIPAL_CACHE
+        with self._lock:
+            self._entries[self.key(user_id)] = (time.monotonic() + config['TTL_SECONDS'], values)
+            self._entries.move_to_end(self.key(user_id))
+            while len(self._entries) > config['MAX_ENTRIES']:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._entries.pop(self.key(user_id), None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def load(self, user_id):
+        """Cached row of ``user_id``, read from the database on a miss; ``None`` if there is no such user"""
+        values = self.get(user_id)
+        if values is None:
+            values = User.objects.filter(pk=user_id).values(*PRINCIPAL_FIELDS).first()
+            if values is not None:
+                self.set(user_id, values)
+        return values
+
+    async def aload(self, user_id):
+        values = self.get(user_id)
+        if values is None:
+            values = await User.objects.filter(pk=user_id).values(*PRINCIPAL_FIELDS).afirst()
+            if values is not None:
+                self.set(user_id, values)
+        return values
+
+
+principal_cache = PrincipalCache()
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """``JWTAuthentication`` that resolves the user from ``principal_cache`` instead of a query
+    per request.
+
+    Tokens issued by ``UserService.issue_tokens`` carry the user's role and token version, and
+    are accepted only while both still match the user: changing the role or revoking tokens
+    (which bumps the version) invalidates every token issued before. Tokens without these
+    claims go through the stock database lookup.
+    """
+
+    def get_user(self, validated_token):
+        if TOKEN_VERSION_CLAIM not in validated_token:
+            return super().get_user(validated_token)
+        return self.principal(validated_token, principal_cache.load(self.user_id(validated_token)))
+
+    async def aget_user(self, validated_token):
+        if TOKEN_VERSION_CLAIM not in validated_token:
+            return await sync_to_async(super().get_user)(validated_token)
+        return self.principal(validated_token, await principal_cache.aload(self.user_id(validated_token)))
+
+    @staticmethod
+    def user_id(validated_token):
+        try:
+            return validated_token[jwt_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken("Token contained no recognizable user identification")
+
+    @staticmethod
+    def principal(validated_token, values):
+        if values is None:
+            raise AuthenticationFailed("User not found", code="user_not_found")
+        if not values['is_active']:
+            raise AuthenticationFailed("User is inactive", code="user_inactive")
+        if (values['token_version'] != validated_token[TOKEN_VERSION_CLAIM]
+                or values['role'] != validated_token.get(ROLE_CLAIM)):
+            raise AuthenticationFailed("Token has been revoked", code="token_revoked")
+        # A fresh instance per request, so nothing a view sets on it leaks into the cache
+        return User.from_db(DEFAULT_DB_ALIAS, PRINCIPAL_FIELDS, [values[name] for name in PRINCIPAL_FIELDS])
@@ -0,0 +1,139 @@
+import math
+import threading
+from hashlib import blake2b
+
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+
+from api.core.cache import is_shared_cache
+
+
+class BloomFilter:
+    """Fixed-size bloom filter over strings: no false negatives, about ``error_rate`` false
+    positives once ``capacity`` items are in"""
+
+    def __init__(self, capacity, error_rate=0.001):
+        self.capacity = capacity
+        self.size = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def positions(self, item):
+        # Double hashing: two 64-bit halves of one digest generate all the positions
+        digest = blake2b(item.encode(), digest_size=16).digest()
+        first, second = int.from_bytes(digest[:8]), int.from_bytes(digest[8:]) | 1
+        return [(first + i * second) % self.size for i in range(self.hashes)]
+
+    def add(self, item):
+        for position in self.positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self.positions(item))
+
+    def __len__(self):
+        return self.count
+
+
+class TokenBlacklistFilter:
+    """Process-local bloom filter of blacklisted refresh token ids, in front of the blacklist table.
+
+    A token the filter doesn't contain is certainly not blacklisted, so the common case needs
+    no query; only filter hits (blacklisted tokens and rare false positives) go to the database.
+    The filter is built from the table on first use in each process. Blacklist writes add to
+    the local filter at once and, after commit, bump a version in the shared cache; other
+    processes see the new version on their next check and read the rows added since their
+    last refresh. While any write is between its insert and that bump, every check goes to
+    the table, since the new rows may already be committed but not yet in other filters.
+
+    Other processes only hear about writes through the ``default`` cache, so the filter is
+    used only when that cache is shared; with a process-local one every check queries the table.
+    """
+    VERSION_KEY = 'token-blacklist:version'
+    # Count of blacklist writes not yet followed by a version bump
+    PENDING_KEY = 'token-blacklist:pending'
+    # A write whose transaction rolls back never clears its mark; this bounds how long it stays
+    PENDING_TIMEOUT = 60
+    MIN_CAPACITY = 10000
+    ERROR_RATE = 0.001
+    # Re-read this many rows below the last id seen, so rows committed out of id order aren't missed
+    REFRESH_OVERLAP = 1000
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.filter = None
+        self.version = None
+        self.watermark = 0
+
+    def might_contain(self, jti):
+        if not is_shared_cache():
+            return True
+        return not self.sync() or jti in self.filter
+
+    def sync(self):
+        """Bring the filter up to date; returns False while a blacklist write is pending"""
+        state = cache.get_many([self.VERSION_KEY, self.PENDING_KEY])
+        version = state.get(self.VERSION_KEY)
+        with self._lock:
+            if self.filter is None:
+                self.rebuild(version)
+            elif version != self.version:
+                self.refresh(version)
+        return not state.get(self.PENDING_KEY)
+
+    def rebuild(self, version):
+        rows = list(BlacklistedToken.objects.filter(token__expires_at__gt=timezone.now())
+                    .values_list('id', 'token__jti'))
+        self.filter = BloomFilter(max(self.MIN_CAPACITY, 2 * len(rows)), self.ERROR_RATE)
+        self.load(rows, version)
+
+    def refresh(self, version):
+        rows = list(BlacklistedToken.objects.filter(id__gt=self.watermark - self.REFRESH_OVERLAP)
+                    .values_list('id', 'token__jti'))
+        if len(self.filter) + len(rows) > self.filter.capacity:
+            self.rebuild(version)
+        else:
+            self.load(rows, version)
+
+    def load(self, rows, version):
+        for row_id, jti in rows:
+            self.filter.add(jti)
+            self.watermark = max(self.watermark, row_id)
+        self.version = version
+
+    def add(self, jtis):
+        """Record newly blacklisted token ids; call inside the transaction that blacklists them"""
+        with self._lock:
+            if self.filter is not None:
+                for jti in jtis:
+                    self.filter.add(jti)
+        self.increment(self.PENDING_KEY, timeout=self.PENDING_TIMEOUT)
+        transaction.on_commit(self.bump_version)
+
+    def bump_version(self):
+        self.increment(self.VERSION_KEY, timeout=None)
+        try:
+            cache.decr(self.PENDING_KEY)
+        except ValueError:  # expired meanwhile
+            pass
+
+    @staticmethod
+    def increment(key, timeout):
+        cache.add(key, 0, timeout=timeout)
+        try:
+            cache.incr(key)
+        except ValueError:  # evicted in between
+            cache.add(key, 1, timeout=timeout)
+
+    def clear(self):
+        with self._lock:
+            self.filter = None
+            self.version = None
+            self.watermark = 0
+
+
+blacklist_filter = TokenBlacklistFilter()
@@ -0,0 +1,40 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.hashers import PBKDF2PasswordHasher, make_password
+
+
+class ConfigurablePBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    """``PBKDF2PasswordHasher`` whose cost is ``settings.PASSWORD_HASH_ITERATIONS``.
+
+    It keeps Django's algorithm name, so existing hashes verify as before, and a successful
+    login rehashes a password stored at any other cost to the configured one.
+    """
+
+    @property
+    def iterations(self):
+        return settings.PASSWORD_HASH_ITERATIONS or PBKDF2PasswordHasher.iterations
+
+
+class PasswordHashPool:
+    """Hash batches of passwords on a pool of threads; use it as a context manager.
+
+    Like the login pool, it relies on PBKDF2 releasing the GIL: threads hash in parallel on
+    every core, without worker processes that would import Django again and miss runtime
+    settings.
+    """
+
+    def __init__(self, workers=None):
+        self.workers = workers or settings.USER_PROVISIONING['HASH_WORKERS']
+        self.executor = None
+
+    def __enter__(self):
+        self.executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='password-hash')
+        return self
+
+    def __exit__(self, *exc_info):
+        self.executor.shutdown()
+
+    def hash(self, passwords):
+        """Hashes in input order; ``None`` gives an unusable password"""
+        return list(self.executor.map(make_password, passwords))
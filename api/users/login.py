@@ -0,0 +1,105 @@
+import asyncio
+import atexit
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections
+
+from api.core.exceptions.exceptions import ServiceUnavailableException
+from api.users.models import User
+
+logger = logging.getLogger(__name__)
+
+
+class LoginPool:
+    """Bounded worker pool that runs the CPU-heavy part of logins off the event loop.
+
+    PBKDF2 releases the GIL while hashing, so worker threads hash in parallel and the loop
+    keeps serving other requests. At most ``WORKERS + MAX_QUEUED`` logins are admitted at once;
+    beyond that callers get ``ServiceUnavailableException`` (503 + ``Retry-After``) straight
+    away instead of a growing queue.
+    """
+
+    def __init__(self, workers=None, max_queued=None, retry_after=None):
+        config = settings.LOGIN_POOL
+        self.workers = workers or config['WORKERS']
+        self.max_queued = config['MAX_QUEUED'] if max_queued is None else max_queued
+        self.retry_after = retry_after or config['RETRY_AFTER_SECONDS']
+        self.slots = threading.BoundedSemaphore(self.workers + self.max_queued)
+        self.executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='login')
+
+    async def run(self, func, *args):
+        if not self.slots.acquire(blocking=False):
+            raise ServiceUnavailableException("Too many logins in progress, try again shortly",
+                                              wait=self.retry_after)
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self.executor, self.call, func, *args)
+        finally:
+            self.slots.release()
+
+    @staticmethod
+    def call(func, *args):
+        # Worker threads live outside the request cycle, so recycle connections like it does
+        close_old_connections()
+        try:
+            return func(*args)
+        finally:
+            close_old_connections()
+
+
+class LastLoginWriter:
+    """Collects ``last_login`` timestamps and writes them in batches from a background thread.
+
+    A login storm then costs one UPDATE per batch instead of a write per login. The thread
+    starts with the first recorded login and flushes every ``LAST_LOGIN_FLUSH_SECONDS``, or
+    sooner once ``LAST_LOGIN_BATCH_SIZE`` logins are pending; the rest is flushed at exit.
+    """
+
+    def __init__(self, interval=None, batch_size=None):
+        config = settings.LOGIN_POOL
+        self.interval = interval or config['LAST_LOGIN_FLUSH_SECONDS']
+        self.batch_size = batch_size or config['LAST_LOGIN_BATCH_SIZE']
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._wakeup = threading.Event()
+        self._thread = None
+
+    def record(self, user_id, when):
+        with self._lock:
+            self._pending[user_id] = when
+            full = len(self._pending) >= self.batch_size
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='last-login-writer', daemon=True)
+                self._thread.start()
+                atexit.register(self.flush)
+        if full:
+            self._wakeup.set()
+
+    def flush(self):
+        """Write everything pending; returns the number of users updated"""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return 0
+        User.objects.bulk_update([User(pk=user_id, last_login=when) for user_id, when in pending.items()],
+                                 ['last_login'], batch_size=self.batch_size)
+        return len(pending)
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.interval)
+            self._wakeup.clear()
+            close_old_connections()
+            try:
+                self.flush()
+            except Exception:
+                # Keep the thread alive; the batch is lost, which only costs some last_login accuracy
+                logger.exception("Failed to write last_login batch")
+            finally:
+                close_old_connections()
+
+
+login_pool = LoginPool()
+last_login_writer = LastLoginWriter()
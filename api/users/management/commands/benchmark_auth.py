@@ -0,0 +1,46 @@
+import time
+import uuid
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.client import RequestFactory
+from django.test.utils import CaptureQueriesContext
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+from api.users.authentication.jwt import CachedJWTAuthentication, principal_cache
+from api.users.models import User
+from api.users.services import UserService
+
+
+class Command(BaseCommand):
+    help = ("Compare authenticating a bearer token with the stock JWTAuthentication and with "
+            "CachedJWTAuthentication: time and queries per request. Uses a throwaway user inside a "
+            "transaction that is rolled back.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        count = options['requests']
+        with transaction.atomic():
+            suffix = uuid.uuid4().hex[:8]
+            user = User.objects.create(username=f"benchmark-{suffix}", email=f"benchmark-{suffix}@example.com",
+                                       first_name='Bench', last_name='Mark', role='candidate')
+            token = UserService.issue_tokens(user).access_token
+            request = RequestFactory().get('/', HTTP_AUTHORIZATION=f"Bearer {token}")
+            principal_cache.invalidate(user.pk)
+
+            for name, authenticator in (('stock', JWTAuthentication()), ('cached', CachedJWTAuthentication())):
+                elapsed, queries = self.measure(authenticator, request, count)
+                self.stdout.write(f"{name:<8} {elapsed / count * 1e6:8.1f} us/request  "
+                                  f"{queries / count:.3f} queries/request")
+            transaction.set_rollback(True)
+
+    @staticmethod
+    def measure(authenticator, request, count):
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            for _ in range(count):
+                authenticator.authenticate(request)
+            elapsed = time.perf_counter() - started
+        return elapsed, len(queries)
@@ -0,0 +1,48 @@
+import time
+import uuid
+
+from django.conf import settings
+from django.contrib.auth import authenticate
+from django.contrib.auth.hashers import get_hasher
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+
+from api.users.models import User
+
+
+class Command(BaseCommand):
+    help = ("Measure password logins per second on one core: a correct password, a wrong password "
+            "and an unknown account, with the configured hasher cost or --iterations. Uses a "
+            "throwaway user inside a transaction that is rolled back.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--logins', type=int, default=20)
+        parser.add_argument('--iterations', type=int, default=settings.PASSWORD_HASH_ITERATIONS,
+                            help="PBKDF2 iterations to measure instead of PASSWORD_HASH_ITERATIONS")
+
+    def handle(self, *args, **options):
+        count = options['logins']
+        with override_settings(PASSWORD_HASH_ITERATIONS=options['iterations']), transaction.atomic():
+            suffix = uuid.uuid4().hex[:8]
+            password = uuid.uuid4().hex
+            User.objects.create_user(username=f"benchmark-{suffix}", email=f"benchmark-{suffix}@example.com",
+                                     password=password, first_name='Bench', last_name='Mark', role='candidate')
+            self.stdout.write(f"pbkdf2_sha256 iterations: {get_hasher().iterations}")
+
+            cases = [
+                ('username, correct password', f"benchmark-{suffix}", password),
+                ('email, correct password', f"benchmark-{suffix}@example.com", password),
+                ('wrong password', f"benchmark-{suffix}", 'wrong'),
+                ('unknown account', f"nobody-{suffix}", password),
+            ]
+            for label, username, attempt in cases:
+                with CaptureQueriesContext(connection) as queries:
+                    started = time.perf_counter()
+                    for _ in range(count):
+                        authenticate(username=username, password=attempt)
+                    elapsed = time.perf_counter() - started
+                self.stdout.write(f"{label:<28} {count / elapsed:8.1f} logins/s  "
+                                  f"{len(queries) / count:.1f} queries/login")
+            transaction.set_rollback(True)
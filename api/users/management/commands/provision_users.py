@@ -0,0 +1,43 @@
+import json
+import sys
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from api.core.exceptions.exceptions import BadRequestException
+from api.users.services import UserProvisioningService
+
+
+class Command(BaseCommand):
+    help = ("Create users, with candidate profiles, from a CSV file (with a header row) or NDJSON "
+            "(one JSON object per line). Rows that fail are listed on stderr and skipped.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="Users file, or - for stdin")
+        parser.add_argument('--format', choices=UserProvisioningService.FORMATS,
+                            help="Defaults to the file extension")
+        parser.add_argument('--chunk-size', type=int, default=settings.USER_PROVISIONING['CHUNK_SIZE'])
+        parser.add_argument('--workers', type=int, default=settings.USER_PROVISIONING['HASH_WORKERS'],
+                            help="Threads hashing passwords")
+
+    def handle(self, *args, **options):
+        format = options['format'] or Path(options['path']).suffix.lstrip('.').lower()
+        if format not in UserProvisioningService.FORMATS:
+            raise CommandError("Pass --format csv or --format ndjson")
+
+        source = sys.stdin if options['path'] == '-' else open(options['path'], encoding='utf-8', newline='')
+        try:
+            report = UserProvisioningService.provision(source, format, chunk_size=options['chunk_size'],
+                                                       workers=options['workers'])
+        except BadRequestException as e:
+            raise CommandError(str(e.detail))
+        finally:
+            if source is not sys.stdin:
+                source.close()
+
+        for failure in report['failed']:
+            self.stderr.write(f"line {failure['line']}: {json.dumps(failure['errors'])}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {report['created']} users, {len(report['failed'])} rows failed"
+        ))
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-18 10:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('users', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['role', 'first_name', 'last_name', 'id'], name='user_role_name_idx'),
+        ),
+    ]
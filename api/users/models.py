@@ -13,6 +13,14 @@ class User(AbstractUser):
     email = models.EmailField("email address", unique=True)
     role = models.CharField(max_length=20, choices=ROLE_CHOICES)
     email_verified = models.BooleanField(default=False)
+    # Embedded in issued tokens; bumping it revokes every token issued before
+    token_version = models.PositiveIntegerField(default=0)
+
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            # Role listings in keyset order (e.g. available proctors)
+            models.Index(fields=['role', 'id'], name='user_role_id_idx'),
+        ]
 
 class CandidateProfile(models.Model):
     phone_validator = PhoneNumberValidator()
@@ -0,0 +1,74 @@
+from django.urls import reverse
+from drf_spectacular.contrib.rest_framework_simplejwt import SimpleJWTScheme
+
+
+class CachedJWTScheme(SimpleJWTScheme):
+    """Documents ``CachedJWTAuthentication`` as the same ``jwtAuth`` bearer scheme as simplejwt's"""
+    target_class = 'api.users.authentication.jwt.CachedJWTAuthentication'
+
+
+LOGIN_REQUEST = {
+    "type": "object",
+    "properties": {
+        "username": {"type": "string", "example": "john.doe/john.doe@example.com"},
+        "password": {"type": "string", "example": "secret123"}
+    },
+    "required": ["username", "password"]
+}
+
+ERROR_RESPONSE = {
+    "type": "object",
+    "properties": {
+        "status": {"type": "string", "example": "error"},
+        "message": {"type": "string"},
+        "errors": {"type": "object", "additionalProperties": {}}
+    }
+}
+
+
+def document_login(result, generator, request, public):
+    """Postprocessing hook adding ``AsyncLoginView``: spectacular only collects DRF views, and
+    the login endpoint is a plain async Django view"""
+    result['paths'].setdefault(reverse('user-login'), {})['post'] = {
+        "operationId": "user_login_create",
+        "description": "Login using username or email address",
+        "tags": ["Auth"],
+        "requestBody": {
+            "content": {
+                media_type: {"schema": LOGIN_REQUEST}
+                for media_type in ("application/json", "application/x-www-form-urlencoded", "multipart/form-data")
+            },
+            "required": True
+        },
+        "security": [{}],
+        "responses": {
+            "200": {
+                "description": "Login using username or email address",
+                "content": {"application/json": {"schema": {
+                    "type": "object",
+                    "properties": {
+                        "status": {"type": "string", "example": "success"},
+                        "message": {"type": "string"},
+                        "data": {
+                            "type": "object",
+                            "properties": {
+                                "access": {"type": "string"},
+                                "refresh": {"type": "string"},
+                                "access_lifetime": {"type": "string", "description": "Seconds"},
+                                "refresh_lifetime": {"type": "string", "description": "Seconds"},
+                                "user": {"type": "object", "additionalProperties": {}}
+                            }
+                        }
+                    }
+                }}}
+            },
+            "400": {"description": "Malformed request body",
+                    "content": {"application/json": {"schema": ERROR_RESPONSE}}},
+            "401": {"description": "Invalid credentials",
+                    "content": {"application/json": {"schema": ERROR_RESPONSE}}},
+            "503": {"description": "Too many logins in progress; retry after the given number of seconds",
+                    "headers": {"Retry-After": {"schema": {"type": "integer"}}},
+                    "content": {"application/json": {"schema": ERROR_RESPONSE}}}
+        }
+    }
+    return result
@@ -1,9 +1,15 @@
+from django.contrib.auth.validators import UnicodeUsernameValidator
 from rest_framework import serializers
+from rest_framework_simplejwt.serializers import TokenBlacklistSerializer, TokenRefreshSerializer
 
+from api.core.choices import ROLE_CHOICES
+from api.core.metrics import TimedSerializerMixin
+from api.core.validators import PhoneNumberValidator
 from api.users.models import User
+from api.users.tokens import FilteredRefreshToken
 
 
-class UserBaseSerializer(serializers.ModelSerializer):
+class UserBaseSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = User
         fields = ['id', 'username', 'first_name', 'last_name', 'email', 'role']
@@ -13,3 +19,26 @@ class UserCreateSerializer(UserBaseSerializer):
 
     class Meta(UserBaseSerializer.Meta):
         fields = UserBaseSerializer.Meta.fields + ['password']
+
+
+class UserProvisionSerializer(TimedSerializerMixin, serializers.Serializer):
+    """One row of a bulk provisioning file. Usernames and emails are checked for clashes per
+    chunk by ``UserProvisioningService``, not per row here."""
+    username = serializers.CharField(max_length=150, validators=[UnicodeUsernameValidator()])
+    email = serializers.EmailField(max_length=254)
+    first_name = serializers.CharField(max_length=150)
+    last_name = serializers.CharField(max_length=150)
+    role = serializers.ChoiceField(choices=ROLE_CHOICES, default='candidate')
+    # Without one the account gets an unusable password
+    password = serializers.CharField(required=False, write_only=True)
+    # Stored on the candidate profile; ignored for other roles
+    phone_number = serializers.CharField(max_length=12, required=False, validators=[PhoneNumberValidator()])
+    organisation = serializers.CharField(max_length=100, required=False)
+
+
+class FilteredTokenRefreshSerializer(TimedSerializerMixin, TokenRefreshSerializer):
+    token_class = FilteredRefreshToken
+
+
+class FilteredTokenBlacklistSerializer(TimedSerializerMixin, TokenBlacklistSerializer):
+    token_class = FilteredRefreshToken
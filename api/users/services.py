@@ -1,13 +1,24 @@
-from django.contrib.auth.models import update_last_login
+import csv
+import json
 
-from .models import User
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+
+from .models import CandidateProfile, User
 from .dtos import CreateUserDTO, LoginDTO
 from django.contrib.auth.hashers import make_password
-from api.core.exceptions.exceptions import ConflictException
-from rest_framework_simplejwt.tokens import RefreshToken
+from api.core.exceptions.exceptions import BadRequestException, ConflictException
 from django.contrib.auth import authenticate
 from api.core.exceptions.exceptions import UnauthorizedException
-from .serializers import UserBaseSerializer
+from .authentication.jwt import ROLE_CLAIM, TOKEN_VERSION_CLAIM, principal_cache
+from .blacklist import blacklist_filter
+from .hashers import PasswordHashPool
+from .login import last_login_writer
+from .serializers import UserBaseSerializer, UserProvisionSerializer
+from .tokens import FilteredRefreshToken
 
 
 class UserService:
@@ -31,8 +42,9 @@ class UserService:
         if not user:
             raise UnauthorizedException("Invalid credentials")
 
-        refresh = RefreshToken.for_user(user)
-        update_last_login(None, user)
+        refresh = UserService.issue_tokens(user)
+        # Written in batches off the request path
+        last_login_writer.record(user.pk, timezone.now())
         return {
             "access": str(refresh.access_token),
             "refresh": str(refresh),
@@ -40,3 +52,138 @@ class UserService:
             "refresh_lifetime": refresh.lifetime,
             "user" : UserBaseSerializer(user).data
         }
+
+    @staticmethod
+    def issue_tokens(user: User) -> FilteredRefreshToken:
+        """Refresh token (and, through it, access tokens) carrying the claims
+        ``CachedJWTAuthentication`` checks instead of loading the user"""
+        refresh = FilteredRefreshToken.for_user(user)
+        refresh[ROLE_CLAIM] = user.role
+        refresh[TOKEN_VERSION_CLAIM] = user.token_version
+        return refresh
+
+    @staticmethod
+    def revoke_tokens(user: User) -> None:
+        """Invalidate every access and refresh token issued to ``user`` so far"""
+        with transaction.atomic():
+            User.objects.filter(pk=user.pk).update(token_version=F('token_version') + 1)
+            outstanding = list(OutstandingToken.objects.filter(user_id=user.pk, blacklistedtoken__isnull=True))
+            BlacklistedToken.objects.bulk_create([BlacklistedToken(token=token) for token in outstanding],
+                                                 ignore_conflicts=True)
+            # bulk_create sends no post_save either
+            blacklist_filter.add([token.jti for token in outstanding])
+        principal_cache.invalidate(user.pk)
+
+
+class UserProvisioningService:
+    """Create users, with candidate profiles, in bulk from CSV or NDJSON.
+
+    Rows are validated as they are read and written in chunks. Each chunk costs one query
+    for usernames and emails that are already taken, a parallel round of password hashing and
+    one ``bulk_create`` per table. Rows that are invalid or clash with an existing user or an
+    earlier row are reported by line number and skipped; the rest are created.
+    """
+    FORMATS = ('csv', 'ndjson')
+
+    @staticmethod
+    def provision(lines, format, chunk_size=None, workers=None):
+        """Create the users in ``lines`` (str or bytes); returns ``{'created': n, 'failed': [...]}``"""
+        chunk_size = chunk_size or settings.USER_PROVISIONING['CHUNK_SIZE']
+        report = {'created': 0, 'failed': []}
+        rows = []
+        with PasswordHashPool(workers) as hash_pool:
+            for number, data, errors in UserProvisioningService.read_rows(lines, format):
+                if errors is None:
+                    serializer = UserProvisionSerializer(data=data)
+                    if serializer.is_valid():
+                        rows.append((number, serializer.validated_data))
+                    else:
+                        errors = serializer.errors
+                if errors is not None:
+                    report['failed'].append({'line': number, 'errors': errors})
+                if len(rows) >= chunk_size:
+                    UserProvisioningService._create_chunk(rows, hash_pool, report)
+                    rows.clear()
+            if rows:
+                UserProvisioningService._create_chunk(rows, hash_pool, report)
+        return report
+
+    @staticmethod
+    def read_rows(lines, format):
+        """Yield ``(line number, row, errors)``; ``errors`` is set when the line can't be parsed"""
+        if format not in UserProvisioningService.FORMATS:
+            raise BadRequestException(f"Unsupported format '{format}', use one of: "
+                                      f"{', '.join(UserProvisioningService.FORMATS)}")
+        try:
+            lines = (line.decode('utf-8') if isinstance(line, bytes) else line for line in lines)
+            if format == 'csv':
+                reader = csv.DictReader(lines)
+                for row in reader:
+                    # Empty cells mean "not given"; cells beyond the header are ignored
+                    yield reader.line_num, {k: v for k, v in row.items() if k is not None and v}, None
+                return
+            for number, line in enumerate(lines, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    row = json.loads(line)
+                except ValueError as e:
+                    yield number, None, {'non_field_errors': [f"Invalid JSON: {e}"]}
+                    continue
+                if isinstance(row, dict):
+                    yield number, row, None
+                else:
+                    yield number, None, {'non_field_errors': ["Each line must be a JSON object"]}
+        except (UnicodeDecodeError, csv.Error) as e:
+            raise BadRequestException(f"The file can't be read: {e}")
+
+    @staticmethod
+    def _reject_taken(rows, report):
+        """Split off rows whose username or email is taken, by an existing user or an earlier row"""
+        usernames = {data['username'] for _, data, _ in rows}
+        emails = {data['email'] for _, data, _ in rows}
+        taken = list(User.objects.filter(Q(username__in=usernames) | Q(email__in=emails))
+                     .values_list('username', 'email'))
+        taken_usernames, taken_emails = (set(values) for values in zip(*taken)) if taken else (set(), set())
+
+        accepted = []
+        for number, data, user in rows:
+            errors = {}
+            if data['username'] in taken_usernames:
+                errors['username'] = ["A user with that username already exists."]
+            if data['email'] in taken_emails:
+                errors['email'] = ["A user with that email already exists."]
+            if errors:
+                report['failed'].append({'line': number, 'errors': errors})
+                continue
+            taken_usernames.add(data['username'])
+            taken_emails.add(data['email'])
+            accepted.append((number, data, user))
+        return accepted
+
+    @staticmethod
+    def _create_chunk(rows, hash_pool, report):
+        rows = UserProvisioningService._reject_taken([(number, data, None) for number, data in rows], report)
+        passwords = hash_pool.hash([data.get('password') for _, data, _ in rows])
+        rows = [
+            (number, data, User(username=data['username'], email=data['email'], first_name=data['first_name'],
+                                last_name=data['last_name'], role=data['role'], password=password))
+            for (number, data, _), password in zip(rows, passwords)
+        ]
+        try:
+            UserProvisioningService._insert(rows)
+        except IntegrityError:
+            # A user was created concurrently; the re-check now sees it
+            rows = UserProvisioningService._reject_taken(rows, report)
+            UserProvisioningService._insert(rows)
+        report['created'] += len(rows)
+
+    @staticmethod
+    def _insert(rows):
+        with transaction.atomic():
+            users = User.objects.bulk_create([user for _, _, user in rows])
+            CandidateProfile.objects.bulk_create([
+                CandidateProfile(user=user, phone_number=data.get('phone_number'),
+                                 organisation=data.get('organisation'))
+                for (_, data, _), user in zip(rows, users) if user.role == 'candidate'
+            ])
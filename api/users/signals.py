@@ -0,0 +1,18 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+
+from api.users.authentication.jwt import principal_cache
+from api.users.blacklist import blacklist_filter
+from api.users.models import User
+
+
+@receiver([post_save, post_delete], sender=User)
+def invalidate_principal(sender, instance, **kwargs):
+    principal_cache.invalidate(instance.pk)
+
+
+@receiver(post_save, sender=BlacklistedToken)
+def add_to_blacklist_filter(sender, instance, created, **kwargs):
+    if created:
+        blacklist_filter.add([instance.token.jti])
@@ -1,3 +1,408 @@
-from django.test import TestCase
+import json
+import tempfile
+import uuid
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import authenticate
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from drf_spectacular.generators import SchemaGenerator
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+
+from api.users.authentication.jwt import principal_cache
+from api.users.blacklist import BloomFilter, TokenBlacklistFilter, blacklist_filter
+from api.users.login import LastLoginWriter, LoginPool
+from api.users.models import CandidateProfile, User
+from api.users.services import UserProvisioningService, UserService
+
+
+def patch_login_writer(test):
+    """Give a test its own last_login writer, flushed only when the test asks"""
+    writer = LastLoginWriter(interval=3600)
+    patcher = mock.patch('api.users.services.last_login_writer', writer)
+    patcher.start()
+    test.addCleanup(patcher.stop)
+    test.addCleanup(writer.flush)
+    return writer
+
+
+# Logins run in the login pool's threads, which can't see data inside a test transaction
+@override_settings(PASSWORD_HASH_ITERATIONS=1000)
+class CachedJWTAuthenticationTests(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        principal_cache.clear()
+        patch_login_writer(self)
+        self.user = User.objects.create_user(
+            username='candidate', email='candidate@example.com', password='secret123',
+            first_name='Cat', last_name='Candidate', role='candidate'
+        )
+        self.client = APIClient()
+
+    def login(self):
+        response = self.client.post(reverse('user-login'), {'username': 'candidate', 'password': 'secret123'})
+        self.assertEqual(response.status_code, 200)
+        return response.json()['data']
+
+    def get_me(self, access):
+        return self.client.get(reverse('user-detail'), HTTP_AUTHORIZATION=f"Bearer {access}")
+
+    def test_login_embeds_role_and_token_version(self):
+        access = AccessToken(self.login()['access'])
+        self.assertEqual(access['role'], 'candidate')
+        self.assertEqual(access['token_version'], 0)
+
+    def test_warm_requests_skip_the_user_query(self):
+        access = self.login()['access']
+        with self.assertNumQueries(1):
+            self.assertEqual(self.get_me(access).status_code, 200)
+        with self.assertNumQueries(0):
+            response = self.get_me(access)
+        self.assertEqual(response.json()['data']['email'], 'candidate@example.com')
+
+    def test_principal_does_not_carry_the_password(self):
+        access = self.login()['access']
+        self.get_me(access)
+        principal = principal_cache.get(self.user.pk)
+        self.assertNotIn('password', principal)
+
+    def test_role_change_rejects_earlier_tokens(self):
+        access = self.login()['access']
+        self.get_me(access)
+        self.user.role = 'proctor'
+        self.user.save()
+
+        response = self.get_me(access)
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(self.get_me(self.login()['access']).status_code, 200)
+
+    def test_logout_all_revokes_access_and_refresh_tokens(self):
+        tokens = self.login()
+        response = self.client.post(reverse('logout-all'), HTTP_AUTHORIZATION=f"Bearer {tokens['access']}")
+        self.assertEqual(response.status_code, 200)
+
+        self.assertEqual(self.get_me(tokens['access']).status_code, 401)
+        self.assertEqual(BlacklistedToken.objects.filter(token__user=self.user).count(), 1)
+        self.assertEqual(self.client.post(reverse('token-refresh'), {'refresh': tokens['refresh']}).status_code, 401)
+        self.assertEqual(self.get_me(self.login()['access']).status_code, 200)
+
+    def test_deactivated_user_is_rejected(self):
+        access = self.login()['access']
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        principal_cache.clear()
+        self.assertEqual(self.get_me(access).status_code, 401)
+
+    @override_settings(AUTH_PRINCIPAL_CACHE={'TTL_SECONDS': 30, 'MAX_ENTRIES': 10000})
+    def test_entries_expire(self):
+        access = self.login()['access']
+        self.get_me(access)
+        with mock.patch('api.users.authentication.jwt.time.monotonic', return_value=10 ** 9):
+            with self.assertNumQueries(1):
+                self.get_me(access)
+
+    def test_tokens_without_claims_use_the_database(self):
+        access = RefreshToken.for_user(self.user).access_token
+        with self.assertNumQueries(1):
+            self.assertEqual(self.get_me(access).status_code, 200)
+        with self.assertNumQueries(1):
+            self.get_me(access)
+
+
+@override_settings(PASSWORD_HASH_ITERATIONS=1000)
+class EmailOrUsernameBackendTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='candidate', email='candidate@example.com', password='secret123',
+            first_name='Cat', last_name='Candidate', role='candidate'
+        )
+
+    def count_hashes(self):
+        return mock.patch.object(PBKDF2PasswordHasher, 'encode', autospec=True, side_effect=PBKDF2PasswordHasher.encode)
+
+    def test_username_or_email_in_one_query(self):
+        for username in ('candidate', 'candidate@example.com'):
+            with self.assertNumQueries(1):
+                self.assertEqual(authenticate(username=username, password='secret123'), self.user)
+
+    def test_failed_logins_hash_once(self):
+        for username, password in (('candidate', 'wrong'), ('nobody', 'secret123')):
+            with self.count_hashes() as encode, self.assertNumQueries(1):
+                self.assertIsNone(authenticate(username=username, password=password))
+            self.assertEqual(encode.call_count, 1)
+
+    def test_username_wins_over_someone_elses_email(self):
+        other = User.objects.create_user(
+            username='candidate@example.org', email='other@example.com', password='other123',
+            first_name='Oli', last_name='Other', role='candidate'
+        )
+        User.objects.filter(pk=self.user.pk).update(email='candidate@example.org')
+        self.assertEqual(authenticate(username='candidate@example.org', password='other123'), other)
+        self.assertIsNone(authenticate(username='candidate@example.org', password='secret123'))
+
+    def test_inactive_users_cannot_log_in(self):
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        self.assertIsNone(authenticate(username='candidate', password='secret123'))
+
+    def test_login_rehashes_to_the_configured_cost(self):
+        with override_settings(PASSWORD_HASH_ITERATIONS=2000):
+            self.assertEqual(authenticate(username='candidate', password='secret123'), self.user)
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.password.startswith('pbkdf2_sha256$2000$'))
+        self.assertTrue(self.user.check_password('secret123'))
+
+
+@override_settings(PASSWORD_HASH_ITERATIONS=1000)
+class AsyncLoginTests(TransactionTestCase):
+    def setUp(self):
+        principal_cache.clear()
+        self.writer = patch_login_writer(self)
+        self.user = User.objects.create_user(
+            username='candidate', email='candidate@example.com', password='secret123',
+            first_name='Cat', last_name='Candidate', role='candidate'
+        )
+        self.client = APIClient()
+
+    def login(self, **kwargs):
+        return self.client.post(reverse('user-login'), {'username': 'candidate', 'password': 'secret123'}, **kwargs)
+
+    def test_login_payload(self):
+        for format in ('json', 'multipart'):
+            body = self.login(format=format).json()
+            self.assertEqual(body['message'], 'User logged in successfully')
+            self.assertEqual(body['data']['access_lifetime'], '3600.0')
+            self.assertEqual(body['data']['user']['email'], 'candidate@example.com')
+
+    def test_bad_credentials_and_body(self):
+        response = self.client.post(reverse('user-login'), {'username': 'candidate', 'password': 'nope'},
+                                    format='json')
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response.json(), {'status': 'error', 'message': 'Invalid credentials',
+                                           'errors': {'detail': 'Invalid credentials'}})
+        response = self.client.generic('POST', reverse('user-login'), '{', content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['errors'], {'detail': response.json()['message']})
+        for body in ('[]', '"candidate"', 'null'):
+            response = self.client.generic('POST', reverse('user-login'), body, content_type='application/json')
+            self.assertEqual(response.status_code, 400)
+            self.assertTrue(response.json()['message'].startswith('Invalid data. Expected a dictionary'))
+
+    def test_saturated_pool_answers_503(self):
+        pool = LoginPool(workers=1, max_queued=0, retry_after=3)
+        with mock.patch('api.users.async_views.login_pool', pool):
+            pool.slots.acquire()
+            response = self.login(format='json')
+            self.assertEqual(response.status_code, 503)
+            self.assertEqual(response['Retry-After'], '3')
+            pool.slots.release()
+            self.assertEqual(self.login(format='json').status_code, 200)
+
+    def test_last_login_is_written_in_batches(self):
+        other = User.objects.create_user(
+            username='other', email='other@example.com', password='secret123',
+            first_name='Oli', last_name='Other', role='candidate'
+        )
+        self.login(format='json')
+        self.client.post(reverse('user-login'), {'username': 'other', 'password': 'secret123'}, format='json')
+        self.assertIsNone(User.objects.get(pk=self.user.pk).last_login)
+
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.writer.flush(), 2)
+        self.assertEqual(sum(query['sql'].startswith('UPDATE') for query in queries), 1)
+        self.assertIsNotNone(User.objects.get(pk=self.user.pk).last_login)
+        self.assertIsNotNone(User.objects.get(pk=other.pk).last_login)
+        self.assertEqual(self.writer.flush(), 0)
+
+
+class TokenBlacklistFilterTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        blacklist_filter.clear()
+        # The filter is only used with a cache all processes share; tests run on local memory
+        patcher = mock.patch('api.users.blacklist.is_shared_cache', return_value=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.user = User.objects.create(
+            username='candidate', email='candidate@example.com', first_name='Cat', last_name='Candidate',
+            role='candidate'
+        )
+        self.client = APIClient()
+
+    def refresh(self, token):
+        return self.client.post(reverse('token-refresh'), {'refresh': str(token)})
+
+    def blacklist_lookups(self, queries):
+        return [query['sql'] for query in queries if 'blacklistedtoken' in query['sql'] and '"jti"' in query['sql']]
+
+    def test_bloom_filter(self):
+        bloom = BloomFilter(1000, error_rate=0.01)
+        items = [uuid.uuid4().hex for _ in range(1000)]
+        for item in items:
+            bloom.add(item)
+        self.assertTrue(all(item in bloom for item in items))
+        false_positives = sum(uuid.uuid4().hex in bloom for _ in range(10000))
+        self.assertLess(false_positives, 300)
+
+    def test_valid_tokens_skip_the_blacklist_query(self):
+        token = UserService.issue_tokens(self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.refresh(token)  # builds the filter; the rotation blacklists the old token
+        blacklist_filter.sync()  # reads the rotation's row, as the version was bumped
+        with CaptureQueriesContext(connection) as queries:
+            response = self.refresh(UserService.issue_tokens(self.user))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.blacklist_lookups(queries), [])
+
+    def test_rotated_and_logged_out_tokens_are_rejected(self):
+        token = UserService.issue_tokens(self.user)
+        rotated = self.refresh(token).json()['data']['refresh']
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.refresh(token).status_code, 401)
+        self.assertEqual(len(self.blacklist_lookups(queries)), 1)
+
+        self.assertEqual(self.client.post(reverse('token-blacklist'), {'refresh': rotated}).status_code, 200)
+        self.assertEqual(self.refresh(rotated).status_code, 401)
+
+    def test_other_processes_pick_up_blacklisted_tokens(self):
+        other_process = TokenBlacklistFilter()
+        token = UserService.issue_tokens(self.user)
+        self.assertFalse(other_process.might_contain(token['jti']))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            UserService.revoke_tokens(self.user)
+        self.assertTrue(other_process.might_contain(token['jti']))
+        self.assertTrue(TokenBlacklistFilter().might_contain(token['jti']))
+
+    def test_pending_writes_are_checked_against_the_table(self):
+        other_process = TokenBlacklistFilter()
+        token = UserService.issue_tokens(self.user)
+        self.assertFalse(other_process.might_contain(token['jti']))
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            UserService.revoke_tokens(self.user)
+        # Committed, but the version isn't bumped yet
+        self.assertTrue(other_process.might_contain(token['jti']))
+        self.assertTrue(other_process.might_contain(uuid.uuid4().hex))
+        for callback in callbacks:
+            callback()
+        self.assertTrue(other_process.might_contain(token['jti']))
+        self.assertFalse(other_process.might_contain(uuid.uuid4().hex))
+
+    def test_process_local_cache_queries_the_table(self):
+        with mock.patch('api.users.blacklist.is_shared_cache', return_value=False):
+            token = UserService.issue_tokens(self.user)
+            self.refresh(UserService.issue_tokens(self.user))
+            with CaptureQueriesContext(connection) as queries:
+                self.assertEqual(self.refresh(token).status_code, 200)
+            self.assertEqual(len(self.blacklist_lookups(queries)), 1)
+            self.assertEqual(self.refresh(token).status_code, 401)
+
+    def test_prune_tokens_deletes_expired_rows_in_chunks(self):
+        now = timezone.now()
+        for index in range(5):
+            expires_at = now - timedelta(days=1) if index < 3 else now + timedelta(days=1)
+            token = OutstandingToken.objects.create(user=self.user, jti=f"jti-{index}", token='', expires_at=expires_at)
+            if index % 2 == 0:
+                BlacklistedToken.objects.create(token=token)
+
+        out = StringIO()
+        call_command('prune_tokens', chunk_size=2, stdout=out)
+        self.assertEqual(out.getvalue().strip(), "deleted 3 outstanding and 2 blacklisted tokens")
+        self.assertEqual(sorted(OutstandingToken.objects.values_list('jti', flat=True)), ['jti-3', 'jti-4'])
+        self.assertEqual(BlacklistedToken.objects.count(), 1)
+
+
+@override_settings(PASSWORD_HASH_ITERATIONS=1000)
+class UserProvisioningTests(TestCase):
+    CSV = (
+        "username,email,first_name,last_name,role,password,organisation\n"
+        "ann,ann@example.com,Ann,Lee,,Secret123!,Acme\n"
+        "bob,bob@example.com,Bob,Ray,proctor,Secret123!,\n"
+        "carl,not-an-email,Carl,Fox,,,\n"
+        "ann,ann2@example.com,Ann,Twin,,,\n"
+        "dan,taken@example.com,Dan,Moe,,,\n"
+        "eve,eve@example.com,Eve,Ng,,,\n"
+    )
+
+    def setUp(self):
+        self.admin = User.objects.create(
+            username='admin', email='taken@example.com', first_name='Ada', last_name='Admin', role='admin'
+        )
+        self.client = APIClient()
+
+    def provision(self, body, content_type):
+        self.client.force_authenticate(self.admin)
+        return self.client.generic('POST', reverse('user-provision'), body, content_type=content_type)
+
+    def test_creates_users_and_reports_failed_rows(self):
+        report = UserProvisioningService.provision(self.CSV.splitlines(keepends=True), 'csv', chunk_size=2)
+        self.assertEqual(report['created'], 3)
+        self.assertEqual([(failure['line'], sorted(failure['errors'])) for failure in report['failed']],
+                         [(4, ['email']), (5, ['username']), (6, ['email'])])
+
+        ann = User.objects.get(username='ann')
+        self.assertEqual(ann.role, 'candidate')
+        self.assertTrue(ann.check_password('Secret123!'))
+        self.assertEqual(CandidateProfile.objects.get(user=ann).organisation, 'Acme')
+        # Profiles are for candidates only; rows without a password can't log in yet
+        self.assertFalse(CandidateProfile.objects.filter(user__username='bob').exists())
+        self.assertFalse(User.objects.get(username='eve').has_usable_password())
+
+    def test_one_clash_query_and_bulk_inserts_per_chunk(self):
+        lines = [json.dumps({'username': f"user{i}", 'email': f"user{i}@example.com", 'first_name': 'U',
+                             'last_name': str(i), 'password': 'Secret123!'}) for i in range(6)]
+        with CaptureQueriesContext(connection) as queries:
+            report = UserProvisioningService.provision(lines, 'ndjson', chunk_size=3)
+        self.assertEqual(report, {'created': 6, 'failed': []})
+        statements = [query['sql'].split()[0] for query in queries]
+        self.assertEqual(statements.count('SELECT'), 2)
+        self.assertEqual(statements.count('INSERT'), 4)
+
+    def test_endpoint(self):
+        body = '{"username": "ann", "email": "ann@example.com", "first_name": "Ann", "last_name": "Lee"}\n[]\n'
+        response = self.provision(body, 'application/x-ndjson')
+        self.assertEqual(response.status_code, 200)
+        data = response.json()['data']
+        self.assertEqual(data['created'], 1)
+        self.assertEqual(data['failed'], [{'line': 2, 'errors': {'non_field_errors': ["Each line must be a JSON object"]}}])
+
+        self.assertEqual(self.provision(body, 'application/json').status_code, 415)
+        self.client.force_authenticate(User.objects.get(username='ann'))
+        response = self.client.generic('POST', reverse('user-provision'), body, content_type='application/x-ndjson')
+        self.assertEqual(response.status_code, 403)
+
+    def test_command(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.csv') as file:
+            file.write(self.CSV)
+            file.flush()
+            out, err = StringIO(), StringIO()
+            call_command('provision_users', file.name, workers=2, stdout=out, stderr=err)
+        self.assertEqual(out.getvalue().strip(), "Created 3 users, 3 rows failed")
+        self.assertIn('line 5: {"username": ["A user with that username already exists."]}', err.getvalue())
+
+
+class OpenApiSchemaTests(SimpleTestCase):
+    def setUp(self):
+        self.schema = SchemaGenerator().get_schema(request=None, public=True)
+
+    def test_endpoints_use_the_bearer_scheme(self):
+        self.assertIn('jwtAuth', self.schema['components']['securitySchemes'])
+        operation = self.schema['paths']['/api/user/me/']['get']
+        self.assertIn({'jwtAuth': []}, operation['security'])
+        self.assertIn('post', self.schema['paths']['/api/user/logout/all/'])
+
+    def test_async_login_is_documented(self):
+        operation = self.schema['paths']['/api/user/login/']['post']
+        self.assertEqual(operation['tags'], ['Auth'])
+        self.assertEqual(operation['requestBody']['content']['application/json']['schema']['required'],
+                         ['username', 'password'])
+        self.assertIn('503', operation['responses'])
@@ -0,0 +1,12 @@
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from api.users.blacklist import blacklist_filter
+
+
+class FilteredRefreshToken(RefreshToken):
+    """``RefreshToken`` that only queries the blacklist for ids ``blacklist_filter`` might contain"""
+
+    def check_blacklist(self):
+        if blacklist_filter.might_contain(self.payload[api_settings.JTI_CLAIM]):
+            super().check_blacklist()
@@ -1,12 +1,18 @@
 from django.urls import path
-from api.users.views import RegisterView, LoginView, UserDetailView, RefreshTokenView
+from django.views.decorators.csrf import csrf_exempt
+
+from api.users.async_views import AsyncLoginView
+from api.users.views import RegisterView, LogoutAllView, UserDetailView, RefreshTokenView, UserProvisionView
 from rest_framework_simplejwt.views import TokenBlacklistView
 
 
 urlpatterns = [
     path('register/', RegisterView.as_view(), name='user-register'),
-    path('login/', LoginView.as_view(), name='user-login'),
+    # Token-only API: a plain Django view needs the CSRF exemption DRF views get implicitly
+    path('login/', csrf_exempt(AsyncLoginView.as_view()), name='user-login'),
     path('refresh/', RefreshTokenView.as_view(), name='token-refresh'),
     path('logout/', TokenBlacklistView.as_view(), name='token-blacklist'),
+    path('logout/all/', LogoutAllView.as_view(), name='logout-all'),
     path('me/', UserDetailView.as_view(), name='user-detail'),
+    path('provision/', UserProvisionView.as_view(), name='user-provision'),
 ]
@@ -9,10 +9,11 @@ from rest_framework.authentication import TokenAuthentication
 from rest_framework_simplejwt.exceptions import InvalidToken
 from rest_framework_simplejwt.views import TokenRefreshView
 
-from api.core.responses import success
-from api.users.dtos import CreateUserDTO, LoginDTO
+from api.core.responses import success, error
+from api.permissions import IsAdminUser
+from api.users.dtos import CreateUserDTO
 from api.users.serializers import UserCreateSerializer, UserBaseSerializer
-from api.users.services import UserService
+from api.users.services import UserService, UserProvisioningService
 
 class RegisterView(APIView):
     @extend_schema(
@@ -32,34 +33,6 @@ class RegisterView(APIView):
         return success(UserCreateSerializer(user).data, "User registered successfully", status=status.HTTP_201_CREATED)
 
 
-class LoginView(APIView):
-    @extend_schema(
-        tags=["Auth"],
-        request={
-            "application/json": {
-                "type": "object",
-                "properties": {
-                    "username": {"type": "string", "example": "john.doe/john.doe@example.com"},
-                    "password": {"type": "string", "example": "secret123"}
-                },
-                "required": ["username", "password"]
-            }
-        },
-        responses={
-            200: OpenApiResponse(description="Login using username or email address"),
-        },
-    )
-    def post(self, request):
-        try:
-            dto = LoginDTO(
-                username=request.data.get("username"),
-                password=request.data.get("password")
-            )
-            tokens = UserService.authenticate_user(dto)
-            return success(tokens, "User logged in successfully")
-        except Exception as e:
-            raise e
-
 class RefreshTokenView(TokenRefreshView):
     @extend_schema(
         tags=["Auth"],
@@ -98,4 +71,44 @@ class UserDetailView(APIView):
     )
     def get(self, request):
         user = request.user
-        return success(UserBaseSerializer(user).data, "User details retrieved successfully")
\ No newline at end of file
+        return success(UserBaseSerializer(user).data, "User details retrieved successfully")
+
+class LogoutAllView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    @extend_schema(
+        tags=["Auth"],
+        request=None,
+        responses={
+            200: OpenApiResponse(description="Every token of the user revoked"),
+            401: OpenApiResponse(description="Authentication required"),
+        },
+    )
+    def post(self, request):
+        UserService.revoke_tokens(request.user)
+        return success(None, "Logged out of all sessions successfully")
+
+
+class UserProvisionView(APIView):
+    """Admin view to create users in bulk from a CSV or NDJSON file streamed in the request body"""
+    permission_classes = [IsAuthenticated, IsAdminUser]
+    CONTENT_TYPES = {'text/csv': 'csv', 'application/x-ndjson': 'ndjson'}
+
+    @extend_schema(
+        tags=["Admin - Users"],
+        request={content_type: {"type": "string", "format": "binary"} for content_type in CONTENT_TYPES},
+        responses={
+            200: OpenApiResponse(description="Users created, with the rows that failed and why"),
+            400: OpenApiResponse(description="Unreadable file"),
+            403: OpenApiResponse(description="Admin access required"),
+            415: OpenApiResponse(description="Body is neither CSV nor NDJSON"),
+        },
+    )
+    def post(self, request):
+        format = self.CONTENT_TYPES.get(request.content_type.split(';')[0].strip())
+        if format is None:
+            return error("Send the users as text/csv or application/x-ndjson",
+                         status.HTTP_415_UNSUPPORTED_MEDIA_TYPE)
+        # Read the raw body line by line instead of parsing it into request.data
+        report = UserProvisioningService.provision(request.stream or [], format)
+        return success(report, "Users provisioned successfully")
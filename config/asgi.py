@@ -13,4 +13,19 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 
-application = get_asgi_application()
+# Initialise Django before importing anything that touches models
+django_asgi_app = get_asgi_application()
+
+from channels.routing import ProtocolTypeRouter, URLRouter  # noqa: E402
+from channels.security.websocket import AllowedHostsOriginValidator  # noqa: E402
+
+from api.exams.routing import websocket_urlpatterns as exam_websocket_urlpatterns  # noqa: E402
+from api.proctoring.middleware import JWTAuthMiddleware  # noqa: E402
+from api.proctoring.routing import websocket_urlpatterns as proctoring_websocket_urlpatterns  # noqa: E402
+
+websocket_urlpatterns = proctoring_websocket_urlpatterns + exam_websocket_urlpatterns
+
+application = ProtocolTypeRouter({
+    'http': django_asgi_app,
+    'websocket': AllowedHostsOriginValidator(JWTAuthMiddleware(URLRouter(websocket_urlpatterns))),
+})
@@ -9,6 +9,8 @@ https://docs.djangoproject.com/en/5.2/topics/settings/
 For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
+import os
+from importlib.util import find_spec
 from datetime import timedelta
 from pathlib import Path
 
@@ -53,7 +55,11 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # Request metrics; first, so it times the whole stack (removes itself when METRICS is off)
+    'api.core.middleware.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    # gzip/brotli by Accept-Encoding; above everything else that reads or writes the body
+    'api.core.middleware.CompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -85,13 +91,112 @@ WSGI_APPLICATION = 'config.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+# Configured from the environment. SQLite (the default) runs in WAL mode with tuned pragmas
+# for local load testing; any other engine gets persistent connections with health checks,
+# or a connection pool when DB_POOL_MAX_SIZE is set (psycopg 3 only). Setting
+# DB_REPLICA_NAME/DB_REPLICA_HOST adds a 'replica' alias that read-only views read from.
+
+DB_ENGINE = os.environ.get('DB_ENGINE', 'django.db.backends.sqlite3')
+DB_POOL_MAX_SIZE = int(os.environ.get('DB_POOL_MAX_SIZE', 0))
+
+SQLITE_OPTIONS = {
+    'init_command': (
+        'PRAGMA journal_mode=WAL;'
+        'PRAGMA synchronous=NORMAL;'
+        'PRAGMA cache_size=-64000;'
+        'PRAGMA temp_store=MEMORY;'
+        'PRAGMA mmap_size=268435456;'
+    ),
+    # Take the write lock up front instead of failing to upgrade a read lock under contention
+    'transaction_mode': 'IMMEDIATE',
+    'timeout': 20,
+}
+
+
+def database_config(prefix, default_name):
+    if DB_ENGINE == 'django.db.backends.sqlite3':
+        return {
+            'ENGINE': DB_ENGINE,
+            'NAME': os.environ.get(f'{prefix}_NAME', default_name),
+            'OPTIONS': SQLITE_OPTIONS,
+        }
+
+    config = {
+        'ENGINE': DB_ENGINE,
+        'NAME': os.environ.get(f'{prefix}_NAME', os.environ.get('DB_NAME', 'sd_mvp')),
+        'USER': os.environ.get(f'{prefix}_USER', os.environ.get('DB_USER', '')),
+        'PASSWORD': os.environ.get(f'{prefix}_PASSWORD', os.environ.get('DB_PASSWORD', '')),
+        'HOST': os.environ.get(f'{prefix}_HOST', os.environ.get('DB_HOST', '')),
+        'PORT': os.environ.get(f'{prefix}_PORT', os.environ.get('DB_PORT', '')),
+        'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', 60)),
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {},
+    }
+    if DB_POOL_MAX_SIZE:
+        # Pooled connections replace persistent ones
+        config['CONN_MAX_AGE'] = 0
+        config['OPTIONS']['pool'] = {
+            'min_size': int(os.environ.get('DB_POOL_MIN_SIZE', 2)),
+            'max_size': DB_POOL_MAX_SIZE,
+            'timeout': int(os.environ.get('DB_POOL_TIMEOUT', 10)),
+        }
+    return config
+
+
 DATABASES = {
+    'default': database_config('DB', BASE_DIR / 'db.sqlite3'),
+}
+
+if os.environ.get('DB_REPLICA_NAME') or os.environ.get('DB_REPLICA_HOST'):
+    DATABASES['replica'] = database_config('DB_REPLICA', BASE_DIR / 'db-replica.sqlite3')
+    # Tests read the replica through the default connection
+    DATABASES['replica']['TEST'] = {'MIRROR': 'default'}
+
+DATABASE_ROUTERS = ['api.core.routers.PrimaryReplicaRouter']
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# Local memory by default (and in tests); point CACHE_BACKEND/CACHE_LOCATION at a shared
+# cache such as django.core.cache.backends.redis.RedisCache in production. Local memory is
+# only right for a single process: paper and attempt state invalidations don't reach the
+# other processes (manage.py check --deploy warns about it).
+
+CACHE_BACKEND = os.environ.get('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache')
+CACHE_LOCATION = os.environ.get('CACHE_LOCATION', '')
+
+CACHES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
-    }
+        'BACKEND': CACHE_BACKEND,
+        'LOCATION': CACHE_LOCATION or 'default',
+    },
+    'exam_papers': {
+        'BACKEND': CACHE_BACKEND,
+        'LOCATION': CACHE_LOCATION or 'exam-papers',
+        'KEY_PREFIX': 'exam-papers',
+        'TIMEOUT': 60 * 60,
+    },
 }
 
+# Cache alias holding serialized exam papers
+EXAM_PAPER_CACHE = 'exam_papers'
+
+# Seconds a proctor's exam assignments stay cached across requests (0 = per request only)
+PROCTOR_ASSIGNMENT_CACHE_TIMEOUT = 300
+
+# prewarm_exam_papers builds candidate paper snapshots for exams opening within this many minutes
+PAPER_PREWARM_MINUTES = 15
+
+# Stopping rules for adaptive exams; an exam can override them in settings['adaptive']
+# as max_items / min_standard_error
+ADAPTIVE_TESTING = {
+    'MAX_ITEMS': 30,
+    'MIN_STANDARD_ERROR': 0.3,
+}
+
+# Seconds an attempt's status and deadline stay cached for the autosave path (0 = no caching)
+ATTEMPT_STATE_CACHE_TIMEOUT = 300
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -137,24 +242,116 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 AUTH_USER_MODEL = "users.User"
 ASGI_APPLICATION = "config.asgi.application"
 
+# Channels
+# In-memory layer by default (single process, tests); set CHANNEL_REDIS_URL to share groups
+# across workers with channels_redis.
+
+CHANNEL_LAYERS = {
+    'default': {
+        'BACKEND': 'channels.layers.InMemoryChannelLayer',
+    },
+}
+
+if os.environ.get('CHANNEL_REDIS_URL'):
+    CHANNEL_LAYERS['default'] = {
+        'BACKEND': 'channels_redis.core.RedisChannelLayer',
+        'CONFIG': {'hosts': [os.environ['CHANNEL_REDIS_URL']]},
+    }
+
+PROCTORING_EVENTS = {
+    # Buffered telemetry is written once this many events are pending...
+    'BATCH_SIZE': 500,
+    # ...or at least this often
+    'FLUSH_INTERVAL_SECONDS': 2.0,
+    # Events of these severities are pushed to the exam's proctors immediately
+    'ALERT_SEVERITIES': ['critical'],
+}
+
+ATTEMPT_SCHEDULER = {
+    # Attempts auto-submitted per database round trip
+    'BATCH_SIZE': 500,
+    # How often attempts started by other processes are picked up
+    'REFRESH_INTERVAL_SECONDS': 5,
+    # How often every open attempt is sent its time remaining
+    'PUSH_INTERVAL_SECONDS': 30,
+}
+
 AUTHENTICATION_BACKENDS = [
+    # Also handles plain usernames and permissions, so ModelBackend isn't needed as a fallback
+    # (it would hash the password a second time on every failed login)
     'api.users.authentication.backends.EmailOrUsernameBackend',
-    'django.contrib.auth.backends.ModelBackend',  # fallback
 ]
 
+PASSWORD_HASHERS = [
+    'api.users.hashers.ConfigurablePBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+]
+
+# PBKDF2 iterations for new passwords (unset: Django's default). Logins are CPU-bound on this
+# cost; stored hashes move to a new value at each user's next successful login.
+PASSWORD_HASH_ITERATIONS = int(os.environ.get('PASSWORD_HASH_ITERATIONS', 0)) or None
+
 
 REST_FRAMEWORK = {
     "EXCEPTION_HANDLER": "api.core.exceptions.exception_handlers.custom_exception_handler",
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
-    )
+        "api.users.authentication.jwt.CachedJWTAuthentication",
+    ),
+    # Picked by the Accept header; MessagePack is only offered when the optional msgpack package is installed
+    "DEFAULT_RENDERER_CLASSES": [
+        "api.core.renderers.ORJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+        *(["api.core.renderers.MessagePackRenderer"] if find_spec("msgpack") else []),
+    ],
 }
 
 SPECTACULAR_SETTINGS = {
     'TITLE': 'SD Proctoring API',
     'DESCRIPTION': 'API for SD Proctoring System',
     'VERSION': '1.0.0',
+    # Keep the default enum hook; the login view is a plain Django view spectacular doesn't see
+    'POSTPROCESSING_HOOKS': [
+        'drf_spectacular.hooks.postprocess_schema_enums',
+        'api.users.schema.document_login',
+    ],
+}
+
+# Password logins run in a bounded worker pool (see api.users.login). Logins beyond
+# WORKERS + MAX_QUEUED get 503 with Retry-After; last_login is written in batches.
+LOGIN_POOL = {
+    'WORKERS': int(os.environ.get('LOGIN_POOL_WORKERS', os.cpu_count() or 1)),
+    'MAX_QUEUED': int(os.environ.get('LOGIN_POOL_MAX_QUEUED', 64)),
+    'RETRY_AFTER_SECONDS': 2,
+    'LAST_LOGIN_FLUSH_SECONDS': 5,
+    'LAST_LOGIN_BATCH_SIZE': 500,
+}
+
+# Per-endpoint latency, DB queries and time, serializer time and response size, served at
+# /metrics in the Prometheus text format. LOG_REQUESTS also logs one JSON line per request
+# to the 'api.requests' logger. Scrapers send TOKEN as a bearer token; without one /metrics is
+# only served with DEBUG on.
+METRICS = {
+    'ENABLED': os.environ.get('METRICS_ENABLED', '1') != '0',
+    'LOG_REQUESTS': os.environ.get('METRICS_LOG_REQUESTS', '0') == '1',
+    'TOKEN': os.environ.get('METRICS_TOKEN', ''),
+}
+
+# Bulk user provisioning (see UserProvisioningService): threads hashing passwords and rows
+# written per chunk (one clash-check query and one bulk insert per table each)
+USER_PROVISIONING = {
+    'HASH_WORKERS': int(os.environ.get('PROVISIONING_HASH_WORKERS', os.cpu_count() or 1)),
+    'CHUNK_SIZE': 1000,
+}
+
+# In-process cache of the users behind access tokens (see CachedJWTAuthentication). A role
+# change or token revocation made by another process is seen there once its entry expires.
+AUTH_PRINCIPAL_CACHE = {
+    'TTL_SECONDS': 30,
+    'MAX_ENTRIES': 10000,
 }
 
 SIMPLE_JWT = {
@@ -163,5 +360,8 @@ SIMPLE_JWT = {
     "AUTH_HEADER_TYPES": ("Bearer",),
     "ROTATE_REFRESH_TOKENS": True,
     "BLACKLIST_AFTER_ROTATION": True,
+    # Blacklist checks go through an in-memory bloom filter (api.users.blacklist)
+    "TOKEN_REFRESH_SERIALIZER": "api.users.serializers.FilteredTokenRefreshSerializer",
+    "TOKEN_BLACKLIST_SERIALIZER": "api.users.serializers.FilteredTokenBlacklistSerializer",
 }
 
@@ -17,11 +17,14 @@ Including another URLconf
 from django.contrib import admin
 from django.urls import path, include
 
+from api.core.views import MetricsView
 from drf_spectacular.views import SpectacularAPIView, SpectacularSwaggerView, SpectacularRedocView
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/', include('api.urls')),
+    # Prometheus scrape target (see METRICS in settings)
+    path('metrics', MetricsView.as_view(), name='metrics'),
 ]
 
 urlpatterns += [